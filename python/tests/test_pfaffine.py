@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+'''
+pfaffineとpfmatrixの比較
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pfaffine
+from tktnm import pfmatrix
+
+from .test_pfmatrix import randomMatrices
+
+
+class InverseTest(unittest.TestCase) :
+  def assertIdentity(self, inA) :
+    for ( a, b ) in zip(inA, pfaffine.identity()) : self.assertAlmostEqual(a, b, places=9)
+
+  def test_matchesInverseTransform(self) :
+    for m in randomMatrices(random.Random(30), 200, negative=False) :
+      a = pfaffine.fromMatrix(m)
+      inv = pfaffine.inverse(a)
+      self.assertIdentity(pfaffine.multiply(a, inv))
+      for ( x, y ) in zip(inv, pfaffine.fromMatrix(pfmatrix.inverseTransform(m))) : self.assertAlmostEqual(x, y, places=9)
+
+  def test_smallScale(self) :
+    # 行列式は1.0e-15
+    m = pfmatrix.fromScale([ 1.0e-5, 1.0e-5, 1.0e-5, 0.0 ])
+    a = pfaffine.fromMatrix(m)
+    self.assertIdentity(pfaffine.multiply(a, pfaffine.inverse(a)))
+    self.assertAlmostEqual(pfaffine.inverse(a)[0], pfmatrix.inverseTransform(m)[0], places=6)
+
+  def test_singular(self) :
+    self.assertEqual(pfaffine.inverse([ 0.0 ] * 12), pfaffine.identity())
+
+
+if __name__ == '__main__' :
+  unittest.main()
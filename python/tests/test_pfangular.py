@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+'''
+pfangularの角速度と積分
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import random
+import unittest
+
+from tktnm import pfangular
+from tktnm import pfquaternion
+from .test_pfquaternion import randomQuaternion
+
+
+DT = 1.0 / 30.0
+
+
+def randomTracks(inRng, inFrameCount, inBoneCount) :
+  # フレームごとに小さく回し、w < 0 になるよう符号を反転したものを混ぜる
+  cur = [ randomQuaternion(inRng) for _ in range(inBoneCount) ]
+  retVal = []
+  for frame in range(inFrameCount) :
+    qts = [ [ -v for v in q ] if (frame + bone) % 3 == 0 else list(q) for ( bone, q ) in enumerate(cur) ]
+    retVal.append(qts)
+    cur = [ pfquaternion.multiply(q, pfquaternion.fromAxisDeg(pfquaternion.normal([ inRng.uniform(-1.0, 1.0) for _ in range(3) ] + [ 0.0 ]), inRng.uniform(0.0, 170.0))) for q in cur ]
+  return retVal
+
+
+class AngularTest(unittest.TestCase) :
+  def assertSameRotation(self, inA, inB) :
+    d = abs(sum([ a * b for ( a, b ) in zip(inA, inB) ]))
+    self.assertAlmostEqual(d, 1.0, delta=1.0e-9)
+
+  def test_roundTrip(self) :
+    rng = random.Random(42)
+    tracks = randomTracks(rng, 12, 5)
+    self.assertTrue(any([ q[3] < 0.0 for qts in tracks for q in qts ]))
+    for frame in ( pfangular.FRAME_LOCAL, pfangular.FRAME_WORLD ) :
+      vel = pfangular.angularVelocity(tracks, DT, frame)
+      self.assertEqual(( len(vel), len(vel[0]) ), ( 11, 5 ))
+      result = pfangular.integrate(tracks[0], vel, DT, frame)
+      self.assertEqual(len(result), len(tracks))
+      for ( qts, expected ) in zip(result, tracks) :
+        for ( q, e ) in zip(qts, expected) : self.assertSameRotation(q, e)
+
+  def test_velocity(self) :
+    rng = random.Random(420)
+    tracks = randomTracks(rng, 6, 3)
+    for ( frame, relFunc ) in ( ( pfangular.FRAME_LOCAL, lambda a, b : pfquaternion.inverseMultiply(a, b) ),
+        ( pfangular.FRAME_WORLD, lambda a, b : pfquaternion.multiplyInverse(b, a) ) ) :
+      rels = pfangular.relativeRotations(tracks, frame)
+      vel = pfangular.angularVelocity(tracks, DT, frame)
+      for f in range(len(tracks) - 1) :
+        for bone in range(3) :
+          rel = relFunc(tracks[f][bone], tracks[f+1][bone])
+          # w >= 0 (180度以下)にそろえる
+          self.assertGreaterEqual(rels[f][bone][3], 0.0)
+          self.assertSameRotation(rels[f][bone], rel)
+          v = pfquaternion.log(rels[f][bone])
+          for c in range(3) : self.assertAlmostEqual(vel[f][bone][c], 2.0 * v[c] / DT, delta=1.0e-9)
+          self.assertEqual(vel[f][bone][3], 0.0)
+
+  def test_constant(self) :
+    # 一定の角速度なら角加速度は0
+    step = pfquaternion.fromAxisDeg([ 0.0, 0.0, 1.0, 0.0 ], 12.0)
+    tracks = [ [ pfquaternion.identity() ] ]
+    for _ in range(5) : tracks.append([ pfquaternion.multiply(tracks[-1][0], step) ])
+    vel = pfangular.angularVelocity(tracks, DT)
+    for v in vel : self.assertAlmostEqual(v[0][2], math.radians(12.0) / DT, delta=1.0e-9)
+    for a in pfangular.angularAcceleration(tracks, DT) :
+      for c in range(3) : self.assertAlmostEqual(a[0][c], 0.0, delta=1.0e-6)
+
+  def test_short(self) :
+    self.assertEqual(pfangular.angularVelocity([ [ pfquaternion.identity() ] ], DT), [])
+    self.assertEqual(pfangular.angularAcceleration([], DT), [])
+    self.assertEqual(pfangular.integrate([ [ 0.0, 0.0, 0.0, 1.0 ] ], [], DT), [ [ [ 0.0, 0.0, 0.0, 1.0 ] ] ])
+    tracks = [ [ pfquaternion.identity() ] ] * 2
+    self.assertRaises(ValueError, pfangular.angularVelocity, tracks, DT, 'parent')
+    self.assertRaises(ValueError, pfangular.integrate, tracks[0], [ [ [ 0.0, 0.0, 0.0, 0.0 ] ] ], DT, 'parent')
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+'''
+pfbakeの階層とsink
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import io
+import math
+import unittest
+
+from tktnm import pfbake
+from tktnm import pfmatrix
+from tktnm import pfquaternion
+from tktnm import pfserialize
+
+
+PARENTS = [ -1, 0, 1, 0 ]
+
+
+def evaluate(inFrame) :
+  retVal = []
+  for bone in range(len(PARENTS)) :
+    t = inFrame * 0.1 + bone
+    trn = [ math.sin(t), float(bone), math.cos(t), 0.0 ]
+    qt = pfquaternion.fromAxisDeg([ 0.0, 1.0, 0.0, 0.0 ], 10.0 * inFrame + 30.0 * bone)
+    retVal.append(( trn, qt, [ 0.0, 0.0, 0.0, 0.0 ], [ 1.0, 1.0 + 0.1 * bone, 1.0, 0.0 ] ))
+  return retVal
+
+def worlds(inFrame) :
+  retVal = []
+  for ( bone, ( trn, qt, shr, scl ) ) in enumerate(evaluate(inFrame)) :
+    mtx = pfmatrix.compose(trn, qt, shr, scl)
+    if PARENTS[bone] >= 0 : mtx = pfmatrix.multiply(retVal[PARENTS[bone]], mtx)
+    retVal.append(mtx)
+  return retVal
+
+def asFloat32(inMtx) :
+  return array.array('f', inMtx).tolist()
+
+
+class Socket(object) :
+  def __init__(self) :
+    self.sent = []
+  def sendall(self, inData) :
+    self.sent.append(bytes(inData))
+
+class Stream(object) :
+  # write()だけでseek()できないもの
+  def __init__(self) :
+    self.data = b''
+  def write(self, inData) :
+    self.data += inData
+
+
+class EvaluateTest(unittest.TestCase) :
+  def test_hierarchy(self) :
+    for frame in ( 0, 7 ) :
+      mtxs = pfbake.evaluateFrame(evaluate(frame), PARENTS)
+      self.assertEqual(mtxs, worlds(frame))
+      # 子のworldは親のworldとlocalの積
+      local = pfmatrix.compose(*evaluate(frame)[2])
+      self.assertEqual(mtxs[2], pfmatrix.multiply(pfmatrix.multiply(mtxs[0], pfmatrix.compose(*evaluate(frame)[1])), local))
+
+  def test_outputs(self) :
+    decs = pfbake.evaluateFrame(evaluate(3), PARENTS, pfbake.OUTPUT_DECOMPOSE)
+    self.assertEqual(decs, [ pfmatrix.decompose(mtx) for mtx in worlds(3) ])
+    euls = pfbake.evaluateFrame(evaluate(3), PARENTS, pfbake.OUTPUT_EULER, order=2)
+    for ( ( trn, eul, shr, scl ), ( dTrn, dQt, dShr, dScl ) ) in zip(euls, decs) :
+      self.assertEqual(( trn, shr, scl ), ( dTrn, dShr, dScl ))
+      self.assertEqual(eul, pfquaternion.toEuler(2, dQt))
+
+
+class BakeTest(unittest.TestCase) :
+  def test_callback(self) :
+    chunks = []
+    count = pfbake.bake(lambda frames, records : chunks.append(( frames, records )), evaluate, range(10), PARENTS, chunkSize=4)
+    self.assertEqual(count, 10)
+    self.assertEqual([ frames for ( frames, _ ) in chunks ], [ [ 0, 1, 2, 3 ], [ 4, 5, 6, 7 ], [ 8, 9 ] ])
+    for ( frames, records ) in chunks :
+      self.assertEqual(records, [ worlds(frame) for frame in frames ])
+
+  def test_write(self) :
+    f = io.BytesIO()
+    f.write(b'prefix')
+    # lenの使えないgenerator
+    count = pfbake.bake(f, evaluate, ( frame for frame in range(10) ), PARENTS, chunkSize=4)
+    self.assertEqual(count, 10)
+    loaded = pfserialize.load(f.getvalue()[6:])
+    self.assertEqual(( loaded.Layout, loaded.Count ), ( pfserialize.LAYOUT_MATRIX, 10 * len(PARENTS) ))
+    self.assertEqual(list(loaded), [ asFloat32(mtx) for frame in range(10) for mtx in worlds(frame) ])
+    # 続けて書ける位置にある
+    self.assertEqual(f.tell(), len(f.getvalue()))
+
+  def test_writeDecompose(self) :
+    f = io.BytesIO()
+    pfbake.bake(f, evaluate, range(3), PARENTS, output=pfbake.OUTPUT_DECOMPOSE, dtype=pfserialize.FLOAT64)
+    loaded = pfserialize.load(f.getvalue())
+    self.assertEqual(loaded.Layout, pfserialize.LAYOUT_TRSS)
+    self.assertEqual(list(loaded), [ pfserialize.unflatten(pfserialize.LAYOUT_TRSS, pfserialize.flatten(pfserialize.LAYOUT_TRSS, dec))
+      for frame in range(3) for dec in pfbake.evaluateFrame(evaluate(frame), PARENTS, pfbake.OUTPUT_DECOMPOSE) ])
+
+  def test_stopEarly(self) :
+    def failing(inFrame) :
+      if inFrame == 5 : raise RuntimeError('stop')
+      return evaluate(inFrame)
+    f = io.BytesIO()
+    self.assertRaises(RuntimeError, pfbake.bake, f, failing, range(10), PARENTS, chunkSize=2)
+    loaded = pfserialize.load(f.getvalue())
+    self.assertEqual(loaded.Count, 4 * len(PARENTS))
+    self.assertEqual(len(f.getvalue()), pfserialize.HEADER.size + 4 * len(PARENTS) * 16 * 4)
+
+  def test_sendall(self) :
+    sock = Socket()
+    self.assertEqual(pfbake.bake(sock, evaluate, range(10), PARENTS, chunkSize=4), 10)
+    self.assertEqual(len(sock.sent), 3)
+    blocks = pfserialize.loadBlocks(b''.join(sock.sent))
+    self.assertEqual([ len(block) for block in blocks ], [ 4 * len(PARENTS), 4 * len(PARENTS), 2 * len(PARENTS) ])
+    self.assertEqual([ rec for block in blocks for rec in block ], [ asFloat32(mtx) for frame in range(10) for mtx in worlds(frame) ])
+
+  def test_stream(self) :
+    stream = Stream()
+    pfbake.bake(stream, evaluate, iter(range(5)), PARENTS, chunkSize=2)
+    blocks = pfserialize.loadBlocks(stream.data)
+    self.assertEqual(sum([ len(block) for block in blocks ]), 5 * len(PARENTS))
+
+  def test_errors(self) :
+    self.assertRaises(ValueError, pfbake.bake, io.BytesIO(), evaluate, range(2), PARENTS, pfbake.OUTPUT_EULER)
+    self.assertRaises(TypeError, pfbake.bake, object(), evaluate, range(2), PARENTS)
+
+
+if __name__ == '__main__' :
+  unittest.main()
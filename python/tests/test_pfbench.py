@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+'''
+pfbenchの保存, 比較と閾値
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from tktnm import pfbench
+
+
+def result(inNs, inBatchedNs=None, inImportUs=None) :
+  retVal = { 'meta' : {}, 'results' : dict([ ( key, { 'nsPerCall' : ns } ) for ( key, ns ) in inNs.items() ]), 'batched' : {}, 'imports' : {} }
+  for ( key, ns ) in (inBatchedNs or {}).items() :
+    retVal['batched'][key] = { 'batched' : pfbench.BATCHED[key], 'batchedNsPerItem' : ns }
+  retVal['imports'].update(inImportUs or {})
+  return retVal
+
+
+class CompareTest(unittest.TestCase) :
+  def test_threshold(self) :
+    base = result({ 'pfmatrix.multiply' : 100.0, 'pfmatrix.compose' : 200.0, 'pffloat4.add' : 0.0 },
+      { 'pfquaternion.slerp' : 50.0 }, { 'tktnm' : 1000 })
+    cur = result({ 'pfmatrix.multiply' : 115.0, 'pfmatrix.compose' : 205.0, 'pffloat4.add' : 10.0, 'pffloat4.sub' : 10.0 },
+      { 'pfquaternion.slerp' : 60.0 }, { 'tktnm' : 1050 })
+    regressions = pfbench.compare(base, cur, threshold=0.1)
+    self.assertEqual([ r[0] for r in regressions ], [ 'pfmatrix.multiply', 'pfquaternion.slerpBatch' ])
+    self.assertEqual(regressions[0][1:], ( 100.0, 115.0, 1.15 ))
+    self.assertAlmostEqual(regressions[1][3], 1.2)
+    self.assertEqual([ r[0] for r in pfbench.compare(base, cur, threshold=0.02) ],
+      [ 'pfmatrix.compose', 'pfmatrix.multiply', 'pfquaternion.slerpBatch', 'import tktnm' ])
+    self.assertEqual(pfbench.compare(base, cur, threshold=0.5), [])
+    # 速くなったものは含まない
+    self.assertEqual(pfbench.compare(cur, base, threshold=0.0), [])
+
+
+class SaveTest(unittest.TestCase) :
+  def test_saveLoad(self) :
+    data = pfbench.run(modules=( 'pffloat4', ), pattern='pffloat4.dot3', poolSize=4, targetSec=0.0001, repeat=1)
+    self.assertEqual(list(data['results']), [ 'pffloat4.dot3' ])
+    self.assertGreater(data['results']['pffloat4.dot3']['nsPerCall'], 0.0)
+    with tempfile.TemporaryDirectory() as tmp :
+      path = os.path.join(tmp, 'base.json')
+      pfbench.save(data, path)
+      self.assertEqual(pfbench.load(path), data)
+
+  def test_main(self) :
+    base = result({ 'pfmatrix.multiply' : 100.0 })
+    with tempfile.TemporaryDirectory() as tmp :
+      ( basePath, curPath ) = ( os.path.join(tmp, 'base.json'), os.path.join(tmp, 'cur.json') )
+      pfbench.save(base, basePath)
+      pfbench.save(result({ 'pfmatrix.multiply' : 130.0 }), curPath)
+      out = io.StringIO()
+      with contextlib.redirect_stdout(out) :
+        self.assertEqual(pfbench.main([ 'compare', basePath, curPath ]), 1)
+        self.assertEqual(pfbench.main([ 'compare', basePath, curPath, '--threshold', '0.5' ]), 0)
+      self.assertIn('pfmatrix.multiply', out.getvalue())
+      self.assertIn('no regressions', out.getvalue())
+
+
+class InputTest(unittest.TestCase) :
+  def test_makeArgs(self) :
+    # batched版以外のすべての公開関数の引数を作れる(runと同じ)
+    random.seed(27)
+    batchNames = set(pfbench.BATCHED.values())
+    for modName in pfbench.MODULES :
+      for ( name, func ) in pfbench.publicFunctions(modName) :
+        if modName + '.' + name in batchNames : continue
+        func(*pfbench.makeArgs(modName + '.' + name, func))
+
+  def test_batched(self) :
+    random.seed(270)
+    for ( scalarName, batchName ) in pfbench.BATCHED.items() :
+      ( modName, funcName ) = scalarName.split('.')
+      func = dict(pfbench.publicFunctions(modName))[funcName]
+      pool = [ pfbench.makeArgs(scalarName, func) for _ in range(16) ]
+      self.assertEqual(pfbench.checkBatched(scalarName, batchName, pool), 0, scalarName)
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+'''
+pfdedupのキーとpfDedupIndex
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pfdedup
+from tktnm import pfmatrix
+from .test_pfmatrix import randomMatrices
+from .test_pfquaternion import randomQuaternion
+
+
+class KeyTest(unittest.TestCase) :
+  def test_quaternionSign(self) :
+    rng = random.Random(47)
+    qts = [ randomQuaternion(rng) for _ in range(200) ]
+    # w が0のもの, w と x が0のもの
+    qts += [ [ 0.6, -0.8, 0.0, 0.0 ], [ -0.6, 0.8, 0.0, 0.0 ], [ 0.0, 0.0, -1.0, 0.0 ], [ 0.0, -1.0e-9, 1.0, 0.0 ] ]
+    for qt in qts :
+      self.assertEqual(pfdedup.quaternionKey([ -v for v in qt ]), pfdedup.quaternionKey(qt))
+    self.assertEqual(pfdedup.quaternionKey([ 0.6, -0.8, 0.0, 0.0 ]), pfdedup.quaternionKey([ -0.6, 0.8, 0.0, 0.0 ]))
+    self.assertNotEqual(pfdedup.quaternionKey([ 0.6, 0.8, 0.0, 0.0 ]), pfdedup.quaternionKey([ -0.6, 0.8, 0.0, 0.0 ]))
+
+  def test_tolerance(self) :
+    mtx = pfmatrix.identity()
+    self.assertEqual(pfdedup.matrixKey([ v + 1.0e-8 for v in mtx ]), pfdedup.matrixKey(mtx))
+    self.assertNotEqual(pfdedup.matrixKey([ v + 1.0e-4 for v in mtx ]), pfdedup.matrixKey(mtx))
+    self.assertEqual(pfdedup.matrixKey([ v + 1.0e-4 for v in mtx ], tolerance=1.0e-2), pfdedup.matrixKey(mtx, tolerance=1.0e-2))
+    self.assertEqual(len(pfdedup.vectorKey([ 1.0, 2.0, 3.0, 4.0 ])), 3)
+
+  def test_trsKey(self) :
+    trn = [ 1.0, 2.0, 3.0, 0.0 ]
+    qt = [ 0.0, 0.6, 0.0, 0.8 ]
+    scl = [ 1.0, 1.0, 1.0, 0.0 ]
+    shr = [ 0.0, 0.0, 0.0, 0.0 ]
+    self.assertEqual(pfdedup.trsKey(( trn, qt, scl )), pfdedup.trsKey(( trn, [ -v for v in qt ], scl )))
+    self.assertEqual(len(pfdedup.trsKey(( trn, qt, scl ))), 3)
+    self.assertEqual(len(pfdedup.trsKey(( trn, qt, shr, scl ))), 4)
+
+
+class DedupIndexTest(unittest.TestCase) :
+  def test_ids(self) :
+    rng = random.Random(470)
+    uniq = randomMatrices(rng, 20)
+    order = [ rng.randrange(len(uniq)) for _ in range(200) ]
+    mtxs = [ list(uniq[idx]) for idx in order ]
+    index = pfdedup.pfDedupIndex(pfdedup.matrixKey)
+    ids = index.addMany(mtxs)
+    self.assertEqual(len(index), len(set(order)))
+    self.assertEqual(sorted(set(ids)), list(range(len(index))))
+    for ( idx, id ) in zip(order, ids) :
+      self.assertEqual(pfdedup.matrixKey(index[id]), pfdedup.matrixKey(uniq[idx]))
+      self.assertEqual(index.find(uniq[idx]), id)
+    # IDは最初に登録した順
+    self.assertEqual(ids[0], 0)
+    self.assertIs(index.Values[0], mtxs[0])
+    self.assertIn(uniq[order[0]], index)
+    self.assertIsNone(index.find(pfmatrix.identity()))
+    self.assertNotIn(pfmatrix.identity(), index)
+
+  def test_apply(self) :
+    mtxs = randomMatrices(random.Random(471), 10)
+    index = pfdedup.pfDedupIndex()
+    ids = index.addMany(mtxs * 3)
+    calls = []
+    decs = index.apply(lambda mtx : calls.append(mtx) or pfmatrix.decompose(mtx))
+    self.assertEqual(len(calls), 10)
+    for ( mtx, id ) in zip(mtxs * 3, ids) :
+      self.assertEqual(decs[id], pfmatrix.decompose(mtx))
+
+  def test_quaternionIndex(self) :
+    index = pfdedup.pfDedupIndex(pfdedup.quaternionKey, tolerance=1.0e-4)
+    self.assertEqual(index.Tolerance, 1.0e-4)
+    ids = index.addMany([ [ 0.0, 0.6, 0.0, 0.8 ], [ 0.0, -0.6, 0.0, -0.8 ], [ 0.0, 0.6, 0.0, -0.8 ] ])
+    self.assertEqual(ids, [ 0, 0, 1 ])
+    self.assertEqual(index.key([ 0.0, -0.6, 0.0, -0.8 ]), index.key([ 0.0, 0.6, 0.0, 0.8 ]))
+    index.clear()
+    self.assertEqual(len(index), 0)
+    self.assertEqual(index.add([ 0.0, 0.0, 0.0, 1.0 ]), 0)
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+'''
+pffrozenのfreeze, thawとtupleを返すモジュール
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pffloat4
+from tktnm import pffrozen
+from tktnm import pfmatrix
+from tktnm import pfmemo
+from tktnm import pfquaternion
+from .test_pfmatrix import randomMatrices
+from .test_pfquaternion import randomQuaternion
+
+
+def calls(inRng) :
+  # ( module, 関数名, 引数 )
+  ( a, b, c ) = [ [ inRng.uniform(-2.0, 2.0) for _ in range(4) ] for _ in range(3) ]
+  ( qa, qb ) = ( randomQuaternion(inRng), randomQuaternion(inRng) )
+  ( ma, mb ) = randomMatrices(inRng, 2)
+  dec = pfmatrix.decompose(ma)
+  return [
+    ( pffloat4, 'add', ( a, b ) ), ( pffloat4, 'sub', ( a, b ) ), ( pffloat4, 'mul', ( a, b ) ),
+    ( pffloat4, 'madd', ( a, b, c ) ), ( pffloat4, 'mulScalar', ( a, 0.5 ) ), ( pffloat4, 'neg', ( a, ) ),
+    ( pffloat4, 'cross3', ( a, b ) ), ( pffloat4, 'dot3', ( a, b ) ), ( pffloat4, 'dot4', ( a, b ) ),
+    ( pffloat4, 'normal3', ( a, ) ), ( pffloat4, 'normal4', ( a, ) ), ( pffloat4, 'interp', ( a, b, c ) ),
+    ( pffloat4, 'setW0', ( a, ) ), ( pffloat4, 'swizzleYZXW', ( a, ) ), ( pffloat4, 'shuffleXAZC', ( a, b ) ),
+    ( pffloat4, 'select', ( a, b, pffloat4.isLT(a, b) ) ), ( pffloat4, 'axisX', () ),
+    ( pfquaternion, 'multiply', ( qa, qb ) ), ( pfquaternion, 'inverseMultiply', ( qa, qb ) ),
+    ( pfquaternion, 'multiplyInverse', ( qa, qb ) ), ( pfquaternion, 'inverse', ( qa, ) ),
+    ( pfquaternion, 'normal', ( a, ) ), ( pfquaternion, 'slerp', ( qa, qb, 0.3 ) ),
+    ( pfquaternion, 'interpLinear', ( qa, qb, 0.3 ) ), ( pfquaternion, 'fromEuler', ( 1, a[:3] ) ),
+    ( pfquaternion, 'toEuler', ( 1, qa ) ), ( pfquaternion, 'fromAxisDeg', ( pffloat4.normal3(a), 30.0 ) ),
+    ( pfquaternion, 'toAxisDeg', ( qa, ) ), ( pfquaternion, 'log', ( qa, ) ), ( pfquaternion, 'exp', ( a, ) ),
+    ( pfquaternion, 'axisX', ( qa, ) ), ( pfquaternion, 'fromVector', ( a, b ) ),
+    ( pfquaternion, 'lookAt', ( a, b ) ), ( pfquaternion, 'slerpBatch', ( [ qa, qb ], [ qb, qa ], [ 0.2, 0.7 ] ) ),
+    ( pfmatrix, 'multiply', ( ma, mb ) ), ( pfmatrix, 'transpose', ( ma, ) ), ( pfmatrix, 'getRow', ( ma, 1 ) ),
+    ( pfmatrix, 'setRow', ( ma, a, 2 ) ), ( pfmatrix, 'compose', dec ), ( pfmatrix, 'decompose', ( ma, ) ),
+    ( pfmatrix, 'inverseTransform', ( ma, ) ), ( pfmatrix, 'fromQuaternion', ( qa, ) ),
+    ( pfmatrix, 'toQuaternion', ( ma, ) ), ( pfmatrix, 'toShearScale', ( ma, ) ),
+    ( pfmatrix, 'blendMatrix', ( ma, mb, 0.4 ) ), ( pfmatrix, 'decomposeBatch', ( [ ma, mb ], ) ),
+    ( pfmatrix, 'composeBatch', ( [ dec[0] ], [ dec[1] ], [ dec[2] ], [ dec[3] ] ) ),
+  ]
+
+def isFrozen(inValue) :
+  if isinstance(inValue, list) : return False
+  if isinstance(inValue, tuple) : return all([ isFrozen(v) for v in inValue ])
+  return True
+
+
+class FreezeTest(unittest.TestCase) :
+  def test_freezeThaw(self) :
+    dec = pfmatrix.decompose(pfmatrix.identity())
+    frozen = pffrozen.freeze(dec)
+    self.assertEqual(frozen, tuple([ tuple(v) for v in dec ]))
+    hash(frozen)
+    self.assertEqual(pffrozen.thaw(frozen), tuple(dec))
+    self.assertEqual(pffrozen.freeze([ 1.0, 2.0 ]), ( 1.0, 2.0 ))
+    self.assertEqual(pffrozen.thaw(( 1.0, 2.0 )), [ 1.0, 2.0 ])
+    self.assertEqual(pffrozen.freeze([ [ 1.0 ], [ [ 2.0 ] ] ]), ( ( 1.0, ), ( ( 2.0, ), ) ))
+    self.assertEqual(pffrozen.thaw(( ( 1.0, ), ( ( 2.0, ), ) )), ( [ 1.0 ], ( [ 2.0 ], ) ))
+    for v in ( 1.0, 3, None, 'x' ) :
+      self.assertIs(pffrozen.freeze(v), v)
+      self.assertIs(pffrozen.thaw(v), v)
+    # thawは複製
+    mtx = pffrozen.freeze(pfmatrix.identity())
+    self.assertIsNot(pffrozen.thaw(mtx), pffrozen.thaw(mtx))
+
+  def test_frozen(self) :
+    multiply = pffrozen.frozen(pfmatrix.multiply)
+    self.assertEqual(multiply.__name__, 'multiply')
+    self.assertEqual(multiply(pfmatrix.identity(), pfmatrix.identity()), tuple(pfmatrix.identity()))
+
+
+class FrozenModuleTest(unittest.TestCase) :
+  def test_tupleArguments(self) :
+    frozenModules = { pffloat4 : pffrozen.float4, pfquaternion : pffrozen.quaternion, pfmatrix : pffrozen.matrix }
+    for ( mod, name, args ) in calls(random.Random(48)) :
+      expected = pffrozen.freeze(getattr(mod, name)(*args))
+      result = getattr(frozenModules[mod], name)(*pffrozen.freeze(list(args)))
+      self.assertEqual(result, expected, '%s.%s' % (mod.__name__, name))
+      self.assertTrue(isFrozen(result), '%s.%s' % (mod.__name__, name))
+
+  def test_attributes(self) :
+    m = pffrozen.pfFrozenModule(pfmatrix)
+    self.assertIs(m.Module, pfmatrix)
+    self.assertIs(m.multiply, m.multiply)
+    self.assertEqual(m.multiply.__name__, 'multiply')
+    self.assertIn('decompose', dir(m))
+    self.assertRaises(AttributeError, getattr, m, 'noSuchFunction')
+
+  def test_replaced(self) :
+    m = pffrozen.pfFrozenModule(pfquaternion)
+    fromEuler = m.fromEuler
+    pfmemo.clear()
+    pfmemo.install([ 'fromEuler' ])
+    try :
+      self.assertEqual(fromEuler(0, ( 10.0, 20.0, 30.0 )), pffrozen.freeze(pfquaternion.fromEuler(0, [ 10.0, 20.0, 30.0 ])))
+      self.assertEqual(pfmemo.stats()['fromEuler']['hits'], 1)
+    finally :
+      pfmemo.uninstall()
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+'''
+pfintegratorの積分
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import unittest
+
+from tktnm import pfintegrator
+from tktnm import pfquaternion
+
+
+class IntegrateTest(unittest.TestCase) :
+  def test_constantVelocity(self) :
+    # Z軸まわりに1rad/sで1秒
+    integ = pfintegrator.pfOrientationIntegrator(1, renormalizeInterval=4)
+    for _ in range(100) : integ.step([ 0.0, 0.0, 1.0 ], 0.01)
+    expected = pfquaternion.fromAxisDeg([ 0.0, 0.0, 1.0, 0.0 ], math.degrees(1.0))
+    for ( a, b ) in zip(integ.Orientations.tolist(), expected) : self.assertAlmostEqual(a, b, places=9)
+
+  def test_normalizeZero(self) :
+    res = pfintegrator.integrate([ 0.0, 0.0, 0.0, 0.0 ], [ 0.0, 0.0, 0.0 ], 0.1, normalize=True)
+    self.assertEqual(res.tolist(), [ 0.0, 0.0, 0.0, 1.0 ])
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+'''
+pfkeyreduceの許容値と端点
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import bisect
+import math
+import random
+import unittest
+
+from tktnm import pfkeyreduce
+from tktnm import pfquaternion
+
+
+def angleDegree(inA, inB) :
+  d = abs(sum([ a * b for ( a, b ) in zip(inA, inB) ]))
+  return math.degrees(2.0 * math.acos(min(d, 1.0)))
+
+def sampleTimes(inRng, inCount) :
+  t = 0.0
+  retVal = []
+  for _ in range(inCount) :
+    retVal.append(t)
+    t += inRng.uniform(0.5, 1.5) / 30.0
+  return retVal
+
+def segment(inKeyTimes, inTime) :
+  # inTimeを含む区間 ( i, rate )
+  idx = min(max(bisect.bisect_right(inKeyTimes, inTime) - 1, 0), len(inKeyTimes) - 2)
+  return ( idx, (inTime - inKeyTimes[idx]) / (inKeyTimes[idx+1] - inKeyTimes[idx]) )
+
+
+class ReduceKeysTest(unittest.TestCase) :
+  def test_quaternion(self) :
+    rng = random.Random(35)
+    times = sampleTimes(rng, 300)
+    qts = []
+    for t in times :
+      ax = pfquaternion.normal([ math.sin(t), math.cos(t * 0.7), 0.5, 0.0 ])
+      qts.append(pfquaternion.fromAxisDeg(ax, 90.0 * math.sin(t * 2.0) + rng.uniform(-0.05, 0.05)))
+    # 符号が反転したサンプル(同じ回転)
+    qts[100] = [ -v for v in qts[100] ]
+    for ( interp, func ) in ( ( pfkeyreduce.INTERP_SLERP, pfquaternion.slerp ), ( pfkeyreduce.INTERP_LINEAR, pfquaternion.interpLinear ) ) :
+      for tol in ( 0.5, 2.0 ) :
+        ( keyTimes, keyQts ) = pfkeyreduce.reduce(times, qts, tol, pfkeyreduce.CHANNEL_QUATERNION, interp=interp)
+        self.assertEqual(( keyTimes[0], keyTimes[-1] ), ( times[0], times[-1] ))
+        self.assertLess(len(keyTimes), len(times) // 2)
+        for ( t, qt ) in zip(times, qts) :
+          ( idx, r ) = segment(keyTimes, t)
+          self.assertLessEqual(angleDegree(func(keyQts[idx], keyQts[idx+1], r), qt), tol + 1.0e-6)
+
+  def test_translate(self) :
+    rng = random.Random(350)
+    times = sampleTimes(rng, 200)
+    vals = [ [ math.sin(t), t * 2.0, math.cos(t * 3.0) + rng.uniform(-1.0e-3, 1.0e-3), 0.0 ] for t in times ]
+    tol = 0.01
+    keys = pfkeyreduce.reduceKeys(times, vals, tol)
+    self.assertEqual(( keys[0], keys[-1] ), ( 0, len(times) - 1 ))
+    self.assertEqual(keys, sorted(set(keys)))
+    keyTimes = [ times[idx] for idx in keys ]
+    for ( t, v ) in zip(times, vals) :
+      ( idx, r ) = segment(keyTimes, t)
+      ( a, b ) = ( vals[keys[idx]], vals[keys[idx+1]] )
+      d = [ a[c] + (b[c] - a[c]) * r - v[c] for c in range(3) ]
+      self.assertLessEqual(math.sqrt(sum([ e * e for e in d ])), tol + 1.0e-9)
+    # 直線は両端だけ
+    line = [ [ t, -t, 2.0 * t, 0.0 ] for t in times ]
+    self.assertEqual(pfkeyreduce.reduceKeys(times, line, 1.0e-9), [ 0, len(times) - 1 ])
+
+  def test_euler(self) :
+    rng = random.Random(351)
+    times = sampleTimes(rng, 200)
+    vals = [ [ 60.0 * math.sin(t), 30.0 * math.cos(t * 2.0), 10.0 * t ] for t in times ]
+    tol = 0.5
+    for order in ( 0, 3 ) :
+      keys = pfkeyreduce.reduceKeys(times, vals, tol, pfkeyreduce.CHANNEL_EULER, order=order)
+      self.assertEqual(( keys[0], keys[-1] ), ( 0, len(times) - 1 ))
+      keyTimes = [ times[idx] for idx in keys ]
+      for ( t, v ) in zip(times, vals) :
+        ( idx, r ) = segment(keyTimes, t)
+        ( a, b ) = ( vals[keys[idx]], vals[keys[idx+1]] )
+        qt = pfquaternion.fromEuler(order, [ a[c] + (b[c] - a[c]) * r for c in range(3) ])
+        self.assertLessEqual(angleDegree(qt, pfquaternion.fromEuler(order, v)), tol + 1.0e-6)
+
+  def test_short(self) :
+    self.assertEqual(pfkeyreduce.reduceKeys([], [], 1.0), [])
+    self.assertEqual(pfkeyreduce.reduceKeys([ 0.0 ], [ [ 0.0, 0.0, 0.0 ] ], 1.0), [ 0 ])
+    self.assertEqual(pfkeyreduce.reduceKeys([ 0.0, 1.0 ], [ [ 0.0, 0.0, 0.0 ] ] * 2, 1.0), [ 0, 1 ])
+
+  def test_repeatedTimes(self) :
+    times = [ 0.0, 1.0, 1.0, 2.0, 3.0 ]
+    vals = [ [ float(idx), 0.0, 0.0 ] for idx in range(5) ]
+    self.assertRaises(ValueError, pfkeyreduce.reduceKeys, times, vals, 0.1)
+    self.assertRaises(ValueError, pfkeyreduce.reduceKeys, [ 0.0, 2.0, 1.0 ], vals[:3], 0.1)
+    self.assertRaises(ValueError, pfkeyreduce.segmentError, times, vals, 1, 2)
+    qts = [ [ 0.0, 0.0, 0.0, 1.0 ] ] * 5
+    self.assertRaises(ValueError, pfkeyreduce.reduceKeys, times, qts, 0.1, pfkeyreduce.CHANNEL_QUATERNION)
+
+  def test_unknown(self) :
+    self.assertRaises(ValueError, pfkeyreduce.reduceKeys, [ 0.0, 1.0, 2.0 ], [ [ 0.0 ] * 3 ] * 3, 0.1, 'scale')
+    qts = [ [ 0.0, 0.0, 0.0, 1.0 ] ] * 3
+    self.assertRaises(ValueError, pfkeyreduce.reduceKeys, [ 0.0, 1.0, 2.0 ], qts, 0.1, pfkeyreduce.CHANNEL_QUATERNION, interp='cubic')
+
+
+if __name__ == '__main__' :
+  unittest.main()
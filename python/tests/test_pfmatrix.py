@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+'''
+pfmatrixのbatched版とスカラー版の比較
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pffloat4
+from tktnm import pfmatrix
+from tktnm import pfquaternion
+
+
+def randomMatrices(inRng, inCount, negative=True) :
+  retVal = []
+  for _ in range(inCount) :
+    trn = [ inRng.uniform(-10.0, 10.0) for _ in range(3) ] + [ 0.0 ]
+    qt = pfquaternion.normal([ inRng.uniform(-1.0, 1.0) for _ in range(4) ])
+    shr = [ inRng.uniform(-0.5, 0.5) for _ in range(3) ] + [ 0.0 ]
+    scl = [ inRng.uniform(0.5, 2.0) for _ in range(3) ] + [ 0.0 ]
+    if negative and inRng.random() < 0.5 : scl[inRng.randrange(3)] *= -1.0
+    retVal.append(pfmatrix.compose(trn, qt, shr, scl))
+  return retVal
+
+def determinant3(inM) :
+  return pffloat4.dot3(pfmatrix.getRow(inM, 0), pffloat4.cross3(pfmatrix.getRow(inM, 1), pfmatrix.getRow(inM, 2)))
+
+
+class ToShearScaleBatchTest(unittest.TestCase) :
+  def test_matchesScalar(self) :
+    mtxs = randomMatrices(random.Random(38), 2000)
+    self.assertGreater(len([ m for m in mtxs if determinant3(m) < 0.0 ]), 500)
+    ( shrs, scls ) = pfmatrix.toShearScaleBatch(mtxs)
+    self.assertEqual(len(shrs), len(mtxs))
+    self.assertEqual(len(scls), len(mtxs))
+    for ( m, shr, scl ) in zip(mtxs, shrs, scls) :
+      self.assertEqual(( shr, scl ), pfmatrix.toShearScale(m))
+
+  def test_empty(self) :
+    self.assertEqual(pfmatrix.toShearScaleBatch([]), ( [], [] ))
+
+
+class ComposeBatchTest(unittest.TestCase) :
+  def test_decomposeBatch(self) :
+    mtxs = randomMatrices(random.Random(39), 500)
+    decs = pfmatrix.decomposeBatch(mtxs)
+    self.assertEqual(len(decs), 4)
+    for ( idx, m ) in enumerate(mtxs) :
+      self.assertEqual(tuple([ dec[idx] for dec in decs ]), tuple(pfmatrix.decompose(m)))
+    self.assertEqual(pfmatrix.decomposeBatch([]), ( [], [], [], [] ))
+
+  def test_composeBatch(self) :
+    ( trns, qts, shrs, scls ) = pfmatrix.decomposeBatch(randomMatrices(random.Random(390), 500))
+    mtxs = pfmatrix.composeBatch(trns, qts, shrs, scls)
+    self.assertEqual(len(mtxs), len(trns))
+    for ( m, trn, qt, shr, scl ) in zip(mtxs, trns, qts, shrs, scls) :
+      self.assertEqual(m, pfmatrix.compose(trn, qt, shr, scl))
+    self.assertEqual(pfmatrix.composeBatch([], [], [], []), [])
+
+  def test_blendMatrices(self) :
+    rng = random.Random(391)
+    mtxsA = randomMatrices(rng, 300, negative=False)
+    mtxsB = randomMatrices(rng, 300, negative=False)
+    # slerpの近い場合の分岐を通るもの
+    mtxsB[:10] = mtxsA[:10]
+    rates = [ rng.uniform(0.0, 1.0) for _ in mtxsA ]
+    blended = pfmatrix.blendMatrices(mtxsA, mtxsB, rates)
+    for ( a, b, r, m ) in zip(mtxsA, mtxsB, rates, blended) :
+      self.assertEqual(m, pfmatrix.blendMatrix(a, b, r))
+    # rateがfloat, 分解済みの結果を使い回す場合
+    decA = pfmatrix.decomposeBatch(mtxsA)
+    self.assertEqual(pfmatrix.blendMatrices(None, mtxsB, 0.25, decomposedA=decA),
+      [ pfmatrix.blendMatrix(a, b, 0.25) for ( a, b ) in zip(mtxsA, mtxsB) ])
+
+
+if __name__ == '__main__' :
+  unittest.main()
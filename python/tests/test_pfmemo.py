@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+'''
+pfmemoのメモ化とinstall
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import random
+import unittest
+
+from tktnm import pfmatrix
+from tktnm import pfmemo
+from tktnm import pfprofile
+from tktnm import pfquaternion
+from .test_pfmatrix import randomMatrices
+
+
+NAN = float('nan')
+INF = float('inf')
+
+
+def sameFloats(inA, inB) :
+  return len(inA) == len(inB) and all(( a == b or (math.isnan(a) and math.isnan(b)) ) for ( a, b ) in zip(inA, inB))
+
+
+class MemoTest(unittest.TestCase) :
+  def setUp(self) :
+    pfmemo.clear()
+
+  def tearDown(self) :
+    pfmemo.uninstall()
+    pfprofile.disable()
+
+  def test_equalsOriginal(self) :
+    rng = random.Random(37)
+    for _ in range(50) :
+      eul = [ rng.uniform(-180.0, 180.0) for _ in range(3) ]
+      ax = pfquaternion.normal([ rng.uniform(-1.0, 1.0) for _ in range(3) ] + [ 0.0 ])
+      deg = rng.uniform(-360.0, 360.0)
+      for _ in range(2) :
+        self.assertEqual(pfmemo.fromEuler(1, eul), pfquaternion.fromEuler(1, eul))
+        self.assertEqual(pfmemo.fromAxisDeg(ax, deg), pfquaternion.fromAxisDeg(ax, deg))
+    for mtx in randomMatrices(rng, 20) :
+      for _ in range(2) :
+        self.assertEqual(pfmemo.decompose(mtx), pfmatrix.decompose(mtx))
+        self.assertEqual(pfmemo.inverseTransform(mtx), pfmatrix.inverseTransform(mtx))
+        self.assertEqual(pfmemo.toQuaternion(mtx), pfmatrix.toQuaternion(mtx))
+    self.assertEqual(pfmemo.stats()['fromEuler']['hits'], 50)
+    self.assertEqual(pfmemo.stats()['decompose']['hits'], 20)
+
+  def test_copies(self) :
+    mtx = pfmatrix.identity()
+    pfmemo.decompose(mtx)[0][0] = 5.0
+    self.assertEqual(pfmemo.decompose(mtx), pfmatrix.decompose(mtx))
+
+  def test_nonFinite(self) :
+    for eul in ( [ NAN, 0.0, 0.0 ], [ 0.0, NAN, 0.0 ], [ 0.0, 0.0, NAN ] ) :
+      self.assertTrue(sameFloats(pfmemo.fromEuler(0, eul), pfquaternion.fromEuler(0, eul)))
+    self.assertTrue(sameFloats(pfmemo.fromAxisDeg([ 1.0, 0.0, 0.0, 0.0 ], NAN), pfquaternion.fromAxisDeg([ 1.0, 0.0, 0.0, 0.0 ], NAN)))
+    self.assertTrue(sameFloats(pfmemo.fromAxisDeg([ NAN, 0.0, 0.0, 0.0 ], 30.0), pfquaternion.fromAxisDeg([ NAN, 0.0, 0.0, 0.0 ], 30.0)))
+    # 元の関数が例外を出す入力は同じ例外
+    self.assertRaises(ValueError, pfquaternion.fromEuler, 0, [ 0.0, INF, 0.0 ])
+    self.assertRaises(ValueError, pfmemo.fromEuler, 0, [ 0.0, INF, 0.0 ])
+    self.assertRaises(ValueError, pfquaternion.fromAxisDeg, [ 1.0, 0.0, 0.0, 0.0 ], -INF)
+    self.assertRaises(ValueError, pfmemo.fromAxisDeg, [ 1.0, 0.0, 0.0, 0.0 ], -INF)
+    self.assertEqual(pfmemo.stats()['fromEuler']['size'], 0)
+    self.assertEqual(pfmemo.stats()['fromAxisDeg']['size'], 0)
+
+  def test_install(self) :
+    base = pfquaternion.fromEuler
+    pfmemo.install()
+    self.assertTrue(pfmemo.isInstalled())
+    self.assertIsNot(pfquaternion.fromEuler, base)
+    self.assertEqual(pfquaternion.fromEuler(0, [ 10.0, 20.0, 30.0 ]), base(0, [ 10.0, 20.0, 30.0 ]))
+    self.assertEqual(pfquaternion.fromEuler(0, [ 10.0, 20.0, 30.0 ]), base(0, [ 10.0, 20.0, 30.0 ]))
+    self.assertTrue(sameFloats(pfquaternion.fromEuler(0, [ NAN, 0.0, 0.0 ]), base(0, [ NAN, 0.0, 0.0 ])))
+    self.assertEqual(pfmemo.stats()['fromEuler']['hits'], 1)
+    pfmemo.uninstall()
+    self.assertFalse(pfmemo.isInstalled())
+    self.assertIs(pfquaternion.fromEuler, base)
+
+  def test_profileDisable(self) :
+    base = pfmatrix.decompose
+    pfprofile.enable()
+    pfmemo.install()
+    pfprofile.disable()
+    self.assertTrue(pfmemo.isInstalled())
+    self.assertIs(pfmatrix.decompose.__wrapped__, base)
+    mtx = pfmatrix.fromQuaternion(pfquaternion.fromAxisDeg([ 1.0, 0.0, 0.0, 0.0 ], 30.0))
+    self.assertEqual(pfmatrix.decompose(mtx), base(mtx))
+    self.assertEqual(pfmatrix.decompose(mtx), base(mtx))
+    self.assertEqual(pfmemo.stats()['decompose']['hits'], 1)
+    pfmemo.uninstall()
+    self.assertIs(pfmatrix.decompose, base)
+
+  def test_unknown(self) :
+    self.assertRaises(KeyError, pfmemo.install, ( 'multiply', ))
+    self.assertFalse(pfmemo.isInstalled())
+
+
+if __name__ == '__main__' :
+  unittest.main()
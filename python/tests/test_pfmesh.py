@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+'''
+pfmeshの法線と接空間
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import random
+import unittest
+
+from tktnm import pffloat4
+from tktnm import pfmesh
+
+
+def grid(inCount, inRng=None) :
+  # xy平面の格子。inRngがあればzを揺らす
+  positions = []
+  uvs = []
+  for y in range(inCount) :
+    for x in range(inCount) :
+      z = inRng.uniform(-0.3, 0.3) if inRng is not None else 0.0
+      positions.append([ float(x), float(y), z, 0.0 ])
+      uvs.append([ x / (inCount - 1.0), y / (inCount - 1.0) ])
+  triangles = []
+  for y in range(inCount - 1) :
+    for x in range(inCount - 1) :
+      i = y * inCount + x
+      triangles.append(( i, i + 1, i + inCount + 1 ))
+      triangles.append(( i, i + inCount + 1, i + inCount ))
+  return ( positions, uvs, triangles )
+
+def faceCross(inPositions, inTri) :
+  ( p0, p1, p2 ) = [ inPositions[i] for i in inTri ]
+  return pffloat4.cross3(pffloat4.sub(p1, p0), pffloat4.sub(p2, p0))
+
+
+class NormalTest(unittest.TestCase) :
+  def test_faceNormals(self) :
+    ( positions, _, triangles ) = grid(6, random.Random(49))
+    # 面積0の三角形(同じ頂点, 一直線)
+    count = len(positions)
+    positions += [ [ 0.0, 0.0, 0.0, 0.0 ], [ 1.0, 1.0, 1.0, 0.0 ], [ 3.0, 3.0, 3.0, 0.0 ] ]
+    triangles += [ ( 0, 0, 1 ), ( count, count + 1, count + 2 ) ]
+    nrms = pfmesh.faceNormals(positions, triangles)
+    self.assertEqual(len(nrms), len(triangles))
+    for ( tri, n ) in zip(triangles[:-2], nrms) :
+      self.assertEqual(n, pffloat4.normal3(faceCross(positions, tri)))
+    self.assertEqual(nrms[-2:], [ pfmesh.DEGENERATE_NORMAL ] * 2)
+    self.assertIsNot(nrms[-1], pfmesh.DEGENERATE_NORMAL)
+    err = [ 0.0, 0.0, 1.0, 0.0 ]
+    self.assertEqual(pfmesh.faceNormals(positions, triangles, err)[-1], err)
+
+  def test_vertexNormals(self) :
+    ( positions, _, triangles ) = grid(6, random.Random(490))
+    # どの面にも使われていない頂点
+    positions.append([ 9.0, 9.0, 9.0, 0.0 ])
+    nrms = pfmesh.vertexNormals(positions, triangles)
+    sums = [ [ 0.0, 0.0, 0.0, 0.0 ] for _ in positions ]
+    for tri in triangles :
+      c = faceCross(positions, tri)
+      for i in tri : sums[i] = pffloat4.add(sums[i], c)
+    for ( v, n ) in zip(sums[:-1], nrms) :
+      self.assertEqual(n, pffloat4.normal3(v))
+    self.assertEqual(nrms[-1], pfmesh.DEGENERATE_NORMAL)
+
+
+class TangentTest(unittest.TestCase) :
+  def assertFrame(self, inN, inT, inB) :
+    dot3 = pffloat4.dot3
+    self.assertAlmostEqual(dot3(inT, inT), 1.0, delta=1.0e-12)
+    self.assertAlmostEqual(dot3(inN, inN), 1.0, delta=1.0e-12)
+    self.assertAlmostEqual(dot3(inT, inN), 0.0, delta=1.0e-12)
+    self.assertIn(inT[3], ( 1.0, -1.0 ))
+    b = pffloat4.cross3(inN, inT)
+    for c in range(3) : self.assertAlmostEqual(inB[c], b[c] * inT[3], delta=1.0e-12)
+
+  def test_orthonormal(self) :
+    ( positions, uvs, triangles ) = grid(6, random.Random(491))
+    ( nrms, tans, bins ) = pfmesh.tangentFrames(positions, uvs, triangles)
+    for ( n, t, b ) in zip(nrms, tans, bins) : self.assertFrame(n, t, b)
+
+  def test_handedness(self) :
+    ( positions, uvs, triangles ) = grid(4)
+    ( nrms, tans, bins ) = pfmesh.tangentFrames(positions, uvs, triangles)
+    for ( n, t, b ) in zip(nrms, tans, bins) :
+      self.assertEqual(n, [ 0.0, 0.0, 1.0, 0.0 ])
+      self.assertEqual(t[3], 1.0)
+      for c in range(3) : self.assertAlmostEqual(t[c], ( 1.0, 0.0, 0.0 )[c], delta=1.0e-12)
+      for c in range(3) : self.assertAlmostEqual(b[c], ( 0.0, 1.0, 0.0 )[c], delta=1.0e-12)
+    # uを反転(鏡像のUV)すると接線が反転し、従法線はvの向きのまま
+    mirrored = [ [ 1.0 - u, v ] for ( u, v ) in uvs ]
+    ( nrms, tans, bins ) = pfmesh.tangentFrames(positions, mirrored, triangles)
+    for ( n, t, b ) in zip(nrms, tans, bins) :
+      self.assertEqual(t[3], -1.0)
+      for c in range(3) : self.assertAlmostEqual(t[c], ( -1.0, 0.0, 0.0 )[c], delta=1.0e-12)
+      for c in range(3) : self.assertAlmostEqual(b[c], ( 0.0, 1.0, 0.0 )[c], delta=1.0e-12)
+
+  def test_degenerateUVs(self) :
+    ( positions, uvs, triangles ) = grid(4, random.Random(492))
+    flat = [ [ 0.5, 0.5 ] for _ in uvs ]
+    self.assertEqual(pfmesh.uvFactors(flat, triangles), [ None ] * len(triangles))
+    ( nrms, tans, bins ) = pfmesh.tangentFrames(positions, flat, triangles)
+    for ( n, t, b ) in zip(nrms, tans, bins) : self.assertFrame(n, t, b)
+
+  def test_degenerateTriangles(self) :
+    positions = [ [ 0.0, 0.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0, 0.0 ], [ 2.0, 0.0, 0.0, 0.0 ] ]
+    uvs = [ [ 0.0, 0.0 ], [ 0.5, 0.0 ], [ 1.0, 1.0 ] ]
+    ( faceNrms, nrms, tans, bins ) = pfmesh.frames(positions, [ ( 0, 1, 2 ) ], uvs)
+    self.assertEqual(faceNrms, [ pfmesh.DEGENERATE_NORMAL ])
+    self.assertEqual(nrms, [ pfmesh.DEGENERATE_NORMAL ] * 3)
+    for ( n, t, b ) in zip(nrms, tans, bins) : self.assertFrame(n, t, b)
+    self.assertEqual(pfmesh.frames(positions, [ ( 0, 1, 2 ) ])[2:], ( None, None ))
+
+  def test_mesh(self) :
+    ( positions, uvs, triangles ) = grid(5, random.Random(493))
+    mesh = pfmesh.pfMesh(triangles, uvs)
+    self.assertTrue(mesh.HasUVs)
+    self.assertEqual(mesh.frames(positions), pfmesh.frames(positions, triangles, uvs))
+    moved = [ [ p[0], p[1], p[2] + math.sin(p[0]), 0.0 ] for p in positions ]
+    self.assertEqual(mesh.frames(moved), pfmesh.frames(moved, triangles, uvs))
+    self.assertFalse(pfmesh.pfMesh(triangles).HasUVs)
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+'''
+pfparallelの並列評価と直列評価の比較
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pfmatrix
+from tktnm import pfparallel
+
+from .test_pfmatrix import randomMatrices
+
+
+class ParallelTest(unittest.TestCase) :
+  def test_decomposeMatchesSerial(self) :
+    mtxs = randomMatrices(random.Random(36), 600)
+    with pfparallel.pfParallelExecutor(2) as ex :
+      res = ex.evaluate('pfmatrix.decompose', mtxs, chunk=128)
+    self.assertEqual(res, pfparallel.evaluateSerial('pfmatrix.decompose', mtxs))
+
+  def test_shortPosition(self) :
+    inputs = [ ( [ 1.0, 2.0, 3.0 ], m ) for m in randomMatrices(random.Random(136), 600) ]
+    expected = pfparallel.evaluateSerial('pfvector.toWorldPositionByMatrix', inputs)
+    self.assertEqual(pfparallel.evaluate('pfvector.toWorldPositionByMatrix', inputs, workers=2), expected)
+
+  def test_shortMatrix(self) :
+    self.assertRaises(ValueError, pfparallel.flattenInputs, 'pfmatrix.inverseTransform', [ pfmatrix.identity()[:15] ])
+
+
+if __name__ == '__main__' :
+  unittest.main()
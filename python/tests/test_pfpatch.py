@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+'''
+pfpatchのlayerの重ね方と、pfprofile, pfprecisionの併用
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import unittest
+
+from tktnm import pfpatch
+from tktnm import pfprecision
+from tktnm import pfprofile
+from tktnm import pfquaternion
+
+
+class PatchTest(unittest.TestCase) :
+  def setUp(self) :
+    self.exactSlerp = pfquaternion.slerp
+
+  def tearDown(self) :
+    pfprofile.disable()
+    pfprecision.setPrecision(pfprecision.PRECISION_EXACT)
+    pfquaternion.slerp = self.exactSlerp
+
+  def test_profileThenPrecision(self) :
+    pfprofile.enable()
+    pfprecision.setPrecision(pfprecision.PRECISION_FAST)
+    pfprofile.disable()
+    self.assertIs(pfquaternion.slerp, pfprecision.slerp)
+    self.assertEqual(pfprecision.getPrecision(), pfprecision.PRECISION_FAST)
+    pfprecision.setPrecision(pfprecision.PRECISION_EXACT)
+    self.assertIs(pfquaternion.slerp, self.exactSlerp)
+
+  def test_precisionKeepsProfile(self) :
+    pfprofile.enable()
+    pfprecision.setPrecision(pfprecision.PRECISION_FAST)
+    pfprecision.setPrecision(pfprecision.PRECISION_EXACT)
+    self.assertTrue(pfprofile.isEnabled())
+    self.assertIs(pfquaternion.slerp.__wrapped__, self.exactSlerp)
+    pfprofile.disable()
+    self.assertIs(pfquaternion.slerp, self.exactSlerp)
+
+  def test_orderIndependent(self) :
+    pfprecision.setPrecision(pfprecision.PRECISION_FAST)
+    pfprofile.enable()
+    # pfprecisionは内側なので、計測は近似版を包む
+    self.assertIs(pfquaternion.slerp.__wrapped__, pfprecision.slerp)
+    self.assertIs(pfpatch.original(pfquaternion, 'slerp'), self.exactSlerp)
+
+  def test_externalReplacement(self) :
+    def replacement(inQA, inQB, inRateB) : return [ 0.0, 0.0, 0.0, 1.0 ]
+    pfprofile.enable()
+    pfquaternion.slerp = replacement
+    pfprecision.setPrecision(pfprecision.PRECISION_FAST)
+    pfprecision.setPrecision(pfprecision.PRECISION_EXACT)
+    # pfpatchを通さずに置き換えた関数は元の関数として扱い、計測のlayerは残る
+    self.assertIs(pfquaternion.slerp.__wrapped__, replacement)
+    pfprofile.disable()
+    self.assertIs(pfquaternion.slerp, replacement)
+
+
+if __name__ == '__main__' :
+  unittest.main()
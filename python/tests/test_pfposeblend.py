@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+'''
+pfposeblendのquaternionの平均とポーズのブレンド
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pfposeblend
+from tktnm import pfquaternion
+from .test_pfquaternion import randomQuaternion
+
+
+METHODS = ( pfposeblend.METHOD_NLERP, pfposeblend.METHOD_EIGEN )
+
+
+class AverageQuaternionsTest(unittest.TestCase) :
+  def assertQuaternionAlmostEqual(self, inA, inB, inDelta=1.0e-9) :
+    for ( a, b ) in zip(inA, inB) : self.assertAlmostEqual(a, b, delta=inDelta)
+
+  def test_two(self) :
+    rng = random.Random(40)
+    for _ in range(50) :
+      ( a, b ) = ( randomQuaternion(rng), randomQuaternion(rng) )
+      for method in METHODS :
+        self.assertQuaternionAlmostEqual(pfposeblend.averageQuaternions([ a, b ], [ 1.0, 1.0 ], method), pfquaternion.slerp(a, b, 0.5))
+      self.assertQuaternionAlmostEqual(pfposeblend.averageQuaternions([ a, b ], [ 0.0, 2.0 ]), pfquaternion.normal(b))
+
+  def test_orderAndSign(self) :
+    rng = random.Random(41)
+    base = randomQuaternion(rng)
+    for _ in range(20) :
+      qts = [ pfquaternion.normal([ v + rng.uniform(-0.2, 0.2) for v in base ]) for _ in range(5) ]
+      ws = [ rng.uniform(0.1, 1.0) for _ in qts ]
+      for method in METHODS :
+        avg = pfposeblend.averageQuaternions(qts, ws, method)
+        self.assertQuaternionAlmostEqual(pfposeblend.averageQuaternions(qts[::-1], ws[::-1], method), avg)
+        flipped = [ [ -v for v in qt ] if idx % 2 else qt for ( idx, qt ) in enumerate(qts) ]
+        self.assertQuaternionAlmostEqual(pfposeblend.averageQuaternions(flipped, ws, method), avg)
+
+  def test_degenerate(self) :
+    qts = [ pfquaternion.fromAxisDeg([ 1.0, 0.0, 0.0, 0.0 ], 30.0) ] * 2
+    self.assertEqual(pfposeblend.averageQuaternions(qts, [ 0.0, 0.0 ]), [ 0.0, 0.0, 0.0, 1.0 ])
+    self.assertEqual(pfposeblend.averageQuaternions([], []), [ 0.0, 0.0, 0.0, 1.0 ])
+    self.assertRaises(ValueError, pfposeblend.averageQuaternions, qts, [ 1.0, 1.0 ], 'linear')
+
+  def test_batch(self) :
+    rng = random.Random(42)
+    ( poseCount, boneCount ) = ( 3, 40 )
+    qts = [ [ randomQuaternion(rng) for _ in range(boneCount) ] for _ in range(poseCount) ]
+    ws = [ [ rng.uniform(0.0, 1.0) for _ in range(boneCount) ] for _ in range(poseCount) ]
+    for method in METHODS :
+      avgs = pfposeblend.averageQuaternionsBatch(qts, ws, method)
+      self.assertEqual(len(avgs), boneCount)
+      for bone in range(boneCount) :
+        self.assertEqual(avgs[bone], pfposeblend.averageQuaternions([ qts[k][bone] for k in range(poseCount) ], [ ws[k][bone] for k in range(poseCount) ], method))
+
+
+class BlendPosesTest(unittest.TestCase) :
+  def test_blend(self) :
+    rng = random.Random(43)
+    poses = []
+    for _ in range(2) :
+      poses.append([ ( [ rng.uniform(-1.0, 1.0) for _ in range(3) ] + [ 0.0 ], randomQuaternion(rng),
+        [ rng.uniform(-0.5, 0.5) for _ in range(3) ] + [ 0.0 ], [ rng.uniform(0.5, 2.0) for _ in range(3) ] + [ 0.0 ] ) for _ in range(10) ])
+    blended = pfposeblend.blendPoses(poses, [ 1.0, 3.0 ])
+    self.assertEqual(len(blended), 10)
+    for ( bone, ( trn, qt, shr, scl ) ) in enumerate(blended) :
+      ( a, b ) = ( poses[0][bone], poses[1][bone] )
+      for ( idx, v ) in ( ( 0, trn ), ( 2, shr ), ( 3, scl ) ) :
+        for c in range(3) : self.assertAlmostEqual(v[c], a[idx][c] * 0.25 + b[idx][c] * 0.75, delta=1.0e-12)
+        self.assertEqual(v[3], 0.0)
+      self.assertEqual(qt, pfposeblend.averageQuaternions([ a[1], b[1] ], [ 1.0, 3.0 ]))
+    # ボーンごとの重みとfloatの重みは同じ
+    self.assertEqual(pfposeblend.blendPoses(poses, [ [ 1.0 ] * 10, [ 3.0 ] * 10 ]), blended)
+
+  def test_zeroWeight(self) :
+    pose0 = [ ( [ 1.0, 2.0, 3.0, 0.0 ], [ 0.0, 0.0, 0.0, 1.0 ], [ 0.0, 0.0, 0.0, 0.0 ], [ 1.0, 1.0, 1.0, 0.0 ] ) ]
+    pose1 = [ ( [ 4.0, 5.0, 6.0, 0.0 ], [ 1.0, 0.0, 0.0, 0.0 ], [ 0.0, 0.0, 0.0, 0.0 ], [ 2.0, 2.0, 2.0, 0.0 ] ) ]
+    blended = pfposeblend.blendPoses([ pose0, pose1 ], [ 0.0, 0.0 ])
+    self.assertEqual(blended, [ tuple(pose0[0]) ])
+    self.assertIsNot(blended[0][0], pose0[0][0])
+    self.assertEqual(pfposeblend.blendPoses([], []), [])
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+'''
+pfprofileの有効化と集計
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import unittest
+
+from tktnm import pffloat4
+from tktnm import pfmatrix
+from tktnm import pfprofile
+from tktnm import pfquaternion
+
+
+def rows() :
+  return dict([ ( row['name'], row ) for row in pfprofile.report() ])
+
+
+class ProfileTest(unittest.TestCase) :
+  def setUp(self) :
+    pfprofile.reset()
+
+  def tearDown(self) :
+    pfprofile.disable()
+    pfprofile.reset()
+
+  def test_enableDisable(self) :
+    multiply = pfmatrix.multiply
+    self.assertFalse(pfprofile.isEnabled())
+    pfprofile.enable()
+    self.assertTrue(pfprofile.isEnabled())
+    self.assertIsNot(pfmatrix.multiply, multiply)
+    self.assertIs(pfmatrix.multiply.__wrapped__, multiply)
+    # 2回目は何もしない
+    wrapped = pfmatrix.multiply
+    pfprofile.enable()
+    self.assertIs(pfmatrix.multiply, wrapped)
+    pfprofile.disable()
+    self.assertFalse(pfprofile.isEnabled())
+    self.assertIs(pfmatrix.multiply, multiply)
+
+  def test_counts(self) :
+    pfprofile.enable([ 'pfmatrix' ])
+    for _ in range(3) : pfmatrix.multiply(pfmatrix.identity(), pfmatrix.identity())
+    pfmatrix.identity()
+    # 有効にしていないモジュールは数えない
+    pffloat4.add(pffloat4.zero(), pffloat4.one())
+    pfprofile.disable()
+    pfmatrix.multiply(pfmatrix.identity(), pfmatrix.identity())
+    stats = rows()
+    self.assertEqual(stats['pfmatrix.multiply']['calls'], 3)
+    self.assertEqual(stats['pfmatrix.identity']['calls'], 7)
+    self.assertNotIn('pffloat4.add', stats)
+    for row in stats.values() :
+      self.assertGreaterEqual(row['totalNs'], row['selfNs'])
+      self.assertAlmostEqual(row['meanNs'], row['totalNs'] / row['calls'])
+
+  def test_selfTime(self) :
+    # 外側の関数の自分自身の時間は、内側の呼び出しの時間を含まない
+    pfprofile.enable([ 'pffloat1', 'pfquaternion' ])
+    for _ in range(20) : pfquaternion.fromAxisDeg([ 1.0, 0.0, 0.0, 0.0 ], 30.0)
+    pfprofile.disable()
+    stats = rows()
+    self.assertEqual(stats['pfquaternion.fromAxisDeg']['calls'], 20)
+    self.assertEqual(stats['pffloat1.sinCosDegree']['calls'], 20)
+    self.assertLess(stats['pfquaternion.fromAxisDeg']['selfNs'], stats['pfquaternion.fromAxisDeg']['totalNs'])
+
+  def test_frames(self) :
+    with pfprofile.profiling([ 'pfmatrix' ]) :
+      self.assertTrue(pfprofile.isEnabled())
+      for _ in range(4) :
+        pfmatrix.identity()
+        pfmatrix.identity()
+        pfprofile.markFrame()
+    self.assertFalse(pfprofile.isEnabled())
+    self.assertEqual(pfprofile.frameCount(), 4)
+    row = rows()['pfmatrix.identity']
+    self.assertEqual(row['calls'], 8)
+    self.assertEqual(row['callsPerFrame'], 2.0)
+    self.assertEqual(pfprofile.report(top=1, sortKey='calls')[0]['name'], 'pfmatrix.identity')
+    pfprofile.reset()
+    self.assertEqual(( pfprofile.frameCount(), pfprofile.report() ), ( 0, [] ))
+
+  def test_profilingKeepsEnabled(self) :
+    pfprofile.enable()
+    with pfprofile.profiling() : pass
+    self.assertTrue(pfprofile.isEnabled())
+
+
+if __name__ == '__main__' :
+  unittest.main()
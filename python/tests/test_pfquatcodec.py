@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+'''
+pfquatcodecの誤差とbatch
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import random
+import unittest
+
+from tktnm import pfquatcodec
+from tktnm import pfquaternion
+
+
+def randomQuaternions(inRng, inCount) :
+  retVal = [ pfquaternion.normal([ inRng.gauss(0.0, 1.0) for _ in range(4) ]) for _ in range(inCount) ]
+  # 最大の成分がそれぞれの位置にあるもの, 負のもの
+  retVal.extend([ [ 1.0, 0.0, 0.0, 0.0 ], [ 0.0, -1.0, 0.0, 0.0 ], [ 0.0, 0.0, 1.0, 0.0 ], [ 0.0, 0.0, 0.0, -1.0 ] ])
+  retVal.append([ 0.5, -0.5, 0.5, -0.5 ])
+  return retVal
+
+def angleDegree(inA, inB) :
+  d = abs(sum([ a * b for ( a, b ) in zip(inA, inB) ]))
+  return math.degrees(2.0 * math.acos(min(d, 1.0)))
+
+
+class CodecTest(unittest.TestCase) :
+  def check(self, inEncode, inDecode, inMaxError) :
+    rng = random.Random(34)
+    for qt in randomQuaternions(rng, 500) :
+      dec = inDecode(inEncode(qt))
+      self.assertLessEqual(angleDegree(qt, dec), inMaxError)
+      self.assertAlmostEqual(sum([ v * v for v in dec ]), 1.0, delta=1.0e-2)
+      # q と -q は同じ回転
+      self.assertEqual(inEncode([ -v for v in qt ]), inEncode(qt))
+
+  def test_roundTrip32(self) :
+    self.check(pfquatcodec.encode32, pfquatcodec.decode32, pfquatcodec.MAX_ERROR_DEGREE_32)
+    self.assertLess(pfquatcodec.encode32([ 0.0, 0.0, 0.0, 1.0 ]), 1 << 32)
+
+  def test_roundTrip48(self) :
+    self.check(pfquatcodec.encode48, pfquatcodec.decode48, pfquatcodec.MAX_ERROR_DEGREE_48)
+    self.assertLess(pfquatcodec.encode48([ 0.0, 0.0, 0.0, 1.0 ]), 1 << 48)
+
+  def test_identity(self) :
+    self.assertEqual(pfquatcodec.decode32(pfquatcodec.encode32([ 0.0, 0.0, 0.0, 1.0 ])), [ 0.0, 0.0, 0.0, 1.0 ])
+    self.assertEqual(pfquatcodec.decode48(pfquatcodec.encode48([ 0.0, 0.0, 0.0, 1.0 ])), [ 0.0, 0.0, 0.0, 1.0 ])
+
+  def test_batch(self) :
+    qts = randomQuaternions(random.Random(340), 100)
+    words = pfquatcodec.encode32Batch(qts)
+    self.assertEqual(words.itemsize, 4)
+    self.assertEqual(list(words), [ pfquatcodec.encode32(qt) for qt in qts ])
+    self.assertEqual(pfquatcodec.decode32Batch(words), [ pfquatcodec.decode32(v) for v in words ])
+    buf = pfquatcodec.encode48Batch(qts)
+    self.assertEqual(len(buf), 6 * len(qts))
+    self.assertEqual(pfquatcodec.decode48Batch(buf), [ pfquatcodec.decode48(pfquatcodec.encode48(qt)) for qt in qts ])
+    self.assertEqual(pfquatcodec.decode48Batch(b''), [])
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+'''
+pfquaternionのbatched版とスカラー版の比較
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pffloat4
+from tktnm import pfmatrix
+from tktnm import pfquaternion
+
+
+def randomQuaternion(inRng) :
+  return pfquaternion.normal([ inRng.uniform(-1.0, 1.0) for _ in range(4) ])
+
+
+class SlerpBatchTest(unittest.TestCase) :
+  def test_matchesScalar(self) :
+    rng = random.Random(39)
+    qtsA = [ randomQuaternion(rng) for _ in range(500) ]
+    qtsB = [ randomQuaternion(rng) for _ in range(500) ]
+    # 同じ, 逆符号(同じ回転), 近い quaternion
+    qtsB[0:10] = qtsA[0:10]
+    qtsB[10:20] = [ [ -v for v in qt ] for qt in qtsA[10:20] ]
+    qtsB[20:30] = [ pfquaternion.normal([ v + 1.0e-6 for v in qt ]) for qt in qtsA[20:30] ]
+    rates = [ rng.uniform(-0.5, 1.5) for _ in qtsA ]
+    rates[30:33] = [ 0.0, 1.0, 0.5 ]
+    slerped = pfquaternion.slerpBatch(qtsA, qtsB, rates)
+    self.assertEqual(len(slerped), len(qtsA))
+    for ( a, b, r, q ) in zip(qtsA, qtsB, rates, slerped) :
+      self.assertEqual(q, pfquaternion.slerp(a, b, r))
+
+  def test_empty(self) :
+    self.assertEqual(pfquaternion.slerpBatch([], [], []), [])
+
+
+def randomVector(inRng) :
+  return [ inRng.uniform(-2.0, 2.0) for _ in range(3) ] + [ 0.0 ]
+
+def degenerateVectors() :
+  # 軸, 長さ0, 各成分が等しいもの
+  retVal = [ [ 0.0, 0.0, 0.0, 0.0 ], [ 1.0, 1.0, 1.0, 0.0 ], [ -1.0, 1.0, -1.0, 0.0 ] ]
+  for idx in range(3) :
+    for sgn in ( 1.0, -1.0 ) :
+      v = [ 0.0, 0.0, 0.0, 0.0 ]
+      v[idx] = sgn
+      retVal.append(v)
+  return retVal
+
+
+class FromVectorBatchTest(unittest.TestCase) :
+  def test_matchesScalar(self) :
+    rng = random.Random(50)
+    froms = [ pffloat4.normal3(randomVector(rng)) for _ in range(300) ]
+    tos = [ pffloat4.normal3(randomVector(rng)) for _ in froms ]
+    # 同じ向き, 逆向き
+    tos[:20] = froms[:20]
+    tos[20:40] = [ [ -v[0], -v[1], -v[2], 0.0 ] for v in froms[20:40] ]
+    for v in degenerateVectors() :
+      froms.append(v)
+      tos.append([ -v[0], -v[1], -v[2], 0.0 ])
+      froms.append(v)
+      tos.append(v)
+    qts = pfquaternion.fromVectorBatch(froms, tos)
+    self.assertEqual(len(qts), len(froms))
+    for ( a, b, qt ) in zip(froms, tos, qts) :
+      self.assertEqual(qt, pfquaternion.fromVector(a, b))
+
+  def test_opposite(self) :
+    for v in degenerateVectors()[1:] :
+      n = pffloat4.normal3(v)
+      qt = pfquaternion.fromVectorBatch([ n ], [ [ -n[0], -n[1], -n[2], 0.0 ] ])[0]
+      # 180度の回転で、軸はfromと直交する
+      self.assertAlmostEqual(qt[3], 0.0, delta=1.0e-12)
+      self.assertAlmostEqual(sum([ a * b for ( a, b ) in zip(qt[:3], n[:3]) ]), 0.0, delta=1.0e-12)
+      self.assertAlmostEqual(sum([ c * c for c in qt ]), 1.0, delta=1.0e-12)
+
+  def test_empty(self) :
+    self.assertEqual(pfquaternion.fromVectorBatch([], []), [])
+
+
+class LookAtBatchTest(unittest.TestCase) :
+  def test_matchesScalar(self) :
+    rng = random.Random(500)
+    forwards = [ randomVector(rng) for _ in range(300) ]
+    ups = [ randomVector(rng) for _ in forwards ]
+    # upがforwardと平行, 長さ0
+    ups[:10] = [ [ v * 3.0 for v in f ] for f in forwards[:10] ]
+    ups[10:20] = [ [ 0.0, 0.0, 0.0, 0.0 ] ] * 10
+    for f in degenerateVectors() :
+      for u in degenerateVectors() :
+        forwards.append(f)
+        ups.append(u)
+    ( qts, mtxs ) = pfquaternion.lookAtBatch(forwards, ups)
+    self.assertEqual(len(qts), len(forwards))
+    self.assertEqual(len(mtxs), len(forwards))
+    for ( f, u, qt, mtx ) in zip(forwards, ups, qts, mtxs) :
+      self.assertEqual(( qt, mtx ), pfquaternion.lookAt(f, u))
+
+  def test_frame(self) :
+    rng = random.Random(501)
+    forwards = [ randomVector(rng) for _ in range(50) ] + degenerateVectors()
+    ups = [ randomVector(rng) for _ in forwards ]
+    ( qts, mtxs ) = pfquaternion.lookAtBatch(forwards, ups)
+    for ( qt, mtx ) in zip(qts, mtxs) :
+      self.assertGreaterEqual(qt[3], 0.0)
+      for ( a, b ) in zip(pfmatrix.fromQuaternion(qt), mtx) : self.assertAlmostEqual(a, b, delta=1.0e-9)
+
+  def test_empty(self) :
+    self.assertEqual(pfquaternion.lookAtBatch([], []), ( [], [] ))
+
+
+if __name__ == '__main__' :
+  unittest.main()
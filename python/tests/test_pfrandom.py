@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+'''
+pfrandomの再現性と生成する値
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import random
+import unittest
+
+from tktnm import pfrandom
+
+
+def draw(inRnd) :
+  return ( inRnd.uniform(3), inRnd.uniform4(2, -1.0, 1.0), inRnd.uniformVectors(2), inRnd.unitVectors(2), inRnd.quaternions(2) )
+
+
+class RandomTest(unittest.TestCase) :
+  def test_seed(self) :
+    self.assertEqual(draw(pfrandom.pfRandom(44)), draw(pfrandom.pfRandom(44)))
+    self.assertNotEqual(draw(pfrandom.pfRandom(44)), draw(pfrandom.pfRandom(45)))
+    self.assertEqual(pfrandom.pfRandom(44).Seed, 44)
+    self.assertIsInstance(pfrandom.pfRandom().Generator, random.Random)
+
+  def test_globalState(self) :
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    draw(pfrandom.pfRandom(44))
+    self.assertEqual(random.random(), expected)
+
+  def test_spawn(self) :
+    children = pfrandom.pfRandom(440).spawn(4)
+    again = pfrandom.pfRandom(440).spawn(4)
+    self.assertEqual(len(children), 4)
+    # 同じ親のシードなら同じ系列
+    self.assertEqual([ draw(c) for c in children ], [ draw(c) for c in again ])
+    # 子どうし, 親とは異なる系列
+    seqs = [ tuple(c.uniform(8)) for c in pfrandom.pfRandom(440).spawn(4) ]
+    seqs.append(tuple(pfrandom.pfRandom(440).uniform(8)))
+    self.assertEqual(len(set(seqs)), 5)
+    # 子から引いても他の子, 親の系列は変わらない
+    parent = pfrandom.pfRandom(441)
+    ( a, b ) = parent.spawn(2)
+    expectedB = pfrandom.pfRandom(441).spawn(2)[1].uniform(8)
+    expectedParent = pfrandom.pfRandom(441)
+    expectedParent.spawn(2)
+    a.uniform(100)
+    self.assertEqual(b.uniform(8), expectedB)
+    self.assertEqual(parent.uniform(8), expectedParent.uniform(8))
+
+  def test_ranges(self) :
+    rnd = pfrandom.pfRandom(442)
+    for v in rnd.uniform(200, -2.0, 3.0) : self.assertTrue(-2.0 <= v <= 3.0)
+    for v in rnd.uniform4(200, 1.0, 2.0) :
+      self.assertEqual(len(v), 4)
+      for c in v : self.assertTrue(1.0 <= c <= 2.0)
+    for v in rnd.uniformVectors(200, -1.0, 1.0) :
+      self.assertEqual(v[3], 0.0)
+      for c in v[:3] : self.assertTrue(-1.0 <= c <= 1.0)
+
+  def test_unitVectors(self) :
+    vs = pfrandom.pfRandom(443).unitVectors(2000)
+    for v in vs :
+      self.assertAlmostEqual(math.sqrt(v[0]*v[0] + v[1]*v[1] + v[2]*v[2]), 1.0, delta=1.0e-12)
+      self.assertEqual(v[3], 0.0)
+    # 一様なら平均は0に近い
+    for c in range(3) : self.assertLess(abs(sum([ v[c] for v in vs ]) / len(vs)), 0.1)
+
+  def test_quaternions(self) :
+    qs = pfrandom.pfRandom(444).quaternions(2000)
+    for q in qs :
+      self.assertAlmostEqual(sum([ c * c for c in q ]), 1.0, delta=1.0e-12)
+      self.assertGreaterEqual(q[3], 0.0)
+    # 回転として一様(4次元の単位球面上で一様)なら |w| の平均は 4/(3*pi)
+    self.assertAlmostEqual(sum([ q[3] for q in qs ]) / len(qs), 4.0 / (3.0 * math.pi), delta=0.03)
+    for c in range(3) : self.assertLess(abs(sum([ q[c] for q in qs ]) / len(qs)), 0.05)
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+'''
+pfserializeの書き込みと読み込み
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import os
+import random
+import tempfile
+import unittest
+
+from tktnm import pfmatrix
+from tktnm import pfserialize
+from .test_pfmatrix import randomMatrices
+
+
+LAYOUTS = ( pfserialize.LAYOUT_MATRIX, pfserialize.LAYOUT_QUATERNION, pfserialize.LAYOUT_TRS, pfserialize.LAYOUT_TRSS )
+DTYPES = ( pfserialize.FLOAT32, pfserialize.FLOAT64 )
+SWAPPED = b'>' if pfserialize.NATIVE == b'<' else b'<'
+
+
+def randomRecords(inLayout, inCount) :
+  mtxs = randomMatrices(random.Random(32 + inLayout), inCount)
+  if inLayout == pfserialize.LAYOUT_MATRIX : return mtxs
+  decs = [ pfmatrix.decompose(mtx) for mtx in mtxs ]
+  if inLayout == pfserialize.LAYOUT_QUATERNION : return [ qt for ( _, qt, _, _ ) in decs ]
+  if inLayout == pfserialize.LAYOUT_TRS : return [ ( trn, qt, scl ) for ( trn, qt, _, scl ) in decs ]
+  return decs
+
+def expected(inLayout, inRecords, inDType) :
+  # dtypeに丸めて、unflattenした形
+  retVal = []
+  for rec in inRecords :
+    vals = array.array(pfserialize.TYPECODES[inDType], pfserialize.flatten(inLayout, rec)).tolist()
+    retVal.append(pfserialize.unflatten(inLayout, vals))
+  return retVal
+
+
+class SerializeTest(unittest.TestCase) :
+  def setUp(self) :
+    self.__tmp = tempfile.TemporaryDirectory()
+
+  def tearDown(self) :
+    self.__tmp.cleanup()
+
+  def path(self, inName) :
+    return os.path.join(self.__tmp.name, inName)
+
+  def test_roundTrip(self) :
+    for layout in LAYOUTS :
+      recs = randomRecords(layout, 20)
+      for dtype in DTYPES :
+        for order in ( pfserialize.NATIVE, SWAPPED ) :
+          buf = pfserialize.pack(layout, recs, dtype, order)
+          self.assertEqual(pfserialize.unpackHeader(buf), ( layout, 20, dtype, order ))
+          loaded = pfserialize.load(buf)
+          self.assertEqual(( loaded.Layout, loaded.Count, loaded.DType, loaded.Width ), ( layout, 20, dtype, pfserialize.WIDTHS[layout] ))
+          self.assertEqual(list(loaded), expected(layout, recs, dtype))
+          self.assertEqual(loaded[-1], expected(layout, recs[-1:], dtype)[0])
+          self.assertEqual(loaded[2:4], expected(layout, recs[2:4], dtype))
+          self.assertRaises(IndexError, loaded.values, 20)
+
+  def test_zeroCopy(self) :
+    buf = bytearray(pfserialize.pack(pfserialize.LAYOUT_QUATERNION, [ [ 0.0, 0.0, 0.0, 1.0 ] ], pfserialize.FLOAT64))
+    loaded = pfserialize.load(buf)
+    buf[pfserialize.HEADER.size:pfserialize.HEADER.size + 8] = array.array('d', [ 0.5 ]).tobytes()
+    self.assertEqual(loaded[0], [ 0.5, 0.0, 0.0, 1.0 ])
+    # バイトオーダーが異なる場合はコピー
+    swapped = bytearray(pfserialize.pack(pfserialize.LAYOUT_QUATERNION, [ [ 0.0, 0.0, 0.0, 1.0 ] ], pfserialize.FLOAT64, SWAPPED))
+    loaded = pfserialize.load(swapped)
+    swapped[pfserialize.HEADER.size:pfserialize.HEADER.size + 8] = array.array('d', [ 0.5 ]).tobytes()
+    self.assertEqual(loaded[0], [ 0.0, 0.0, 0.0, 1.0 ])
+
+  def test_file(self) :
+    for layout in LAYOUTS :
+      recs = randomRecords(layout, 10)
+      for dtype in DTYPES :
+        for order in ( pfserialize.NATIVE, SWAPPED ) :
+          with open(self.path('a.bin'), 'wb') as f : pfserialize.dump(f, layout, recs, dtype, order)
+          with pfserialize.loadFile(self.path('a.bin')) as loaded :
+            self.assertEqual(list(loaded), expected(layout, recs, dtype))
+          self.assertIsNone(loaded.Data)
+
+  def test_close(self) :
+    with open(self.path('a.bin'), 'wb') as f : pfserialize.dump(f, pfserialize.LAYOUT_MATRIX, [ pfmatrix.identity() ])
+    loaded = pfserialize.loadFile(self.path('a.bin'))
+    self.assertEqual(loaded[0], pfmatrix.identity())
+    loaded.close()
+    self.assertIsNone(loaded.Data)
+    loaded.close()
+    # 閉じた後もファイルを消せる
+    os.remove(self.path('a.bin'))
+
+  def test_truncated(self) :
+    buf = pfserialize.pack(pfserialize.LAYOUT_TRSS, randomRecords(pfserialize.LAYOUT_TRSS, 3))
+    for data in ( b'', buf[:4], buf[:pfserialize.HEADER.size - 1] ) :
+      self.assertRaises(ValueError, pfserialize.load, data)
+      with open(self.path('short.bin'), 'wb') as f : f.write(data)
+      self.assertRaises(ValueError, pfserialize.loadFile, self.path('short.bin'))
+    self.assertRaises(ValueError, pfserialize.load, buf[:-1])
+    with open(self.path('short.bin'), 'wb') as f : f.write(buf[:-1])
+    self.assertRaises(ValueError, pfserialize.loadFile, self.path('short.bin'))
+    self.assertEqual(len(pfserialize.load(buf[:pfserialize.HEADER.size] + buf[pfserialize.HEADER.size:] + b'\0')), 3)
+
+  def test_broken(self) :
+    buf = bytearray(pfserialize.pack(pfserialize.LAYOUT_MATRIX, []))
+    self.assertEqual(len(pfserialize.load(buf)), 0)
+    bad = bytearray(buf)
+    bad[0:4] = b'XXXX'
+    self.assertRaises(ValueError, pfserialize.load, bad)
+    bad = bytearray(buf)
+    bad[6] = 9
+    self.assertRaises(ValueError, pfserialize.load, bad)
+    self.assertRaises(ValueError, pfserialize.packHeader, 9, 0)
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+'''
+pfsquadのカーブ
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pfquaternion
+from tktnm import pfsquad
+from .test_pfquaternion import randomQuaternion
+
+
+class SquadTest(unittest.TestCase) :
+  def assertSameRotation(self, inA, inB, inDelta=1.0e-9) :
+    d = abs(sum([ a * b for ( a, b ) in zip(inA, inB) ]))
+    self.assertAlmostEqual(d, 1.0, delta=inDelta)
+
+  def randomCurve(self, inSeed, inCount) :
+    rng = random.Random(inSeed)
+    times = [ 0.0 ]
+    for _ in range(inCount - 1) : times.append(times[-1] + rng.uniform(0.2, 1.0))
+    qts = [ randomQuaternion(rng) for _ in range(inCount) ]
+    return ( times, qts )
+
+  def test_keys(self) :
+    ( times, qts ) = self.randomCurve(41, 8)
+    curve = pfsquad.pfSquadCurve(times, qts)
+    for ( t, q ) in zip(times, qts) :
+      self.assertSameRotation(curve.sample(t), q)
+      self.assertGreaterEqual(curve.sample(t)[3], 0.0)
+    # 範囲外は端のキー
+    self.assertSameRotation(curve.sample(times[0] - 1.0), qts[0])
+    self.assertSameRotation(curve.sample(times[-1] + 1.0), qts[-1])
+    # キーの符号は前のキーにそろえる
+    keys = curve.Keys
+    for ( a, b ) in zip(keys[:-1], keys[1:]) : self.assertEqual(pfquaternion.nearPlusMinus(a, b), 1.0)
+    self.assertEqual(curve.Tangents, pfsquad.pfSquadCurve.tangents(keys))
+    self.assertEqual(curve.Times, times)
+
+  def test_collinear(self) :
+    # 同じ軸まわりに一定の角度ずつ回すキーは接線がキーと同じになり、slerpと一致する
+    step = pfquaternion.fromAxisDeg(pfquaternion.normal([ 1.0, 2.0, -0.5, 0.0 ]), 35.0)
+    qts = [ randomQuaternion(random.Random(410)) ]
+    for _ in range(5) : qts.append(pfquaternion.multiply(qts[-1], step))
+    times = [ float(i) for i in range(len(qts)) ]
+    curve = pfsquad.pfSquadCurve(times, qts)
+    for ( k, s ) in zip(curve.Keys, curve.Tangents) : self.assertSameRotation(k, s)
+    for i in range(len(qts) - 1) :
+      for h in ( 0.1, 0.25, 0.5, 0.8 ) :
+        expected = pfquaternion.slerp(qts[i], qts[i+1], h)
+        result = curve.sample(times[i] + h)
+        for c in range(4) : self.assertAlmostEqual(result[c], expected[c], delta=1.0e-9)
+
+  def test_sampleMany(self) :
+    ( times, qts ) = self.randomCurve(411, 10)
+    # 符号が反転したキー
+    qts[3] = [ -v for v in qts[3] ]
+    curve = pfsquad.pfSquadCurve(times, qts)
+    rng = random.Random(412)
+    ts = [ rng.uniform(times[0] - 0.5, times[-1] + 0.5) for _ in range(200) ] + times
+    samples = curve.sampleMany(ts)
+    self.assertEqual(samples, [ curve.sample(t) for t in ts ])
+    for q in samples : self.assertAlmostEqual(sum([ c * c for c in q ]), 1.0, delta=1.0e-12)
+
+  def test_smallCurves(self) :
+    q = randomQuaternion(random.Random(413))
+    one = pfsquad.pfSquadCurve([ 1.0 ], [ q ])
+    self.assertEqual(one.sampleMany([ 0.0, 1.0, 2.0 ]), [ pfquaternion.normal(q) ] * 3)
+    ( times, qts ) = self.randomCurve(414, 2)
+    two = pfsquad.pfSquadCurve(times, qts)
+    # キーが2つなら接線はキーそのもので、slerpと一致する
+    for h in ( 0.2, 0.7 ) :
+      t = times[0] + (times[1] - times[0]) * h
+      expected = pfquaternion.slerp(qts[0], qts[1], h)
+      for c in range(4) : self.assertAlmostEqual(two.sample(t)[c], expected[c], delta=1.0e-9)
+    self.assertRaises(ValueError, pfsquad.pfSquadCurve, [], [])
+    self.assertRaises(ValueError, pfsquad.pfSquadCurve, [ 0.0, 1.0 ], [ q ])
+
+
+if __name__ == '__main__' :
+  unittest.main()
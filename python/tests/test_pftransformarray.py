@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+'''
+pfTransformArrayの分解・合成と添字
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import random
+import unittest
+
+from tktnm import pfmatrix
+from tktnm import pftransformarray
+
+from .test_pfmatrix import randomMatrices
+
+
+class TransformArrayTest(unittest.TestCase) :
+  def test_fromMatricesMatchesDecompose(self) :
+    mtxs = randomMatrices(random.Random(31), 300)
+    for cache in ( True, False ) :
+      arr = pftransformarray.pfTransformArray.fromMatrices(mtxs, matrixCache=cache)
+      for ( idx, mtx ) in enumerate(mtxs) : self.assertEqual(arr[idx], pfmatrix.decompose(mtx))
+
+  def test_toMatricesMatchesCompose(self) :
+    mtxs = randomMatrices(random.Random(131), 300)
+    arr = pftransformarray.pfTransformArray.fromMatrices(mtxs, matrixCache=True)
+    self.assertEqual(arr.toMatrices(), mtxs)
+    arr.invalidate()
+    self.assertEqual(arr.toMatrices(), [ pfmatrix.compose(*arr[idx]) for idx in range(len(arr)) ])
+    arr = pftransformarray.pfTransformArray.fromMatrices(mtxs, matrixCache=False)
+    self.assertEqual(arr.toMatrices(), [ pfmatrix.compose(*arr[idx]) for idx in range(len(arr)) ])
+
+  def test_float32RoundTrip(self) :
+    mtxs = randomMatrices(random.Random(231), 50)
+    arr = pftransformarray.pfTransformArray.fromMatrices(mtxs, dtype=pftransformarray.FLOAT32, matrixCache=False)
+    for ( a, b ) in zip(arr.toMatrices(), mtxs) :
+      for ( x, y ) in zip(a, b) : self.assertAlmostEqual(x, y, places=4)
+
+  def test_empty(self) :
+    arr = pftransformarray.pfTransformArray.fromMatrices([])
+    self.assertEqual(len(arr), 0)
+    self.assertEqual(arr.toMatrices(), [])
+
+  def test_index(self) :
+    arr = pftransformarray.pfTransformArray(3)
+    self.assertEqual(arr.getQuaternion(-1), [ 0.0, 0.0, 0.0, 1.0 ])
+    self.assertEqual(arr.getScale(-3), [ 1.0, 1.0, 1.0, 0.0 ])
+    for func in ( arr.getTranslate, arr.getQuaternion, arr.getShear, arr.getScale, arr.getMatrix ) :
+      self.assertRaises(IndexError, func, 3)
+      self.assertRaises(IndexError, func, -4)
+
+
+if __name__ == '__main__' :
+  unittest.main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+'''
+pfutilのpfIdentitySetとリストの関数
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import unittest
+
+from tktnm import pfutil
+
+
+class Item(object) :
+  # 同じ値でも別のオブジェクト
+  def __init__(self, inName) :
+    self.name = inName
+  def __eq__(self, inOther) :
+    return isinstance(inOther, Item) and self.name == inOther.name
+  def __hash__(self) :
+    return hash(self.name)
+
+
+class IdentitySetTest(unittest.TestCase) :
+  def test_order(self) :
+    items = [ Item(idx) for idx in range(5) ]
+    s = pfutil.pfIdentitySet(items)
+    self.assertEqual(len(s), 5)
+    self.assertEqual(list(s), items)
+    self.assertEqual(s.List, items)
+    self.assertIs(s[2], items[2])
+    # 等しくても別のオブジェクトは別の要素
+    other = Item(0)
+    self.assertNotIn(other, s)
+    self.assertTrue(s.append(other))
+    self.assertFalse(s.append(items[0]))
+    self.assertEqual(list(s), items + [ other ])
+
+  def test_remove(self) :
+    items = [ Item(idx) for idx in range(5) ]
+    s = pfutil.pfIdentitySet(items)
+    s.List
+    for idx in ( 2, 0, 4 ) :
+      self.assertTrue(s.remove(items[idx]))
+    self.assertFalse(s.remove(items[0]))
+    self.assertEqual(s.List, [ items[1], items[3] ])
+    self.assertTrue(s.remove(items[1]))
+    self.assertTrue(s.remove(items[3]))
+    self.assertEqual(( len(s), s.List ), ( 0, [] ))
+    self.assertTrue(s.append(items[4]))
+    self.assertEqual(s.List, [ items[4] ])
+
+  def test_insert(self) :
+    # list.insertと同じ位置
+    for idx in range(-8, 9) :
+      items = [ Item(i) for i in range(5) ]
+      obj = Item('new')
+      s = pfutil.pfIdentitySet(items)
+      lst = list(items)
+      self.assertTrue(s.insert(idx, obj))
+      lst.insert(idx, obj)
+      self.assertEqual([ id(v) for v in s ], [ id(v) for v in lst ], 'insert(%d)' % (idx,))
+      self.assertFalse(s.insert(0, obj))
+    s = pfutil.pfIdentitySet()
+    self.assertTrue(s.insert(3, obj))
+    self.assertEqual(s.List, [ obj ])
+
+  def test_insertBefore(self) :
+    items = [ Item(i) for i in range(3) ]
+    s = pfutil.pfIdentitySet(items)
+    ( a, b ) = ( Item('a'), Item('b') )
+    self.assertTrue(s.insertBefore(items[1], a))
+    self.assertTrue(s.insertBefore(Item(1), b))
+    self.assertFalse(s.insertBefore(items[0], a))
+    self.assertEqual([ id(v) for v in s ], [ id(v) for v in ( items[0], a, items[1], items[2], b ) ])
+
+
+class ListFunctionTest(unittest.TestCase) :
+  def test_unique(self) :
+    for make in ( list, pfutil.pfIdentitySet ) :
+      ( a, b ) = ( Item(0), Item(0) )
+      lst = make([ a ])
+      self.assertFalse(pfutil.isUnique(lst, a))
+      self.assertTrue(pfutil.isUnique(lst, b))
+      self.assertFalse(pfutil.appendUnique(lst, a))
+      self.assertTrue(pfutil.appendUnique(lst, b))
+      c = Item(1)
+      self.assertTrue(pfutil.insertUnique(lst, 0, c))
+      self.assertFalse(pfutil.insertUnique(lst, 0, c))
+      self.assertEqual([ id(v) for v in lst ], [ id(c), id(a), id(b) ])
+
+  def test_insertBefore(self) :
+    for make in ( list, pfutil.pfIdentitySet ) :
+      items = [ Item(i) for i in range(3) ]
+      lst = make(items)
+      new = Item('new')
+      pfutil.insertBefore(lst, items[1], new)
+      pfutil.insertBefore(lst, None, Item('last'))
+      self.assertEqual([ v.name for v in lst ], [ 0, 'new', 1, 2, 'last' ])
+      # 既にあるオブジェクト : listは重複し、pfIdentitySetは何もしない
+      pfutil.insertBefore(lst, items[0], new)
+      if make is list : self.assertEqual([ v.name for v in lst ], [ 'new', 0, 'new', 1, 2, 'last' ])
+      else : self.assertEqual([ v.name for v in lst ], [ 0, 'new', 1, 2, 'last' ])
+
+
+if __name__ == '__main__' :
+  unittest.main()
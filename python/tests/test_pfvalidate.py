@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+'''
+pfvalidateの検出とサニタイザ
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import unittest
+
+from tktnm import pfmatrix
+from tktnm import pfprofile
+from tktnm import pfquaternion
+from tktnm import pfvalidate
+
+
+NAN = float('nan')
+INF = float('inf')
+
+
+class NonFiniteTest(unittest.TestCase) :
+  def test_records(self) :
+    vals = array.array('d', [ 0.0, 0.0, 0.0, 1.0 ] * 10)
+    self.assertEqual(pfvalidate.nonFiniteRecords(vals, 4), [])
+    vals[13] = INF
+    vals[38] = NAN
+    self.assertEqual(pfvalidate.nonFiniteRecords(vals, 4), [ 3, 9 ])
+
+  def test_quaternions(self) :
+    qts = [ [ 0.0, 0.0, 0.0, 1.0 ], [ NAN, 0.0, 0.0, 1.0 ], [ 0.0, -INF, 0.0, 1.0 ] ]
+    self.assertEqual(pfvalidate.nonFiniteQuaternions(qts), [ 1, 2 ])
+
+
+class SanitizerTest(unittest.TestCase) :
+  def tearDown(self) :
+    pfvalidate.disable()
+    pfprofile.disable()
+
+  def test_raises(self) :
+    with pfvalidate.sanitizing() :
+      pfvalidate.markFrame()
+      with self.assertRaises(ValueError) as cm :
+        pfquaternion.multiply([ NAN, 0.0, 0.0, 1.0 ], [ 0.0, 0.0, 0.0, 1.0 ] * 100)
+    msg = str(cm.exception)
+    self.assertIn('frame 1', msg)
+    # 長い引数は省略する
+    self.assertLess(len(msg), 300)
+    self.assertFalse(pfvalidate.isEnabled())
+
+  def test_keepsOtherLayers(self) :
+    mul = pfmatrix.multiply
+    pfvalidate.enable()
+    pfprofile.enable()
+    pfvalidate.disable()
+    self.assertTrue(pfprofile.isEnabled())
+    self.assertIs(pfmatrix.multiply.__wrapped__, mul)
+    pfprofile.disable()
+    self.assertIs(pfmatrix.multiply, mul)
+
+
+if __name__ == '__main__' :
+  unittest.main()
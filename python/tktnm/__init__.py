@@ -0,0 +1,36 @@
+'''
+tktnm
+
+サブモジュールは最初の属性アクセス時に読み込む。
+  import tktnm
+  mtx = tktnm.pfmatrix.identity()
+'''
+
+import os
+
+__all__ = [
+  'pffloat1', 'pffloat4', 'pfquaternion', 'pfmatrix', 'pfaffine', 'pfvector',
+  'pftransformarray', 'pfserialize', 'pfbake', 'pfquatcodec', 'pfkeyreduce', 'pfparallel',
+  'pfmemo', 'pfposeblend', 'pfsquad', 'pfangular', 'pfintegrator', 'pfrandom',
+  'pfvalidate', 'pfprecision', 'pfdedup', 'pffrozen', 'pfmesh', 'pfpatch',
+  'pfutil', 'pfbench', 'pfprofile',
+]
+
+
+def __getattr__(name) :
+  if name in __all__ :
+    import importlib
+    return importlib.import_module('.' + name, __name__)
+  raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+def __dir__() :
+  return sorted(set(globals()) | set(__all__))
+
+
+if os.environ.get('TKTNM_PROFILE') :
+  from . import pfprofile
+  pfprofile.enable()
+
+if os.environ.get('TKTNM_SANITIZE') :
+  from . import pfvalidate
+  pfvalidate.enable()
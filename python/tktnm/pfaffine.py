@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+'''
+affine matrix(4x3)の操作を行う関数群
+
+pfmatrixの16要素の行列のうち、最後の列([0,0,0,1])を除いた12要素で保持する。
+  [r0x,r0y,r0z, r1x,r1y,r1z, r2x,r2y,r2z, tx,ty,tz]
+pfmatrixの行列の m[3],m[7],m[11],m[15] を除いたものと同じ並び。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+
+def identity() :
+  '''
+  identity() : [1,0,0, 0,1,0, 0,0,1, 0,0,0]
+  '''
+  return [1.0,0.0,0.0, 0.0,1.0,0.0, 0.0,0.0,1.0, 0.0,0.0,0.0]
+
+def fromMatrix(inM) :
+  '''
+  fromMatrix(mtx) : 16要素の行列から。最後の列は無視する
+  '''
+  return [inM[0],inM[1],inM[2], inM[4],inM[5],inM[6], inM[8],inM[9],inM[10], inM[12],inM[13],inM[14]]
+
+def toMatrix(inA) :
+  '''
+  toMatrix(affine) : 16要素の行列へ
+  '''
+  return [inA[0],inA[1],inA[2],0.0, inA[3],inA[4],inA[5],0.0, inA[6],inA[7],inA[8],0.0, inA[9],inA[10],inA[11],1.0]
+
+def multiply(inParent, inChild) :
+  '''
+  multiply(a0, a1) : a0 * a1 (pfmatrix.multiplyと同じ順序)
+  '''
+  ( a0,a1,a2, a3,a4,a5, a6,a7,a8, a9,a10,a11 ) = inChild
+  ( b0,b1,b2, b3,b4,b5, b6,b7,b8, b9,b10,b11 ) = inParent
+  return [
+    a0*b0 + a1*b3 + a2*b6, a0*b1 + a1*b4 + a2*b7, a0*b2 + a1*b5 + a2*b8,
+    a3*b0 + a4*b3 + a5*b6, a3*b1 + a4*b4 + a5*b7, a3*b2 + a4*b5 + a5*b8,
+    a6*b0 + a7*b3 + a8*b6, a6*b1 + a7*b4 + a8*b7, a6*b2 + a7*b5 + a8*b8,
+    a9*b0 + a10*b3 + a11*b6 + b9, a9*b1 + a10*b4 + a11*b7 + b10, a9*b2 + a10*b5 + a11*b8 + b11,
+  ]
+
+def inverse(inA) :
+  '''
+  inverse(affine) : affine^-1。行列式が0の場合はidentity
+  '''
+  ( a0,a1,a2, a3,a4,a5, a6,a7,a8, a9,a10,a11 ) = inA
+  c0 = a4*a8 - a5*a7
+  c3 = a5*a6 - a3*a8
+  c6 = a3*a7 - a4*a6
+  det = a0*c0 + a1*c3 + a2*c6
+  # 行列式の大きさはscaleの3乗に比例するので、絶対値の閾値では小さいscaleの行列を特異と誤る
+  if det == 0.0 : return identity()
+  rDet = 1.0 / det
+  i0 = c0 * rDet
+  i1 = (a2*a7 - a1*a8) * rDet
+  i2 = (a1*a5 - a2*a4) * rDet
+  i3 = c3 * rDet
+  i4 = (a0*a8 - a2*a6) * rDet
+  i5 = (a2*a3 - a0*a5) * rDet
+  i6 = c6 * rDet
+  i7 = (a1*a6 - a0*a7) * rDet
+  i8 = (a0*a4 - a1*a3) * rDet
+  return [
+    i0, i1, i2,
+    i3, i4, i5,
+    i6, i7, i8,
+    -(a9*i0 + a10*i3 + a11*i6), -(a9*i1 + a10*i4 + a11*i7), -(a9*i2 + a10*i5 + a11*i8),
+  ]
+
+def toWorldVector(inV, inA) :
+  '''
+  toWorldVector(vec, affine) -> [x,y,z,0] (pfvector.toWorldVectorByMatrixと同じ)
+  '''
+  x = inV[0]
+  y = inV[1]
+  z = inV[2]
+  return [
+    x*inA[0] + y*inA[3] + z*inA[6],
+    x*inA[1] + y*inA[4] + z*inA[7],
+    x*inA[2] + y*inA[5] + z*inA[8],
+    0.0,
+  ]
+
+def toWorldPosition(inV, inA) :
+  '''
+  toWorldPosition(pos, affine) -> [x,y,z,1] (pfvector.toWorldPositionByMatrixと同じ)
+  '''
+  x = inV[0]
+  y = inV[1]
+  z = inV[2]
+  return [
+    x*inA[0] + y*inA[3] + z*inA[6] + inA[9],
+    x*inA[1] + y*inA[4] + z*inA[7] + inA[10],
+    x*inA[2] + y*inA[5] + z*inA[8] + inA[11],
+    1.0,
+  ]
+
+def toLocalVector(inV, inA) :
+  '''
+  toLocalVector(vec, affine) -> [x,y,z,0]
+  '''
+  return toWorldVector(inV, inverse(inA))
+
+def toLocalPosition(inV, inA) :
+  '''
+  toLocalPosition(pos, affine) -> [x,y,z,1]
+  '''
+  return toWorldPosition(inV, inverse(inA))
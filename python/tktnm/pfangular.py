@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''
+quaternionのトラックの角速度、角加速度と積分
+
+トラックは tracks[frame][bone] = qt。隣接フレームの相対回転を
+pfquaternion.inverseMultiplyBatch(FRAME_LOCAL) または multiplyInverseBatch(FRAME_WORLD) でまとめて求め、
+pfquaternion.logBatch で角速度 [x,y,z,0](rad/s) にする。積分は expBatch と multiplyBatch。
+  FRAME_LOCAL : q[f+1] = q[f] * r  角速度はボーンのローカル座標
+  FRAME_WORLD : q[f+1] = r * q[f]  角速度は親の座標
+相対回転は w >= 0 (180度以下の回転)にそろえる。
+
+  vel = pfangular.angularVelocity(tracks, 1.0 / 30.0)
+  acc = pfangular.angularAcceleration(tracks, 1.0 / 30.0)
+  tracks = pfangular.integrate(tracks[0], vel, 1.0 / 30.0)
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+from . import pfquaternion
+from . import pfutil
+
+
+FRAME_LOCAL = pfutil.FRAME_LOCAL
+FRAME_WORLD = pfutil.FRAME_WORLD
+
+
+def __split(inValues, inBoneCount) :
+  return [ inValues[idx:idx+inBoneCount] for idx in range(0, len(inValues), inBoneCount) ]
+
+def relativeRotations(inTracks, frame=FRAME_LOCAL) :
+  '''
+  relativeRotations(tracks, frame) -> [ [ qt, ... ], ... ]。(frames-1) x bones
+  '''
+  if len(inTracks) < 2 : return []
+  boneCount = len(inTracks[0])
+  prev = [ q for qts in inTracks[:-1] for q in qts ]
+  cur = [ q for qts in inTracks[1:] for q in qts ]
+  if frame == FRAME_LOCAL : rel = pfquaternion.inverseMultiplyBatch(prev, cur)
+  elif frame == FRAME_WORLD : rel = pfquaternion.multiplyInverseBatch(cur, prev)
+  else : raise ValueError('unknown frame %r' % (frame,))
+  rel = [ [ -q[0], -q[1], -q[2], -q[3] ] if q[3] < 0.0 else q for q in rel ]
+  return __split(rel, boneCount)
+
+def angularVelocity(inTracks, inDeltaTime, frame=FRAME_LOCAL) :
+  '''
+  angularVelocity(tracks, dt, frame) -> [ [ [x,y,z,0], ... ], ... ]。(frames-1) x bones、rad/s
+  フレームf..f+1の間の平均の角速度
+  '''
+  if len(inTracks) < 2 : return []
+  boneCount = len(inTracks[0])
+  rel = [ q for qts in relativeRotations(inTracks, frame) for q in qts ]
+  # 回転の角度は log の2倍
+  s = 2.0 / inDeltaTime
+  vel = [ [ v[0] * s, v[1] * s, v[2] * s, 0.0 ] for v in pfquaternion.logBatch(rel) ]
+  return __split(vel, boneCount)
+
+def angularAcceleration(inTracks, inDeltaTime, frame=FRAME_LOCAL) :
+  '''
+  angularAcceleration(tracks, dt, frame) -> [ [ [x,y,z,0], ... ], ... ]。(frames-2) x bones、rad/s^2
+  隣接する angularVelocity の差分
+  '''
+  vel = angularVelocity(inTracks, inDeltaTime, frame)
+  s = 1.0 / inDeltaTime
+  return [ [ [ (b[0] - a[0]) * s, (b[1] - a[1]) * s, (b[2] - a[2]) * s, 0.0 ] for ( a, b ) in zip(va, vb) ]
+    for ( va, vb ) in zip(vel[:-1], vel[1:]) ]
+
+def integrate(inStart, inVelocities, inDeltaTime, frame=FRAME_LOCAL) :
+  '''
+  integrate([ qt, ... ], velocities, dt, frame) -> [ [ qt, ... ], ... ]。(len(velocities)+1) x bones
+  angularVelocityの逆。velocities[f][bone]の角速度でdtずつ回す
+  '''
+  s = 0.5 * inDeltaTime
+  cur = [ list(q) for q in inStart ]
+  retVal = [ cur ]
+  for vels in inVelocities :
+    rot = pfquaternion.expBatch([ [ v[0] * s, v[1] * s, v[2] * s, 0.0 ] for v in vels ])
+    if frame == FRAME_LOCAL : cur = pfquaternion.multiplyBatch(cur, rot)
+    elif frame == FRAME_WORLD : cur = pfquaternion.multiplyBatch(rot, cur)
+    else : raise ValueError('unknown frame %r' % (frame,))
+    retVal.append(cur)
+  return retVal
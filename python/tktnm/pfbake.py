@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+'''
+アニメーションのベイク
+
+フレームごとに評価関数からlocalのTRSを受け取り、pfmatrix.composeで合成し、
+階層をたどってworldの行列を求める。結果は一定フレーム数ごとにまとめてsinkに渡すので、
+フレーム数によらずメモリ使用量は一定。
+
+  def evaluate(frame) :
+    return [ ( translate, quaternion, shear, scale ), ... ]  # ボーンごと
+  parents = [ -1, 0, 1, ... ]  # 親のインデックス。親は子より前
+  with open('bake.bin', 'wb') as f :
+    pfbake.bake(f, evaluate, range(20000), parents, output=pfbake.OUTPUT_DECOMPOSE)
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+from . import pfmatrix
+from . import pfquaternion
+from . import pfserialize
+
+
+OUTPUT_MATRIX = 'matrix'        # mtx
+OUTPUT_DECOMPOSE = 'decompose'  # ( translate, quaternion, shear, scale )
+OUTPUT_EULER = 'euler'          # ( translate, euler, shear, scale )
+
+__LAYOUTS = { OUTPUT_MATRIX : pfserialize.LAYOUT_MATRIX, OUTPUT_DECOMPOSE : pfserialize.LAYOUT_TRSS }
+
+
+def evaluateFrame(inLocals, inParents, output=OUTPUT_MATRIX, order=0) :
+  '''
+  evaluateFrame([ (translate, quaternion, shear, scale), ... ], parents, output, order) -> [ record, ... ]
+  '''
+  worlds = [ None ] * len(inParents)
+  for ( idx, ( trn, qt, shr, scl ) ) in enumerate(inLocals) :
+    mtx = pfmatrix.compose(trn, qt, shr, scl)
+    parent = inParents[idx]
+    if parent >= 0 : mtx = pfmatrix.multiply(worlds[parent], mtx)
+    worlds[idx] = mtx
+  if output == OUTPUT_MATRIX : return worlds
+  records = [ pfmatrix.decompose(mtx) for mtx in worlds ]
+  if output == OUTPUT_EULER :
+    records = [ ( trn, pfquaternion.toEuler(order, qt), shr, scl ) for ( trn, qt, shr, scl ) in records ]
+  return records
+
+def bakeFrames(inEvaluate, inFrames, inParents, output=OUTPUT_MATRIX, order=0) :
+  '''
+  bakeFrames(evaluate, frames, parents, output, order) -> generator of ( frame, [ record, ... ] )
+  '''
+  for frame in inFrames :
+    yield ( frame, evaluateFrame(inEvaluate(frame), inParents, output, order) )
+
+def bakeChunks(inEvaluate, inFrames, inParents, output=OUTPUT_MATRIX, order=0, chunkSize=64) :
+  '''
+  bakeChunks(evaluate, frames, parents, output, order, chunkSize) -> generator of ( [ frame, ... ], [ [ record, ... ], ... ] )
+  最大chunkSizeフレームずつ
+  '''
+  frames = []
+  records = []
+  for ( frame, recs ) in bakeFrames(inEvaluate, inFrames, inParents, output, order) :
+    frames.append(frame)
+    records.append(recs)
+    if len(frames) >= chunkSize :
+      yield ( frames, records )
+      frames = []
+      records = []
+  if frames : yield ( frames, records )
+
+def bake(ioSink, inEvaluate, inFrames, inParents, output=OUTPUT_MATRIX, order=0, chunkSize=64, dtype=pfserialize.FLOAT32) :
+  '''
+  bake(sink, evaluate, frames, parents, output, order, chunkSize, dtype) -> ベイクしたフレーム数
+  sink :
+    callable             : sink([ frame, ... ], [ [ record, ... ], ... ]) をchunkごとに呼ぶ
+    sendall()を持つもの  : pfserializeの形式のbytesを送る(socketなど)
+    write()を持つもの    : pfserializeの形式のbytesを書く(file)
+  bytesで書く場合、outputはOUTPUT_MATRIXかOUTPUT_DECOMPOSE。
+  seek()できるsinkには1つのheaderを書き、レコード数は最後に(途中で止まった場合もそこまでの数で)書きなおす。
+  seek()できないsinkにはchunkごとにheaderとレコードを書く(pfserialize.loadBlocksで読む)。
+  '''
+  write = None
+  seekable = False
+  if hasattr(ioSink, 'sendall') : write = ioSink.sendall
+  elif hasattr(ioSink, 'write') :
+    write = ioSink.write
+    seekable = hasattr(ioSink, 'seekable') and ioSink.seekable()
+  elif not callable(ioSink) : raise TypeError('sink must be callable or have sendall()/write()')
+
+  if write is not None :
+    if output not in __LAYOUTS : raise ValueError('output %r cannot be written as bytes' % (output,))
+    layout = __LAYOUTS[output]
+    if seekable :
+      start = ioSink.tell()
+      write(pfserialize.packHeader(layout, 0, dtype))
+
+  count = 0
+  written = 0
+  try :
+    for ( frames, records ) in bakeChunks(inEvaluate, inFrames, inParents, output, order, chunkSize) :
+      if write is None :
+        ioSink(frames, records)
+      else :
+        recs = [ rec for recs in records for rec in recs ]
+        if seekable : write(pfserialize.packRecords(layout, recs, dtype))
+        else : write(pfserialize.pack(layout, recs, dtype))
+        written += len(recs)
+      count += len(frames)
+  finally :
+    if seekable :
+      end = ioSink.tell()
+      ioSink.seek(start)
+      write(pfserialize.packHeader(layout, written, dtype))
+      ioSink.seek(end)
+  return count
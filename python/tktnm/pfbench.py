@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+'''
+ベンチマーク
+
+pffloat4, pfmatrix, pfaffine, pfquaternion, pfvector の公開関数を計測する。
+  python -m tktnm.pfbench run -o base.json
+  python -m tktnm.pfbench run -o new.json
+  python -m tktnm.pfbench compare base.json new.json --threshold 0.1
+import時間(python -X importtime)は run --imports で計測する。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import argparse
+import datetime
+import importlib
+import inspect
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from . import pffloat4
+
+
+MODULES = ( 'pffloat4', 'pfmatrix', 'pfaffine', 'pfquaternion', 'pfvector' )
+IMPORTS = ( 'tktnm', 'tktnm.pffloat1', 'tktnm.pffloat4', 'tktnm.pfquaternion', 'tktnm.pfmatrix', 'tktnm.pfaffine', 'tktnm.pfvector' )
+
+# 'module.scalarFunction' : 'module.batchedFunction'
+# batchedFunctionは、scalarFunctionの引数それぞれをリストにしたものを受け取る。
+BATCHED = {
+  'pfmatrix.toShearScale' : 'pfmatrix.toShearScaleBatch',
+  'pfmatrix.compose' : 'pfmatrix.composeBatch',
+  'pfmatrix.decompose' : 'pfmatrix.decomposeBatch',
+  'pfmatrix.blendMatrix' : 'pfmatrix.blendMatrices',
+  'pfquaternion.multiply' : 'pfquaternion.multiplyBatch',
+  'pfquaternion.inverseMultiply' : 'pfquaternion.inverseMultiplyBatch',
+  'pfquaternion.multiplyInverse' : 'pfquaternion.multiplyInverseBatch',
+  'pfquaternion.log' : 'pfquaternion.logBatch',
+  'pfquaternion.exp' : 'pfquaternion.expBatch',
+  'pfquaternion.slerp' : 'pfquaternion.slerpBatch',
+  'pfquaternion.fromVector' : 'pfquaternion.fromVectorBatch',
+  'pfquaternion.lookAt' : 'pfquaternion.lookAtBatch',
+}
+
+
+def __float4() : return pffloat4.randomRange(-10.0, 10.0)
+def __quaternion() :
+  from . import pfquaternion
+  return pfquaternion.normal(pffloat4.randomRange(-1.0, 1.0))
+def __scale() : return pffloat4.setW0(pffloat4.randomRange(0.5, 2.0))
+def __shear() : return pffloat4.setW0(pffloat4.randomRange(-0.5, 0.5))
+def __matrix() :
+  from . import pfmatrix
+  return pfmatrix.compose(pffloat4.setW0(__float4()), __quaternion(), __shear(), __scale())
+def __affine() :
+  from . import pfaffine
+  return pfaffine.fromMatrix(__matrix())
+def __axis() : return pffloat4.setW0(pffloat4.normal3(pffloat4.randomRange(-1.0, 1.0)))
+
+__KINDS = {
+  'float4' : __float4,
+  'quaternion' : __quaternion,
+  'matrix' : __matrix,
+  'affine' : __affine,
+  'scale' : __scale,
+  'shear' : __shear,
+  'axis' : __axis,
+  'scalar' : lambda : pffloat4.randomRange(-10.0, 10.0)[0],
+  'min' : lambda : pffloat4.randomRange(-10.0, 0.0)[0],
+  'max' : lambda : pffloat4.randomRange(0.0, 10.0)[0],
+  'rate' : lambda : pffloat4.randomRange(0.0, 1.0)[0],
+  'rate4' : lambda : pffloat4.randomRange(0.0, 1.0),
+  'cos' : lambda : pffloat4.randomRange(-1.0, 1.0)[0],
+  'degree' : lambda : pffloat4.randomRange(-180.0, 180.0)[0],
+  'euler' : lambda : pffloat4.randomRange(-180.0, 180.0),
+  'length' : lambda : pffloat4.randomRange(0.5, 2.0)[0],
+  'order' : lambda : random.randint(0, 5),
+  'index' : lambda : random.randint(0, 3),
+  'bool' : lambda : random.random() < 0.5,
+  'bool4' : lambda : [ v < 0.5 for v in pffloat4.randomRange(0.0, 1.0) ],
+}
+
+# 引数名 -> 入力の種類
+__PARAMS = {
+  'inXYZW' : 'float4', 'inXYZ' : 'float4', 'inABCD' : 'float4', 'inV' : 'float4',
+  'inA' : 'float4', 'inB' : 'float4', 'inC' : 'float4', 'inW' : 'float4',
+  'inFalse' : 'float4', 'inTrue' : 'float4', 'inFrom' : 'float4', 'inTo' : 'float4',
+  'inRow' : 'float4', 'inColumn' : 'float4', 'inForward' : 'float4', 'inUp' : 'float4',
+  'inX' : 'scalar', 'inY' : 'scalar', 'inZ' : 'scalar', 'inS' : 'scalar',
+  'inMin' : 'min', 'inMax' : 'max', 'inR' : 'rate4', 'inRateB' : 'rate', 'inSelect' : 'bool4',
+  'inQ' : 'quaternion', 'inQA' : 'quaternion', 'inQB' : 'quaternion', 'quaternion' : 'quaternion',
+  'inM' : 'matrix', 'inMtx' : 'matrix', 'inMtxA' : 'matrix', 'inMtxB' : 'matrix',
+  'inParent' : 'matrix', 'inChild' : 'matrix',
+  'inRowIndex' : 'index', 'inColumnIndex' : 'index',
+  'inScale' : 'scale', 'inScl' : 'scale', 'scale' : 'scale',
+  'inShear' : 'shear', 'inShr' : 'shear', 'shear' : 'shear', 'translate' : 'float4',
+  'inOrd' : 'order', 'inEul' : 'euler', 'inDeg' : 'degree', 'inAx' : 'axis',
+  'inUpper' : 'length', 'inLower' : 'length', 'inDist' : 'length',
+}
+
+# 'module.function' : { 引数名 : 入力の種類 }。引数名だけでは決まらないもの、既定値のある引数を渡すもの
+__OVERRIDES = {
+  'pffloat4.splat' : { 'inV' : 'scalar' },
+  'pffloat4.setX' : { 'inV' : 'scalar' },
+  'pffloat4.setY' : { 'inV' : 'scalar' },
+  'pffloat4.setZ' : { 'inV' : 'scalar' },
+  'pffloat4.setW' : { 'inV' : 'scalar' },
+  'pffloat4.addScalar' : { 'inV' : 'scalar' },
+  'pffloat4.subScalar' : { 'inV' : 'scalar' },
+  'pffloat4.mulScalar' : { 'inV' : 'scalar' },
+  'pffloat4.sinCosHalf' : { 'inC' : 'cos' },
+  'pffloat4.select' : { 'inSelect' : 'bool' },
+  'pfmatrix.getRow' : { 'inV' : 'matrix' },
+  'pfmatrix.setRow' : { 'inV' : 'matrix' },
+  'pfmatrix.getColumn' : { 'inV' : 'matrix' },
+  'pfmatrix.setColumn' : { 'inV' : 'matrix' },
+  'pfmatrix.decompose' : { 'inV' : 'matrix' },
+  'pfmatrix.inverseTransform' : { 'inV' : 'matrix' },
+  'pfmatrix.compose' : { 'translate' : 'float4', 'quaternion' : 'quaternion', 'shear' : 'shear', 'scale' : 'scale' },
+  'pfaffine.multiply' : { 'inParent' : 'affine', 'inChild' : 'affine' },
+  'pfaffine.inverse' : { 'inA' : 'affine' },
+  'pfaffine.toMatrix' : { 'inA' : 'affine' },
+  'pfaffine.toWorldVector' : { 'inA' : 'affine' },
+  'pfaffine.toWorldPosition' : { 'inA' : 'affine' },
+  'pfaffine.toLocalVector' : { 'inA' : 'affine' },
+  'pfaffine.toLocalPosition' : { 'inA' : 'affine' },
+  'pfquaternion.fromAxisSinCos' : { 'inC' : 'cos' },
+}
+
+
+def publicFunctions(inModName) :
+  '''
+  publicFunctions(modName) -> [ (name, function), ... ]
+  '''
+  mod = importlib.import_module('.' + inModName, __package__)
+  retVal = []
+  for name, func in vars(mod).items() :
+    if name.startswith('_') : continue
+    if not inspect.isfunction(func) or func.__module__ != mod.__name__ : continue
+    retVal.append(( name, func ))
+  return retVal
+
+def makeArgs(inQualName, inFunc) :
+  '''
+  makeArgs('module.function', func) -> [ arg, ... ]
+  '''
+  overrides = __OVERRIDES.get(inQualName, {})
+  args = []
+  for param in inspect.signature(inFunc).parameters.values() :
+    if param.default is not inspect.Parameter.empty and param.name not in overrides : continue
+    kind = overrides.get(param.name, __PARAMS.get(param.name))
+    if kind is None :
+      raise KeyError('%s : no input kind for %s' % (inQualName, param.name))
+    args.append(__KINDS[kind]())
+  return args
+
+def __timeCalls(inFunc, inArgsPool, inTargetSec, inRepeat) :
+  poolLen = len(inArgsPool)
+  loops = poolLen
+  while True :
+    t0 = time.perf_counter_ns()
+    for idx in range(loops) : inFunc(*inArgsPool[idx % poolLen])
+    el = time.perf_counter_ns() - t0
+    if el * 1.0e-9 >= inTargetSec * 0.2 or loops >= 1 << 24 : break
+    loops *= 4
+  best = el
+  for _ in range(inRepeat - 1) :
+    t0 = time.perf_counter_ns()
+    for idx in range(loops) : inFunc(*inArgsPool[idx % poolLen])
+    best = min(best, time.perf_counter_ns() - t0)
+  return best / loops
+
+def __allocations(inFunc, inArgsPool) :
+  # blocks : 呼び出し後も残るメモリブロック数(戻り値) / 呼び出し
+  # peakBytes : 1回の呼び出し中の一時メモリのピーク
+  keep = [ None ] * len(inArgsPool)
+  before = sys.getallocatedblocks()
+  for idx, args in enumerate(inArgsPool) : keep[idx] = inFunc(*args)
+  blocks = (sys.getallocatedblocks() - before) / len(inArgsPool)
+  del keep
+  tracemalloc.start()
+  peak = 0
+  for args in inArgsPool[:8] :
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    inFunc(*args)
+    peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+  tracemalloc.stop()
+  return ( max(blocks, 0.0), peak )
+
+def benchFunction(inQualName, inFunc, poolSize=64, targetSec=0.02, repeat=3) :
+  '''
+  benchFunction('module.function', func) -> { 'nsPerCall', 'blocksPerCall', 'peakBytesPerCall' }
+  '''
+  pool = [ makeArgs(inQualName, inFunc) for _ in range(poolSize) ]
+  ns = __timeCalls(inFunc, pool, targetSec, repeat)
+  ( blocks, peak ) = __allocations(inFunc, pool)
+  return { 'nsPerCall' : ns, 'blocksPerCall' : blocks, 'peakBytesPerCall' : peak }
+
+def __resolve(inQualName) :
+  ( modName, funcName ) = inQualName.split('.')
+  mod = importlib.import_module('.' + modName, __package__)
+  return getattr(mod, funcName)
+
+def benchBatched(inScalarName, inBatchName, count=1024, targetSec=0.02, repeat=3) :
+  '''
+  benchBatched('module.scalar', 'module.batched') -> { 'scalarNsPerItem', 'batchedNsPerItem', 'speedup' }
+  '''
+  scalarFunc = __resolve(inScalarName)
+  batchFunc = __resolve(inBatchName)
+  pool = [ makeArgs(inScalarName, scalarFunc) for _ in range(count) ]
+  columns = [ list(col) for col in zip(*pool) ]
+  scalarNs = __timeCalls(scalarFunc, pool, targetSec, repeat)
+  batchedNs = __timeCalls(batchFunc, [ columns ], targetSec, repeat) / count
+  return {
+    'scalarNsPerItem' : scalarNs,
+    'batchedNsPerItem' : batchedNs,
+    'speedup' : scalarNs / batchedNs if batchedNs > 0.0 else 0.0,
+    'mismatches' : checkBatched(inScalarName, inBatchName, pool),
+  }
+
+def checkBatched(inScalarName, inBatchName, inPool) :
+  '''
+  checkBatched('module.scalar', 'module.batched', [ args, ... ]) -> スカラー版と結果が一致しない要素数(nan同士は一致とする)
+  スカラー版がtupleを返す場合、batched版は要素ごとのlistのtupleを返す
+  '''
+  scalarFunc = __resolve(inScalarName)
+  batchFunc = __resolve(inBatchName)
+  expected = [ scalarFunc(*args) for args in inPool ]
+  actual = batchFunc(*[ list(col) for col in zip(*inPool) ])
+  if expected and isinstance(expected[0], tuple) : actual = list(zip(*actual))
+  retVal = abs(len(expected) - len(actual))
+  for ( a, b ) in zip(expected, actual) :
+    if not __sameValues(a, b) : retVal += 1
+  return retVal
+
+def __sameValues(inA, inB) :
+  if isinstance(inA, ( list, tuple )) :
+    if not isinstance(inB, ( list, tuple )) or len(inA) != len(inB) : return False
+    for ( a, b ) in zip(inA, inB) :
+      if not __sameValues(a, b) : return False
+    return True
+  return inA == inB or (inA != inA and inB != inB)
+
+def benchImportTime(inModName, repeat=5) :
+  '''
+  benchImportTime('tktnm.pfmatrix') -> cumulative import time(us)。python -X importtimeの最小値
+  '''
+  env = dict(os.environ)
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  env['PYTHONPATH'] = os.pathsep.join([ root ] + [ p for p in [ env.get('PYTHONPATH') ] if p ])
+  env.pop('TKTNM_PROFILE', None)
+  best = None
+  for _ in range(repeat) :
+    proc = subprocess.run([ sys.executable, '-X', 'importtime', '-c', 'import ' + inModName ],
+      env=env, capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines() :
+      # import time: self [us] | cumulative | imported package
+      cols = line.split('|')
+      if len(cols) != 3 or cols[2].strip() != inModName : continue
+      us = int(cols[1])
+      if best is None or us < best : best = us
+  return best
+
+def run(modules=MODULES, pattern=None, poolSize=64, targetSec=0.02, repeat=3, seed=0, imports=False, log=None) :
+  '''
+  run() -> { 'meta' : {...}, 'results' : { 'module.function' : {...} }, 'batched' : {...}, 'imports' : {...} }
+  '''
+  random.seed(seed)
+  batchNames = set(BATCHED.values())
+  results = {}
+  for modName in modules :
+    for ( name, func ) in publicFunctions(modName) :
+      qualName = modName + '.' + name
+      if qualName in batchNames : continue
+      if pattern is not None and pattern not in qualName : continue
+      results[qualName] = benchFunction(qualName, func, poolSize, targetSec, repeat)
+      if log is not None :
+        log('%-40s %10.1f ns %6.1f blocks %8d bytes' % (qualName, results[qualName]['nsPerCall'],
+          results[qualName]['blocksPerCall'], results[qualName]['peakBytesPerCall']))
+  batched = {}
+  for ( scalarName, batchName ) in sorted(BATCHED.items()) :
+    if scalarName.split('.')[0] not in modules : continue
+    if pattern is not None and pattern not in scalarName : continue
+    batched[scalarName] = benchBatched(scalarName, batchName, targetSec=targetSec, repeat=repeat)
+    batched[scalarName]['batched'] = batchName
+    if log is not None :
+      log('%-40s scalar %10.1f ns/item  batched %10.1f ns/item  x%.2f  %d mismatches' % (scalarName,
+        batched[scalarName]['scalarNsPerItem'], batched[scalarName]['batchedNsPerItem'],
+        batched[scalarName]['speedup'], batched[scalarName]['mismatches']))
+  importUs = {}
+  if imports :
+    for modName in IMPORTS :
+      importUs[modName] = benchImportTime(modName, repeat=max(repeat, 5))
+      if log is not None : log('%-40s %10d us import' % (modName, importUs[modName]))
+  meta = {
+    'python' : platform.python_version(),
+    'implementation' : platform.python_implementation(),
+    'platform' : platform.platform(),
+    'date' : datetime.datetime.now().isoformat(timespec='seconds'),
+    'seed' : seed,
+  }
+  return { 'meta' : meta, 'results' : results, 'batched' : batched, 'imports' : importUs }
+
+def save(inResult, inPath) :
+  '''
+  save(result, path) : JSONで保存
+  '''
+  with open(inPath, 'w', encoding='utf-8') as f :
+    json.dump(inResult, f, indent=1, sort_keys=True)
+
+def load(inPath) :
+  '''
+  load(path) -> result
+  '''
+  with open(inPath, 'r', encoding='utf-8') as f :
+    return json.load(f)
+
+def compare(inBase, inCurrent, threshold=0.1) :
+  '''
+  compare(base, current, threshold) -> [ ( 'module.function', baseNs, currentNs, ratio ), ... ]
+  ratio > 1.0 + threshold のもの(遅くなったもの)を返す
+  '''
+  regressions = []
+  for ( key, cur ) in sorted(inCurrent['results'].items()) :
+    base = inBase['results'].get(key)
+    if base is None or base['nsPerCall'] <= 0.0 : continue
+    ratio = cur['nsPerCall'] / base['nsPerCall']
+    if ratio > 1.0 + threshold :
+      regressions.append(( key, base['nsPerCall'], cur['nsPerCall'], ratio ))
+  for ( key, cur ) in sorted(inCurrent.get('batched', {}).items()) :
+    base = inBase.get('batched', {}).get(key)
+    if base is None or base['batchedNsPerItem'] <= 0.0 : continue
+    ratio = cur['batchedNsPerItem'] / base['batchedNsPerItem']
+    if ratio > 1.0 + threshold :
+      regressions.append(( cur['batched'], base['batchedNsPerItem'], cur['batchedNsPerItem'], ratio ))
+  for ( key, cur ) in sorted(inCurrent.get('imports', {}).items()) :
+    base = inBase.get('imports', {}).get(key)
+    if not base : continue
+    ratio = cur / base
+    if ratio > 1.0 + threshold :
+      regressions.append(( 'import ' + key, base * 1000.0, cur * 1000.0, ratio ))
+  return regressions
+
+def main(argv=None) :
+  parser = argparse.ArgumentParser(prog='python -m tktnm.pfbench')
+  sub = parser.add_subparsers(dest='command', required=True)
+  runParser = sub.add_parser('run', help='run benchmarks')
+  runParser.add_argument('-o', '--output', help='save result as JSON')
+  runParser.add_argument('-m', '--module', action='append', choices=MODULES)
+  runParser.add_argument('-k', '--pattern', help='only functions containing this string')
+  runParser.add_argument('--time', type=float, default=0.02, help='seconds per measurement')
+  runParser.add_argument('--repeat', type=int, default=3)
+  runParser.add_argument('--seed', type=int, default=0)
+  runParser.add_argument('--imports', action='store_true', help='also measure import time')
+  cmpParser = sub.add_parser('compare', help='compare two JSON results')
+  cmpParser.add_argument('base')
+  cmpParser.add_argument('current')
+  cmpParser.add_argument('--threshold', type=float, default=0.1)
+  args = parser.parse_args(argv)
+
+  if args.command == 'run' :
+    result = run(modules=tuple(args.module or MODULES), pattern=args.pattern,
+      targetSec=args.time, repeat=args.repeat, seed=args.seed, imports=args.imports, log=print)
+    if args.output : save(result, args.output)
+    return 0
+  regressions = compare(load(args.base), load(args.current), args.threshold)
+  for ( key, baseNs, curNs, ratio ) in regressions :
+    print('%-40s %10.1f ns -> %10.1f ns  x%.2f' % (key, baseNs, curNs, ratio))
+  if regressions : return 1
+  print('no regressions (threshold %.0f%%)' % (args.threshold * 100.0))
+  return 0
+
+if __name__ == '__main__' :
+  sys.exit(main())
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+'''
+量子化したキーによるtransformのハッシュと重複の除去
+
+listはハッシュできないので、各成分を round(v / tolerance) で整数にしたtupleをキーにする。
+  matrixKey     : 16成分
+  quaternionKey : qと-qは同じキー(量子化した成分を w,x,y,z の順に見て、最初の0でない成分を正にそろえる)
+  trsKey        : ( translate, quaternion, scale ) または ( translate, quaternion, shear, scale )
+量子化の境界をまたぐ値は、差がtolerance未満でも別のキーになる。
+
+  index = pfdedup.pfDedupIndex(pfdedup.matrixKey)
+  ids = index.addMany(mtxs)               # 同じtransformは同じID
+  decs = index.apply(pfmatrix.decompose)  # ID順。decs[ids[i]]
+  index.Values                            # IDごとの最初に登録した値
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+
+DEFAULT_TOLERANCE = 1.0e-6
+
+
+def __quantize(inValues, inCount, inRcp) :
+  return tuple([ round(inValues[idx] * inRcp) for idx in range(inCount) ])
+
+def matrixKey(inMtx, tolerance=DEFAULT_TOLERANCE) :
+  '''
+  matrixKey(mtx, tolerance) -> tuple
+  '''
+  return __quantize(inMtx, 16, 1.0 / tolerance)
+
+def quaternionKey(inQ, tolerance=DEFAULT_TOLERANCE) :
+  '''
+  quaternionKey(qt, tolerance) -> tuple。qと-qは同じ
+  '''
+  rcp = 1.0 / tolerance
+  ( x, y, z, w ) = ( round(inQ[0] * rcp), round(inQ[1] * rcp), round(inQ[2] * rcp), round(inQ[3] * rcp) )
+  # roundは符号について対称なので、-qを量子化したものは量子化したqの符号を反転したもの
+  for v in ( w, x, y, z ) :
+    if v != 0 :
+      if v < 0 : return ( -x, -y, -z, -w )
+      break
+  return ( x, y, z, w )
+
+def vectorKey(inV, tolerance=DEFAULT_TOLERANCE) :
+  '''
+  vectorKey([x,y,z,_], tolerance) -> tuple
+  '''
+  return __quantize(inV, 3, 1.0 / tolerance)
+
+def trsKey(inTRS, tolerance=DEFAULT_TOLERANCE) :
+  '''
+  trsKey(( translate, quaternion, scale ) or ( translate, quaternion, shear, scale ), tolerance) -> tuple
+  '''
+  return ( vectorKey(inTRS[0], tolerance), quaternionKey(inTRS[1], tolerance) ) + \
+    tuple([ vectorKey(v, tolerance) for v in inTRS[2:] ])
+
+
+class pfDedupIndex(object) :
+  '''
+  transformにIDを振るクラス。同じキーのtransformは同じID
+  '''
+  # key -> ID
+  __ids = None
+  # IDごとの最初に登録した値
+  __values = None
+  __keyFunc = None
+  __tolerance = DEFAULT_TOLERANCE
+  @property
+  def Values(self) :
+    '''
+    Values : [value, ...]. IDごとの最初に登録した値
+    '''
+    return list(self.__values)
+  @property
+  def Tolerance(self) :
+    '''
+    Tolerance : float. 量子化の幅
+    '''
+    return self.__tolerance
+
+  def __init__(self, keyFunc=matrixKey, tolerance=DEFAULT_TOLERANCE) :
+    '''
+    コンストラクタ。keyFunc(value, tolerance) -> hashable
+    '''
+    self.__ids = {}
+    self.__values = []
+    self.__keyFunc = keyFunc
+    self.__tolerance = tolerance
+
+  def __len__(self) :
+    return len(self.__values)
+
+  def __getitem__(self, inId) :
+    return self.__values[inId]
+
+  def __contains__(self, inValue) :
+    return self.__keyFunc(inValue, self.__tolerance) in self.__ids
+
+  def key(self, inValue) :
+    '''
+    key(value) -> キー
+    '''
+    return self.__keyFunc(inValue, self.__tolerance)
+
+  def find(self, inValue) :
+    '''
+    find(value) -> ID or None
+    '''
+    return self.__ids.get(self.__keyFunc(inValue, self.__tolerance))
+
+  def add(self, inValue) :
+    '''
+    add(value) -> ID。未登録なら新しいID
+    '''
+    key = self.__keyFunc(inValue, self.__tolerance)
+    retVal = self.__ids.get(key)
+    if retVal is None :
+      retVal = len(self.__values)
+      self.__ids[key] = retVal
+      self.__values.append(inValue)
+    return retVal
+
+  def addMany(self, inValues) :
+    '''
+    addMany([value, ...]) -> [ID, ...]
+    '''
+    add = self.add
+    return [ add(v) for v in inValues ]
+
+  def apply(self, inFunc) :
+    '''
+    apply(func) -> [ func(value), ... ]。IDごとに1回だけ呼ぶ
+    '''
+    return [ inFunc(v) for v in self.__values ]
+
+  def clear(self) :
+    '''
+    clear() : 登録をすべて消す
+    '''
+    self.__ids = {}
+    self.__values = []
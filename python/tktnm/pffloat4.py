@@ -8,7 +8,6 @@ Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
 '''
 
 import math
-import random
 
 from . import pffloat1
 
@@ -204,6 +203,7 @@ def randomRange(inMin, inMax) :
   '''
   randomRange(min,max) -> [ random(min,max), ...]
   '''
+  import random  # import時間短縮のため、使う時に読み込む
   return [ random.uniform(inMin, inMax), random.uniform(inMin, inMax), random.uniform(inMin, inMax), random.uniform(inMin, inMax) ]
 
 def __applyScalar(inFunc, inCnt, inA, inB) : 
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+'''
+tupleで値を返すモード
+
+pffloat4, pfquaternion, pfmatrixの関数はlistを返すが、listはハッシュできず、共有すると書き換えられる。
+freezeはlistをtupleに(入れ子まで)、thawはtupleをlistに戻す。
+各関数は引数にtupleを渡しても同じ値を返すので、tupleのまま次の計算に渡せる。
+float4, quaternion, matrixは各モジュールの関数をtupleを返す関数にしたもの。
+
+  m = pffrozen.matrix.multiply(a, b)          # ( f, ... )
+  ( trn, qt, shr, scl ) = pffrozen.matrix.decompose(m)
+  cache = { m : ... }                          # dictのキー, functools.lru_cacheの引数にできる
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import functools
+
+from . import pffloat4
+from . import pfmatrix
+from . import pfquaternion
+
+
+def freeze(inValue) :
+  '''
+  freeze(value) -> value。list, tupleを入れ子までtupleにする
+  '''
+  if isinstance(inValue, ( list, tuple )) :
+    for v in inValue :
+      if isinstance(v, ( list, tuple )) : return tuple([ freeze(v) for v in inValue ])
+    return tuple(inValue)
+  return inValue
+
+def thaw(inValue) :
+  '''
+  thaw(value) -> value。freezeの逆。一番外側がtupleの組(decomposeなど)はtupleのまま
+  '''
+  if isinstance(inValue, tuple) :
+    for v in inValue :
+      if isinstance(v, tuple) : return tuple([ thaw(v) for v in inValue ])
+    return list(inValue)
+  return inValue
+
+def frozen(inFunc) :
+  '''
+  frozen(func) -> func。戻り値をfreezeする関数
+  '''
+  @functools.wraps(inFunc)
+  def wrapper(*args, **kwargs) :
+    return freeze(inFunc(*args, **kwargs))
+  return wrapper
+
+
+class pfFrozenModule(object) :
+  '''
+  モジュールの関数をtupleを返す関数にしたもの。関数は最初に参照したときに作る
+  '''
+  __module = None
+  @property
+  def Module(self) :
+    '''
+    Module : module. 元のモジュール
+    '''
+    return self.__module
+
+  def __init__(self, inModule) :
+    '''
+    コンストラクタ
+    '''
+    self.__module = inModule
+
+  def __getattr__(self, inName) :
+    mod = self.__module
+    func = getattr(mod, inName)
+    if not callable(func) : return func
+    # pfmemo.install, pfprecision.setPrecisionなどで置き換えられた関数を使うように、呼び出しごとに参照する
+    @functools.wraps(func)
+    def retVal(*args, **kwargs) :
+      return freeze(getattr(mod, inName)(*args, **kwargs))
+    setattr(self, inName, retVal)
+    return retVal
+
+  def __dir__(self) :
+    return [ name for name in dir(self.__module) if not name.startswith('_') ]
+
+
+float4 = pfFrozenModule(pffloat4)
+quaternion = pfFrozenModule(pfquaternion)
+matrix = pfFrozenModule(pfmatrix)
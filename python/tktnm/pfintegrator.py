@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+'''
+多数の姿勢(quaternion)の角速度による積分
+
+N個の姿勢を連続した配列(x,y,z,w の順に N*4)で持ち、角速度(N*3, rad/s)で dt ずつ回す。
+  FRAME_LOCAL : q = q * exp(w dt / 2)
+  FRAME_WORLD : q = exp(w dt / 2) * q
+正規化は毎回ではなく renormalizeInterval 回ごとに行う。
+(exp(w dt / 2)は単位quaternionなので、正規化しない間のずれは丸め誤差の蓄積だけ)
+
+  integ = pfintegrator.pfOrientationIntegrator(orientations, dtype=pfintegrator.FLOAT32)
+  integ.step(velocities, 1.0 / 60.0)
+  qts = integ.Orientations  # array
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import math
+
+from . import pfutil
+
+
+FLOAT32 = pfutil.FLOAT32
+FLOAT64 = pfutil.FLOAT64
+TYPECODES = pfutil.TYPECODES
+
+FRAME_LOCAL = pfutil.FRAME_LOCAL
+FRAME_WORLD = pfutil.FRAME_WORLD
+
+
+def __store(inValues, ioOut, inTypecode) :
+  if ioOut is None : return array.array(inTypecode, inValues)
+  if len(ioOut) != len(inValues) : raise ValueError('out must have %d elements' % (len(inValues),))
+  if isinstance(ioOut, array.array) : ioOut[:] = array.array(ioOut.typecode, inValues)
+  elif isinstance(ioOut, memoryview) : ioOut[:] = array.array(ioOut.format, inValues)
+  else : ioOut[:] = inValues
+  return ioOut
+
+def integrate(inQts, inVelocities, inDeltaTime, out=None, frame=FRAME_LOCAL, normalize=False, dtype=FLOAT64) :
+  '''
+  integrate(qts(N*4), velocities(N*3), dt, out, frame, normalize, dtype) -> qts(N*4)
+  qts, velocities : 連続した配列(array, memoryview, list)
+  out : 結果を書く配列(qtsと同じものでもよい)。Noneならdtypeのarrayを作る
+  '''
+  if len(inVelocities) * 4 != len(inQts) * 3 : raise ValueError('velocities must have 3 values per quaternion')
+  if frame not in ( FRAME_LOCAL, FRAME_WORLD ) : raise ValueError('unknown frame %r' % (frame,))
+  local = frame == FRAME_LOCAL
+  sqrt = math.sqrt
+  sin = math.sin
+  cos = math.cos
+  h = 0.5 * inDeltaTime
+  qs = inQts.tolist() if hasattr(inQts, 'tolist') else list(inQts)
+  vs = inVelocities.tolist() if hasattr(inVelocities, 'tolist') else inVelocities
+  res = [ 0.0 ] * len(qs)
+  for idx in range(len(qs) // 4) :
+    ofs = idx * 4
+    ( X, Y, Z, W ) = qs[ofs:ofs+4]
+    vo = idx * 3
+    ( vx, vy, vz ) = ( vs[vo] * h, vs[vo+1] * h, vs[vo+2] * h )
+    th = sqrt(vx*vx + vy*vy + vz*vz)
+    if th > 1.0e-8 :
+      s = sin(th) / th
+      w = cos(th)
+    else :
+      # sin(th)/th, cos(th) のテイラー展開
+      s = 1.0 - th * th / 6.0
+      w = 1.0 - th * th * 0.5
+    ( x, y, z ) = ( vx * s, vy * s, vz * s )
+    if not local :
+      ( X, Y, Z, W, x, y, z, w ) = ( x, y, z, w, X, Y, Z, W )
+    qx = W*x + X*w + Y*z - Z*y
+    qy = W*y + Y*w + Z*x - X*z
+    qz = W*z + Z*w + X*y - Y*x
+    qw = W*w - X*x - Y*y - Z*z
+    if normalize :
+      # pfOrientationIntegrator.normalizeと同じく、長さ0ならidentity
+      ln = sqrt(qx*qx + qy*qy + qz*qz + qw*qw)
+      if ln < 1.0e-10 : ( qx, qy, qz, qw ) = ( 0.0, 0.0, 0.0, 1.0 )
+      else :
+        r = 1.0 / ln
+        ( qx, qy, qz, qw ) = ( qx * r, qy * r, qz * r, qw * r )
+    res[ofs] = qx
+    res[ofs+1] = qy
+    res[ofs+2] = qz
+    res[ofs+3] = qw
+  return __store(res, out, TYPECODES[dtype])
+
+
+class pfOrientationIntegrator(object) :
+  '''
+  N個の姿勢を保持して積分するクラス
+  '''
+  # 姿勢 array(N*4)
+  __qts = None
+  __frame = FRAME_LOCAL
+  __interval = 16
+  __steps = 0
+  @property
+  def Orientations(self) :
+    '''
+    Orientations : array(N*4). 姿勢。stepで書き換わる
+    '''
+    return self.__qts
+  @property
+  def Count(self) :
+    '''
+    Count : int. 姿勢の数
+    '''
+    return len(self.__qts) // 4
+  @property
+  def StepCount(self) :
+    '''
+    StepCount : int. stepした回数
+    '''
+    return self.__steps
+  @property
+  def RenormalizeInterval(self) :
+    '''
+    RenormalizeInterval : int. 正規化する間隔(step数)
+    '''
+    return self.__interval
+
+  def __init__(self, inQts, dtype=FLOAT64, frame=FRAME_LOCAL, renormalizeInterval=16) :
+    '''
+    コンストラクタ。inQtsは連続した配列(N*4)、またはintなら単位quaternionをN個
+    '''
+    tc = TYPECODES[dtype]
+    if isinstance(inQts, int) : self.__qts = array.array(tc, [ 0.0, 0.0, 0.0, 1.0 ] * inQts)
+    else : self.__qts = array.array(tc, inQts.tolist() if hasattr(inQts, 'tolist') else inQts)
+    if frame not in ( FRAME_LOCAL, FRAME_WORLD ) : raise ValueError('unknown frame %r' % (frame,))
+    self.__frame = frame
+    self.__interval = max(1, renormalizeInterval)
+
+  def step(self, inVelocities, inDeltaTime) :
+    '''
+    step(velocities(N*3), dt) -> Orientations。Orientationsをそのまま書き換える
+    '''
+    self.__steps += 1
+    normalize = self.__steps % self.__interval == 0
+    return integrate(self.__qts, inVelocities, inDeltaTime, out=self.__qts, frame=self.__frame, normalize=normalize)
+
+  def normalize(self) :
+    '''
+    normalize() : すべての姿勢を正規化する
+    '''
+    qs = self.__qts.tolist()
+    for ofs in range(0, len(qs), 4) :
+      ( x, y, z, w ) = qs[ofs:ofs+4]
+      ln = math.sqrt(x*x + y*y + z*z + w*w)
+      if ln < 1.0e-10 :
+        qs[ofs:ofs+4] = [ 0.0, 0.0, 0.0, 1.0 ]
+        continue
+      r = 1.0 / ln
+      qs[ofs:ofs+4] = [ x * r, y * r, z * r, w * r ]
+    self.__qts[:] = array.array(self.__qts.typecode, qs)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+'''
+キーフレームの削減
+
+ベイクされた密なチャンネルから、補間で復元した値と元の値の誤差が
+許容値以下に収まるキーを取り除く。
+  translate  : 線形補間。誤差は距離
+  euler      : 各成分の線形補間。誤差はpfquaternion.fromEulerでの回転の角度差(degree)
+  quaternion : pfquaternion.slerp または interpLinear。誤差は回転の角度差(degree)
+
+キーiから、誤差が許容値に収まる最も遠いキーjを倍々の探索と二分探索で求める。
+区間の誤差は、区間内の全サンプルの補間をまとめて(quaternionはpfquaternion.slerpBatch)求めて評価する。
+timesは狭義単調増加でなければならない(同じ時刻が続くとValueError)。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+
+from . import pffloat1
+from . import pfquaternion
+
+
+CHANNEL_TRANSLATE = 'translate'
+CHANNEL_EULER = 'euler'
+CHANNEL_QUATERNION = 'quaternion'
+
+INTERP_SLERP = 'slerp'
+INTERP_LINEAR = 'linear'
+
+
+def __angleDegree(inQA, inQB) :
+  dt = abs(inQA[0]*inQB[0] + inQA[1]*inQB[1] + inQA[2]*inQB[2] + inQA[3]*inQB[3])
+  return 2.0 * pffloat1.acosDegree(dt)
+
+def __rates(inTimes, inStart, inEnd) :
+  # 区間内のサンプルの補間の割合
+  t0 = inTimes[inStart]
+  dt = inTimes[inEnd] - t0
+  if not dt > 0.0 : raise ValueError('times must be strictly increasing (times[%d] = %r, times[%d] = %r)' % (inStart, t0, inEnd, inTimes[inEnd]))
+  rDt = 1.0 / dt
+  return [ (inTimes[idx] - t0) * rDt for idx in range(inStart + 1, inEnd) ]
+
+def __translateError(inTimes, inValues, inStart, inEnd) :
+  a = inValues[inStart]
+  b = inValues[inEnd]
+  ( ax, ay, az ) = ( a[0], a[1], a[2] )
+  ( dx, dy, dz ) = ( b[0] - ax, b[1] - ay, b[2] - az )
+  err = 0.0
+  for ( idx, r ) in enumerate(__rates(inTimes, inStart, inEnd), inStart + 1) :
+    v = inValues[idx]
+    ex = ax + dx * r - v[0]
+    ey = ay + dy * r - v[1]
+    ez = az + dz * r - v[2]
+    err = max(err, ex*ex + ey*ey + ez*ez)
+  return math.sqrt(err)
+
+def __eulerError(inTimes, inValues, inQts, inStart, inEnd, inOrder) :
+  a = inValues[inStart]
+  b = inValues[inEnd]
+  ( ax, ay, az ) = ( a[0], a[1], a[2] )
+  ( dx, dy, dz ) = ( b[0] - ax, b[1] - ay, b[2] - az )
+  err = 0.0
+  for ( idx, r ) in enumerate(__rates(inTimes, inStart, inEnd), inStart + 1) :
+    qt = pfquaternion.fromEuler(inOrder, [ ax + dx * r, ay + dy * r, az + dz * r ])
+    err = max(err, __angleDegree(qt, inQts[idx]))
+  return err
+
+def __quaternionError(inTimes, inQts, inStart, inEnd, inInterp) :
+  # 実行時と同じ補間(pfquaternion.slerpBatch, interpLinear)で区間内のサンプルをまとめて求める
+  rates = __rates(inTimes, inStart, inEnd)
+  qa = inQts[inStart]
+  qb = inQts[inEnd]
+  if inInterp == INTERP_SLERP :
+    qts = pfquaternion.slerpBatch([ qa ] * len(rates), [ qb ] * len(rates), rates)
+  elif inInterp == INTERP_LINEAR :
+    interp = pfquaternion.interpLinear
+    qts = [ interp(qa, qb, r) for r in rates ]
+  else :
+    raise ValueError('unknown interp %r' % (inInterp,))
+  err = 0.0
+  for ( idx, qt ) in enumerate(qts, inStart + 1) :
+    err = max(err, __angleDegree(qt, inQts[idx]))
+  return err
+
+def segmentError(inTimes, inValues, inStart, inEnd, channel=CHANNEL_TRANSLATE, order=0, interp=INTERP_SLERP) :
+  '''
+  segmentError(times, values, start, end, channel, order, interp) -> start,endで補間したときの区間内の最大誤差
+  '''
+  if channel == CHANNEL_TRANSLATE :
+    return __translateError(inTimes, inValues, inStart, inEnd)
+  if channel == CHANNEL_EULER :
+    qts = [ None ] * len(inValues)
+    for idx in range(inStart + 1, inEnd) : qts[idx] = pfquaternion.fromEuler(order, inValues[idx])
+    return __eulerError(inTimes, inValues, qts, inStart, inEnd, order)
+  if channel == CHANNEL_QUATERNION :
+    return __quaternionError(inTimes, inValues, inStart, inEnd, interp)
+  raise ValueError('unknown channel %r' % (channel,))
+
+def reduceKeys(inTimes, inValues, inTolerance, channel=CHANNEL_TRANSLATE, order=0, interp=INTERP_SLERP) :
+  '''
+  reduceKeys(times, values, tolerance, channel, order, interp) -> [ 残すキーのindex, ... ]
+  tolerance : translateは距離、euler,quaternionはdegree
+  timesが狭義単調増加でなければValueError
+  '''
+  cnt = len(inValues)
+  if cnt != len(inTimes) : raise ValueError('times and values must have the same length')
+  for idx in range(1, cnt) :
+    if not inTimes[idx] > inTimes[idx-1] : raise ValueError('times must be strictly increasing (times[%d] = %r, times[%d] = %r)' % (idx - 1, inTimes[idx-1], idx, inTimes[idx]))
+  if cnt <= 2 : return list(range(cnt))
+
+  if channel == CHANNEL_TRANSLATE :
+    errFunc = lambda s, e : __translateError(inTimes, inValues, s, e)
+  elif channel == CHANNEL_EULER :
+    qts = [ pfquaternion.fromEuler(order, v) for v in inValues ]
+    errFunc = lambda s, e : __eulerError(inTimes, inValues, qts, s, e, order)
+  elif channel == CHANNEL_QUATERNION :
+    errFunc = lambda s, e : __quaternionError(inTimes, inValues, s, e, interp)
+  else :
+    raise ValueError('unknown channel %r' % (channel,))
+
+  keys = [ 0 ]
+  start = 0
+  last = cnt - 1
+  while start < last :
+    # 倍々に伸ばして、許容値を超える区間を探す
+    good = start + 1
+    bad = None
+    step = 2
+    while True :
+      end = min(start + step, last)
+      if errFunc(start, end) <= inTolerance :
+        good = end
+        if end == last : break
+        step *= 2
+      else :
+        bad = end
+        break
+    # good <= 許容範囲の最遠 < bad
+    while bad is not None and bad - good > 1 :
+      mid = (good + bad) // 2
+      if errFunc(start, mid) <= inTolerance : good = mid
+      else : bad = mid
+    keys.append(good)
+    start = good
+  return keys
+
+def reduce(inTimes, inValues, inTolerance, channel=CHANNEL_TRANSLATE, order=0, interp=INTERP_SLERP) :
+  '''
+  reduce(times, values, tolerance, channel, order, interp) -> ( times, values )
+  '''
+  keys = reduceKeys(inTimes, inValues, inTolerance, channel, order, interp)
+  return ( [ inTimes[idx] for idx in keys ], [ inValues[idx] for idx in keys ] )
@@ -12,7 +12,6 @@ import math
 from . import pffloat1
 from . import pffloat4
 from . import pfquaternion
-from . import pfvector
 
 
 def getRow(inV, inRowIndex) :
@@ -132,6 +131,33 @@ def compose(translate=None, quaternion=None, shear=None, scale=None) :
     mtx = multiply(mtx, fromShearScale(shr, scl))
   return mtx
 
+def composeBatch(inTranslates, inQuaternions, inShears, inScales) :
+  '''
+  composeBatch([translate, ...], [quaternion, ...], [shear, ...], [scale, ...]) : [mtx, ...]
+  '''
+  # composeと同じ値(0の符号を除く)。行列の積を展開して、0との積を省いたもの
+  # |Sx    0    0| |X|
+  # |HxSy Sy    0| |Y|
+  # |HySz HzSz Sz| |Z|
+  retVal = []
+  for ( t, q, h, s ) in zip(inTranslates, inQuaternions, inShears, inScales) :
+    ( x, y, z, w ) = ( q[0], q[1], q[2], q[3] )
+    ( xa, xb, xc ) = ( 1.0 - 2.0 * (y*y + z*z), 2.0 * (x*y + z*w), 2.0 * (z*x - y*w) )
+    ( ya, yb, yc ) = ( 2.0 * (x*y - z*w), 1.0 - 2.0 * (x*x + z*z), 2.0 * (y*z + x*w) )
+    ( za, zb, zc ) = ( 2.0 * (x*z + y*w), 2.0 * (y*z - x*w), 1.0 - 2.0 * (x*x + y*y) )
+    sx = s[0]
+    hxsy = h[0] * s[1]
+    sy = s[1]
+    hysz = h[1] * s[2]
+    hzsz = h[2] * s[2]
+    sz = s[2]
+    retVal.append([
+      sx*xa, sx*xb, sx*xc, 0.0,
+      hxsy*xa + sy*ya, hxsy*xb + sy*yb, hxsy*xc + sy*yc, 0.0,
+      hysz*xa + hzsz*ya + sz*za, hysz*xb + hzsz*yb + sz*zb, hysz*xc + hzsz*yc + sz*zc, 0.0,
+      t[0], t[1], t[2], 1.0 ])
+  return retVal
+
 def decompose(inV) :
   '''
   decompose(mtx) : ( translate, quaternion, shear, scale )
@@ -142,6 +168,45 @@ def decompose(inV) :
   trn = toTranslate(mtxQtTrn)
   return ( trn, qt, shr, scl )
 
+def decomposeBatch(inMtxs) :
+  '''
+  decomposeBatch([mtx, ...]) : ( [translate, ...], [quaternion, ...], [shear, ...], [scale, ...] )
+  '''
+  # decomposeと同じ値(ビット単位で一致)。multiply(mtx, inverseFromShearScale(shr, scl))を展開したもの
+  ( shrs, scls ) = toShearScaleBatch(inMtxs)
+  trns = []
+  qts = []
+  for ( m, shr, scl ) in zip(inMtxs, shrs, scls) :
+    i0 = 1.0 / scl[0]
+    i5 = 1.0 / scl[1]
+    i10 = 1.0 / scl[2]
+    hx = shr[0] * -1.0
+    hz = shr[2] * -1.0
+    hy = hx * hz + shr[1] * -1.0
+    i4 = hx * i0
+    i8 = hy * i0
+    i9 = hz * i5
+    mtxQtTrn = [
+      i0*m[0] + 0.0*m[4] + 0.0*m[8] + 0.0*m[12],
+      i0*m[1] + 0.0*m[5] + 0.0*m[9] + 0.0*m[13],
+      i0*m[2] + 0.0*m[6] + 0.0*m[10] + 0.0*m[14],
+      i0*m[3] + 0.0*m[7] + 0.0*m[11] + 0.0*m[15],
+      i4*m[0] + i5*m[4] + 0.0*m[8] + 0.0*m[12],
+      i4*m[1] + i5*m[5] + 0.0*m[9] + 0.0*m[13],
+      i4*m[2] + i5*m[6] + 0.0*m[10] + 0.0*m[14],
+      i4*m[3] + i5*m[7] + 0.0*m[11] + 0.0*m[15],
+      i8*m[0] + i9*m[4] + i10*m[8] + 0.0*m[12],
+      i8*m[1] + i9*m[5] + i10*m[9] + 0.0*m[13],
+      i8*m[2] + i9*m[6] + i10*m[10] + 0.0*m[14],
+      i8*m[3] + i9*m[7] + i10*m[11] + 0.0*m[15],
+      0.0*m[0] + 0.0*m[4] + 0.0*m[8] + 1.0*m[12],
+      0.0*m[1] + 0.0*m[5] + 0.0*m[9] + 1.0*m[13],
+      0.0*m[2] + 0.0*m[6] + 0.0*m[10] + 1.0*m[14],
+      0.0*m[3] + 0.0*m[7] + 0.0*m[11] + 1.0*m[15] ]
+    qts.append(toQuaternion(mtxQtTrn))
+    trns.append([ mtxQtTrn[12], mtxQtTrn[13], mtxQtTrn[14], 0.0 ])
+  return ( trns, qts, shrs, scls )
+
 def inverseTransform(inV) :
   '''
   inverseTransform(mtx) : mtx^-1
@@ -418,6 +483,42 @@ def toShearScale(inMtx) :
 
   return ( pffloat4.setXYZ(shrXY, shrXZ, shrYZ), pffloat4.setXYZ(sclX, sclY, sclZ) )
 
+def toShearScaleBatch(inMtxs) :
+  '''
+  toShearScaleBatch([mtx, ...]) : ( [shear, ...], [scale, ...] )
+  '''
+  # toShearScaleと同じ式・同じ演算順(結果はビット単位で一致)を、関数呼び出しとlistの生成を省いて展開したもの
+  # dot3は最後に+0.0を足すので、-0.0は0.0になる。sqrtClampのmax(v, 0.0)は-0.0とnanをそのまま返す
+  sqrt = math.sqrt
+  shears = []
+  scales = []
+  for m in inMtxs :
+    ( xa, xb, xc ) = ( m[0], m[1], m[2] )
+    ( ya, yb, yc ) = ( m[4], m[5], m[6] )
+    ( za, zb, zc ) = ( m[8], m[9], m[10] )
+    sqrX = xa*xa + xb*xb + xc*xc + 0.0
+    sclX = sqrt(0.0 if sqrX < 0.0 else sqrX)
+    if (xb*yc - yb*xc)*za + (xc*ya - yc*xa)*zb + (xa*yb - ya*xb)*zc + 0.0 < 0.0 : sclX = -sclX
+
+    sqrY = ya*ya + yb*yb + yc*yc + 0.0
+    dtXY = xa*ya + xb*yb + xc*yc + 0.0
+    v = sqrY - (dtXY*dtXY/sqrX)
+    sclY = sqrt(0.0 if v < 0.0 else v)
+    shrXY = dtXY / (sclX*sclY)
+
+    sqrZ = za*za + zb*zb + zc*zc + 0.0
+    dtXZ = xa*za + xb*zb + xc*zc + 0.0
+    dtYZ = ya*za + yb*zb + yc*zc + 0.0
+    shrYZ = (sclX*dtYZ - shrXY*sclY*dtXZ) / (sclX*sclY)
+    v = sqrZ - (dtXZ*dtXZ)/sqrX - shrYZ*shrYZ
+    sclZ = sqrt(0.0 if v < 0.0 else v)
+    shrXZ = dtXZ/(sclX*sclZ)
+    shrYZ = shrYZ/sclZ
+
+    shears.append([ shrXY, shrXZ, shrYZ, 0.0 ])
+    scales.append([ sclX, sclY, sclZ, 0.0 ])
+  return ( shears, scales )
+
 def toTranslate(inMtx) :
   '''
   toTranslate(mtx) : translate
@@ -437,16 +538,47 @@ def toQuaternion(inM) :
   dpZ = math.fabs(vZ[2])
   if dpX < dpY and dpX < dpZ :
     qt = pfquaternion.fromVector(pffloat4.axisX(), vX)
-    vTmp = pfvector.toLocalVectorByQuaternion(vY, qt)
+    vTmp = pfquaternion.sandwichInverse(qt, pffloat4.setW0(vY))
     qtv = pfquaternion.alignAxisYRotateX(vTmp)
     return pfquaternion.multiply(qt, qtv[0])
   elif dpY < dpZ :
     qt = pfquaternion.fromVector(pffloat4.axisY(), vY)
-    vTmp = pfvector.toLocalVectorByQuaternion(vX, qt)
+    vTmp = pfquaternion.sandwichInverse(qt, pffloat4.setW0(vX))
     qtv = pfquaternion.alignAxisXRotateY(vTmp)
     return pfquaternion.multiply(qt, qtv[0])
   else :
     qt = pfquaternion.fromVector(pffloat4.axisZ(), vZ)
-    vTmp = pfvector.toLocalVectorByQuaternion(vX, qt)
+    vTmp = pfquaternion.sandwichInverse(qt, pffloat4.setW0(vX))
     qtv = pfquaternion.alignAxisXRotateZ(vTmp)
     return pfquaternion.multiply(qt, qtv[0])
+
+
+def blendMatrix(inMtxA, inMtxB, inRateB) :
+  '''
+  blendMatrix(mtxA, mtxB, rateB) : mtx
+  decomposeして、translate, shear, scaleはpffloat4.interp、quaternionはpfquaternion.slerpで補間し、composeする
+  '''
+  ( trnA, qtA, shrA, sclA ) = decompose(inMtxA)
+  ( trnB, qtB, shrB, sclB ) = decompose(inMtxB)
+  rate = pffloat4.splat(inRateB)
+  return compose(pffloat4.interp(trnA, trnB, rate), pfquaternion.slerp(qtA, qtB, inRateB),
+    pffloat4.interp(shrA, shrB, rate), pffloat4.interp(sclA, sclB, rate))
+
+def __interpBatch(inAs, inBs, inRates) :
+  # pffloat4.interpと同じ式
+  return [ [ (r*b[0] + a[0]) - r*a[0], (r*b[1] + a[1]) - r*a[1], (r*b[2] + a[2]) - r*a[2], (r*b[3] + a[3]) - r*a[3] ]
+    for ( a, b, r ) in zip(inAs, inBs, inRates) ]
+
+def blendMatrices(inMtxsA, inMtxsB, inRatesB, decomposedA=None, decomposedB=None) :
+  '''
+  blendMatrices([mtxA, ...], [mtxB, ...], [rateB, ...], decomposedA, decomposedB) : [mtx, ...]
+  blendMatrixと同じ値(0の符号を除く)
+  decomposedA, decomposedB : decomposeBatchの結果。片方が変化しない場合に使い回す。指定した側のmtxはNoneでよい
+  rateBはfloatでもよい
+  '''
+  ( trnsA, qtsA, shrsA, sclsA ) = decomposedA if decomposedA is not None else decomposeBatch(inMtxsA)
+  ( trnsB, qtsB, shrsB, sclsB ) = decomposedB if decomposedB is not None else decomposeBatch(inMtxsB)
+  rates = inRatesB
+  if isinstance(rates, (int, float)) : rates = [ float(rates) ] * len(qtsA)
+  return composeBatch(__interpBatch(trnsA, trnsB, rates), pfquaternion.slerpBatch(qtsA, qtsB, rates),
+    __interpBatch(shrsA, shrsB, rates), __interpBatch(sclsA, sclsB, rates))
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+'''
+pfquaternion.fromEuler, fromAxisDeg, toEuler, pfmatrix.inverseTransform, decompose, toQuaternionのメモ化
+
+fromEuler, fromAxisDegは回転の順序と量子化した角度をキーにして、計算済みのquaternionを使い回す。
+スナップした角度、ステップキー、待機ポーズなど同じ入力が繰り返される場合に三角関数の計算を省く。
+同じキーになる入力(角度の差が量子化の幅quantum未満)には、最初に計算した結果を返す。
+toEuler, inverseTransform, decompose, toQuaternionは量子化せず、引数の値そのもの(tuple)をキーにする。
+キャッシュにはpffrozen.freezeしたものを入れ、呼び出し側にはlistの複製を返す。
+fromEuler, fromAxisDegは、nan, infを含む入力(量子化できない)ではキャッシュを使わずに元の関数で計算する。
+
+  q = pfmemo.fromEuler(0, [ 0.0, 90.0, 0.0 ])
+  pfmemo.install()    # FUNCTIONSをメモ化版に置き換える(fromAxisDegを使うrotateX,Y,Zも)。pfpatchのlayer
+  pfmemo.uninstall()
+  pfmemo.configure(sizes={ 'decompose' : 256 })
+  pfmemo.stats()      # { 'fromEuler' : { 'hits', 'misses', 'hitRate', 'size', 'maxSize' }, ... }
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import functools
+import math
+
+from . import pffrozen
+from . import pfmatrix
+from . import pfpatch
+from . import pfquaternion
+from . import pfutil
+
+
+DEFAULT_SIZE = 4096
+DEFAULT_QUANTUM = 1.0e-6  # degree
+AXIS_QUANTUM = 1.0e-9
+
+__OWNER = 'pfmemo'  # pfpatchのlayerの所有者
+__eulerCache = pfutil.pfLRUCache(DEFAULT_SIZE)
+__axisDegCache = pfutil.pfLRUCache(DEFAULT_SIZE)
+__toEulerCache = pfutil.pfLRUCache(DEFAULT_SIZE)
+__inverseTransformCache = pfutil.pfLRUCache(DEFAULT_SIZE)
+__decomposeCache = pfutil.pfLRUCache(DEFAULT_SIZE)
+__toQuaternionCache = pfutil.pfLRUCache(DEFAULT_SIZE)
+__rQuantum = 1.0 / DEFAULT_QUANTUM
+
+FUNCTIONS = ( 'fromEuler', 'fromAxisDeg', 'toEuler', 'inverseTransform', 'decompose', 'toQuaternion' )
+
+
+def configure(size=None, quantum=None, sizes=None) :
+  '''
+  configure(size, quantum, sizes) : キャッシュの最大数と角度の量子化の幅(degree)。quantumを変えるとキャッシュをクリア
+  sizes : { name : size }。関数ごとの最大数(sizeより優先)
+  '''
+  global __rQuantum
+  if size is not None :
+    for ( _, cache, _ ) in __functions.values() : cache.MaxSize = size
+  if sizes is not None :
+    for ( name, sz ) in sizes.items() :
+      if name not in __functions : raise KeyError('unknown function %r' % (name,))
+      __functions[name][1].MaxSize = sz
+  if quantum is not None :
+    __rQuantum = 1.0 / quantum
+    clear()
+
+def clear() :
+  '''
+  clear() : キャッシュと集計をクリア
+  '''
+  for ( _, cache, _ ) in __functions.values() : cache.clear()
+
+def stats() :
+  '''
+  stats() -> { 'fromEuler' : {...}, 'fromAxisDeg' : {...}, ... }
+  '''
+  return dict([ ( name, cache.stats() ) for ( name, ( _, cache, _ ) ) in __functions.items() ])
+
+# __memoXxx(compute, 引数...)。computeは元の関数(installした場合は内側のlayer)
+# fromEuler, fromAxisDegは有限でない入力(nan, inf)を量子化できないので、キャッシュを使わずにcomputeを呼ぶ
+def __memoFromEuler(inCompute, inOrd, inEul) :
+  if not math.isfinite(inEul[0] + inEul[1] + inEul[2]) : return inCompute(inOrd, inEul)
+  rq = __rQuantum
+  key = ( inOrd, round(inEul[0] * rq), round(inEul[1] * rq), round(inEul[2] * rq) )
+  qt = __eulerCache.get(key)
+  if qt is None :
+    qt = inCompute(inOrd, inEul)
+    __eulerCache.put(key, tuple(qt))
+    return qt
+  return list(qt)
+
+def __memoFromAxisDeg(inCompute, inAx, inDeg) :
+  if not math.isfinite(inAx[0] + inAx[1] + inAx[2] + inDeg) : return inCompute(inAx, inDeg)
+  ra = 1.0 / AXIS_QUANTUM
+  key = ( round(inAx[0] * ra), round(inAx[1] * ra), round(inAx[2] * ra), round(inDeg * __rQuantum) )
+  qt = __axisDegCache.get(key)
+  if qt is None :
+    qt = inCompute(inAx, inDeg)
+    __axisDegCache.put(key, tuple(qt))
+    return qt
+  return list(qt)
+
+def __cached(inCache, inCompute, inKey, inArgs) :
+  retVal = inCache.get(inKey)
+  if retVal is None :
+    retVal = inCompute(*inArgs)
+    inCache.put(inKey, pffrozen.freeze(retVal))
+    return retVal
+  return pffrozen.thaw(retVal)
+
+def __memoToEuler(inCompute, inOrd, inQ) :
+  return __cached(__toEulerCache, inCompute, ( inOrd, ) + tuple(inQ), ( inOrd, inQ ))
+
+def __memoInverseTransform(inCompute, inMtx) :
+  return __cached(__inverseTransformCache, inCompute, tuple(inMtx), ( inMtx, ))
+
+def __memoDecompose(inCompute, inMtx) :
+  return __cached(__decomposeCache, inCompute, tuple(inMtx), ( inMtx, ))
+
+def __memoToQuaternion(inCompute, inMtx) :
+  return __cached(__toQuaternionCache, inCompute, tuple(inMtx), ( inMtx, ))
+
+# name -> ( module, キャッシュ, メモ化の関数 )
+__functions = {
+  'fromEuler' : ( pfquaternion, __eulerCache, __memoFromEuler ),
+  'fromAxisDeg' : ( pfquaternion, __axisDegCache, __memoFromAxisDeg ),
+  'toEuler' : ( pfquaternion, __toEulerCache, __memoToEuler ),
+  'inverseTransform' : ( pfmatrix, __inverseTransformCache, __memoInverseTransform ),
+  'decompose' : ( pfmatrix, __decomposeCache, __memoDecompose ),
+  'toQuaternion' : ( pfmatrix, __toQuaternionCache, __memoToQuaternion ),
+}
+
+def fromEuler(inOrd, inEul) :
+  '''
+  fromEuler(int, [degX,degY,degZ]) -> quaternion。pfquaternion.fromEulerのメモ化版
+  '''
+  return __memoFromEuler(pfpatch.original(pfquaternion, 'fromEuler'), inOrd, inEul)
+
+def fromAxisDeg(inAx, inDeg) :
+  '''
+  fromAxisDeg(ax,deg) -> quaternion。pfquaternion.fromAxisDegのメモ化版
+  '''
+  return __memoFromAxisDeg(pfpatch.original(pfquaternion, 'fromAxisDeg'), inAx, inDeg)
+
+def toEuler(inOrd, inQ) :
+  '''
+  toEuler(order, quaternion) -> euler。pfquaternion.toEulerのメモ化版
+  '''
+  return __memoToEuler(pfpatch.original(pfquaternion, 'toEuler'), inOrd, inQ)
+
+def inverseTransform(inMtx) :
+  '''
+  inverseTransform(mtx) -> mtx^-1。pfmatrix.inverseTransformのメモ化版
+  '''
+  return __memoInverseTransform(pfpatch.original(pfmatrix, 'inverseTransform'), inMtx)
+
+def decompose(inMtx) :
+  '''
+  decompose(mtx) -> ( translate, quaternion, shear, scale )。pfmatrix.decomposeのメモ化版
+  '''
+  return __memoDecompose(pfpatch.original(pfmatrix, 'decompose'), inMtx)
+
+def toQuaternion(inMtx) :
+  '''
+  toQuaternion(mtx) -> quaternion。pfmatrix.toQuaternionのメモ化版
+  '''
+  return __memoToQuaternion(pfpatch.original(pfmatrix, 'toQuaternion'), inMtx)
+
+def __layer(inMemo) :
+  def factory(inInner) :
+    @functools.wraps(inInner)
+    def wrapper(*args) :
+      return inMemo(inInner, *args)
+    return wrapper
+  return factory
+
+def isInstalled() :
+  '''
+  isInstalled() -> bool
+  '''
+  return len(pfpatch.installed(__OWNER)) > 0
+
+def install(names=FUNCTIONS) :
+  '''
+  install(names) : namesの関数にメモ化のpfpatchのlayerを重ねる
+  '''
+  for name in names :
+    if name not in __functions : raise KeyError('unknown function %r' % (name,))
+  for name in names :
+    ( mod, _, memo ) = __functions[name]
+    pfpatch.push(__OWNER, mod, name, __layer(memo))
+
+def uninstall() :
+  '''
+  uninstall() : メモ化のlayerを外す
+  '''
+  pfpatch.popAll(__OWNER)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+'''
+メッシュの法線と接空間
+
+頂点の位置 [ [x,y,z,_], ... ] と三角形の頂点番号 [ ( i0, i1, i2 ), ... ] から
+  面の法線     : normal3(cross3(p1 - p0, p2 - p0))
+  頂点の法線   : 頂点を含む面の cross3(p1 - p0, p2 - p0) (長さが面積の2倍)の合計をnormal3
+  接線, 従法線 : UVの u, v の方向(E. Lengyel の方法)を法線に直交させたもの。
+                 接線のwは従法線の向き(1.0 or -1.0)で、従法線 = cross3(法線, 接線) * w
+を三角形を1回たどって求める。各値はpffloat4.cross3, normal3と同じ値(ビット単位で一致)。
+長さの2乗が 1.0e-14 未満(面積0の面、どの面にも使われていない頂点)の法線はerr。
+errの既定値DEGENERATE_NORMALは他の法線と同じ4成分の [1,0,0,0] で、pffloat4.normal3の既定値 [1,0,0] とは異なる。
+接線が求まらない(UVが縮退している)頂点は法線に直交する適当な方向。
+
+変形のたびに計算しなおす場合は、UVから決まる部分を先に計算しておくpfMeshを使う。
+  mesh = pfmesh.pfMesh(triangles, uvs)
+  ( faceNrms, nrms, tans, bins ) = mesh.frames(positions)
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+
+
+DEGENERATE_NORMAL = [ 1.0, 0.0, 0.0, 0.0 ]
+DEGENERATE_LENGTH = 1.0e-14  # pffloat4.normal3と同じ
+
+
+def __unit(inX, inY, inZ, inErr) :
+  # pffloat4.normal3
+  dt = inX*inX + inY*inY + inZ*inZ
+  if dt < DEGENERATE_LENGTH : return list(inErr)
+  s = 1.0 / math.sqrt(dt)
+  return [ inX*s, inY*s, inZ*s, 0.0 ]
+
+def uvFactors(inUVs, inTriangles) :
+  '''
+  uvFactors([ [u,v], ... ], [ ( i0, i1, i2 ), ... ]) -> [ ( du1, dv1, du2, dv2 ) / det or None, ... ]。三角形ごとの接線の係数
+  '''
+  retVal = []
+  for ( i0, i1, i2 ) in inTriangles :
+    ( u0, v0 ) = ( inUVs[i0][0], inUVs[i0][1] )
+    du1 = inUVs[i1][0] - u0
+    dv1 = inUVs[i1][1] - v0
+    du2 = inUVs[i2][0] - u0
+    dv2 = inUVs[i2][1] - v0
+    det = du1 * dv2 - du2 * dv1
+    if math.fabs(det) < DEGENERATE_LENGTH :
+      retVal.append(None)
+      continue
+    r = 1.0 / det
+    retVal.append(( du1 * r, dv1 * r, du2 * r, dv2 * r ))
+  return retVal
+
+def framesWithFactors(inPositions, inTriangles, inFactors, err=DEGENERATE_NORMAL) :
+  '''
+  framesWithFactors(positions, triangles, uvFactors or None, err) -> ( [faceNormal, ...], [normal, ...], [tangent, ...], [binormal, ...] )
+  '''
+  count = len(inPositions)
+  unit = __unit
+  # 頂点ごとの合計 x,y,z を続けて持つ
+  nAcc = [ 0.0 ] * (count * 3)
+  tAcc = [ 0.0 ] * (count * 3) if inFactors is not None else None
+  bAcc = [ 0.0 ] * (count * 3) if inFactors is not None else None
+  faceNrms = []
+  for ( idx, ( i0, i1, i2 ) ) in enumerate(inTriangles) :
+    p0 = inPositions[i0]
+    p1 = inPositions[i1]
+    p2 = inPositions[i2]
+    ( ax, ay, az ) = ( p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2] )
+    ( bx, by, bz ) = ( p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2] )
+    # pffloat4.cross3
+    cx = ay*bz - by*az
+    cy = az*bx - bz*ax
+    cz = ax*by - bx*ay
+    faceNrms.append(unit(cx, cy, cz, err))
+    for i in ( i0 * 3, i1 * 3, i2 * 3 ) :
+      nAcc[i] += cx
+      nAcc[i+1] += cy
+      nAcc[i+2] += cz
+    if inFactors is None : continue
+    f = inFactors[idx]
+    if f is None : continue
+    ( du1, dv1, du2, dv2 ) = f
+    ( sx, sy, sz ) = ( ax*dv2 - bx*dv1, ay*dv2 - by*dv1, az*dv2 - bz*dv1 )
+    ( tx, ty, tz ) = ( bx*du1 - ax*du2, by*du1 - ay*du2, bz*du1 - az*du2 )
+    for i in ( i0 * 3, i1 * 3, i2 * 3 ) :
+      tAcc[i] += sx
+      tAcc[i+1] += sy
+      tAcc[i+2] += sz
+      bAcc[i] += tx
+      bAcc[i+1] += ty
+      bAcc[i+2] += tz
+  nrms = [ unit(nAcc[i], nAcc[i+1], nAcc[i+2], err) for i in range(0, count * 3, 3) ]
+  if inFactors is None : return ( faceNrms, nrms, None, None )
+  tans = []
+  bins = []
+  fabs = math.fabs
+  for ( vi, n ) in enumerate(nrms) :
+    ( nx, ny, nz ) = ( n[0], n[1], n[2] )
+    i = vi * 3
+    ( sx, sy, sz ) = ( tAcc[i], tAcc[i+1], tAcc[i+2] )
+    # グラム・シュミットで法線に直交させる
+    d = nx*sx + ny*sy + nz*sz
+    t = unit(sx - nx*d, sy - ny*d, sz - nz*d, ( 0.0, 0.0, 0.0, 0.0 ))
+    if t[0] == 0.0 and t[1] == 0.0 and t[2] == 0.0 :
+      # 法線と最も平行でない軸を直交させる
+      if fabs(nx) <= fabs(ny) and fabs(nx) <= fabs(nz) : ( sx, sy, sz ) = ( 1.0, 0.0, 0.0 )
+      elif fabs(ny) <= fabs(nz) : ( sx, sy, sz ) = ( 0.0, 1.0, 0.0 )
+      else : ( sx, sy, sz ) = ( 0.0, 0.0, 1.0 )
+      d = nx*sx + ny*sy + nz*sz
+      t = unit(sx - nx*d, sy - ny*d, sz - nz*d, ( 1.0, 0.0, 0.0, 0.0 ))
+    ( tx, ty, tz ) = ( t[0], t[1], t[2] )
+    bx = ny*tz - nz*ty
+    by = nz*tx - nx*tz
+    bz = nx*ty - ny*tx
+    w = -1.0 if bx*bAcc[i] + by*bAcc[i+1] + bz*bAcc[i+2] < 0.0 else 1.0
+    t[3] = w
+    tans.append(t)
+    bins.append([ bx*w, by*w, bz*w, 0.0 ])
+  return ( faceNrms, nrms, tans, bins )
+
+def faceNormals(inPositions, inTriangles, err=DEGENERATE_NORMAL) :
+  '''
+  faceNormals([ [x,y,z,_], ... ], [ ( i0, i1, i2 ), ... ], err) -> [ [x,y,z,0], ... ]。三角形ごと
+  '''
+  unit = __unit
+  retVal = []
+  for ( i0, i1, i2 ) in inTriangles :
+    p0 = inPositions[i0]
+    p1 = inPositions[i1]
+    p2 = inPositions[i2]
+    ( ax, ay, az ) = ( p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2] )
+    ( bx, by, bz ) = ( p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2] )
+    retVal.append(unit(ay*bz - by*az, az*bx - bz*ax, ax*by - bx*ay, err))
+  return retVal
+
+def vertexNormals(inPositions, inTriangles, err=DEGENERATE_NORMAL) :
+  '''
+  vertexNormals([ [x,y,z,_], ... ], [ ( i0, i1, i2 ), ... ], err) -> [ [x,y,z,0], ... ]。面積で重み付けした頂点ごとの法線
+  '''
+  return framesWithFactors(inPositions, inTriangles, None, err)[1]
+
+def tangentFrames(inPositions, inUVs, inTriangles, err=DEGENERATE_NORMAL) :
+  '''
+  tangentFrames(positions, [ [u,v], ... ], triangles, err) -> ( [normal, ...], [tangent, ...], [binormal, ...] )
+  tangent : [x,y,z,w]。wは従法線の向き(1.0 or -1.0)
+  '''
+  ( _, nrms, tans, bins ) = framesWithFactors(inPositions, inTriangles, uvFactors(inUVs, inTriangles), err)
+  return ( nrms, tans, bins )
+
+def frames(inPositions, inTriangles, uvs=None, err=DEGENERATE_NORMAL) :
+  '''
+  frames(positions, triangles, uvs, err) -> ( [faceNormal, ...], [normal, ...], [tangent, ...], [binormal, ...] )
+  uvs=Noneなら接線, 従法線はNone
+  '''
+  factors = uvFactors(uvs, inTriangles) if uvs is not None else None
+  return framesWithFactors(inPositions, inTriangles, factors, err)
+
+
+class pfMesh(object) :
+  '''
+  頂点の位置だけが変わるメッシュ。三角形とUVから決まる部分を保持する
+  '''
+  __triangles = None
+  __factors = None
+  __err = DEGENERATE_NORMAL
+  @property
+  def Triangles(self) :
+    '''
+    Triangles : [ ( i0, i1, i2 ), ... ]. 三角形の頂点番号
+    '''
+    return self.__triangles
+  @property
+  def HasUVs(self) :
+    '''
+    HasUVs : bool. 接線を求めるか
+    '''
+    return self.__factors is not None
+
+  def __init__(self, inTriangles, uvs=None, err=DEGENERATE_NORMAL) :
+    '''
+    コンストラクタ
+    '''
+    self.__triangles = [ tuple(tri) for tri in inTriangles ]
+    self.__factors = uvFactors(uvs, self.__triangles) if uvs is not None else None
+    self.__err = err
+
+  def frames(self, inPositions) :
+    '''
+    frames(positions) -> ( [faceNormal, ...], [normal, ...], [tangent, ...] or None, [binormal, ...] or None )
+    '''
+    return framesWithFactors(inPositions, self.__triangles, self.__factors, self.__err)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+'''
+プロセス並列での一括評価
+
+入力をfloat64でshared memoryに書き、ProcessPoolExecutorの各プロセスが
+担当する範囲を評価して、結果を出力用のshared memoryに書く。
+listのpickleを経由しないので、要素数が多くても転送の負荷が小さい。
+各要素は直列の場合と同じ関数で評価するので、結果はビット単位で一致する。
+
+  with pfparallel.pfParallelExecutor() as ex :
+    results = ex.evaluate('pfmatrix.decompose', mtxs)
+    eulers = ex.evaluate('pfquaternion.toEuler', qts, args=( 0, ))
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import concurrent.futures
+import importlib
+import os
+from multiprocessing import shared_memory
+
+
+# 'module.function' : ( ( 入力の幅, ... ), ( 出力の幅, ... ) )
+# 出力が1つなら結果はlist、複数ならtuple
+OPERATIONS = {
+  'pfmatrix.compose' : ( ( 4, 4, 4, 4 ), ( 16, ) ),
+  'pfmatrix.decompose' : ( ( 16, ), ( 4, 4, 4, 4 ) ),
+  'pfmatrix.inverseTransform' : ( ( 16, ), ( 16, ) ),
+  'pfmatrix.multiply' : ( ( 16, 16 ), ( 16, ) ),
+  'pfmatrix.toQuaternion' : ( ( 16, ), ( 4, ) ),
+  'pfmatrix.toShearScale' : ( ( 16, ), ( 4, 4 ) ),
+  'pfquaternion.fromEuler' : ( ( 3, ), ( 4, ) ),
+  'pfquaternion.toEuler' : ( ( 4, ), ( 4, ) ),
+  'pfquaternion.multiply' : ( ( 4, 4 ), ( 4, ) ),
+  'pfvector.toWorldPositionByMatrix' : ( ( 4, 16 ), ( 4, ) ),
+}
+
+MIN_CHUNK = 256
+
+
+def __resolve(inName) :
+  ( modName, funcName ) = inName.split('.')
+  return getattr(importlib.import_module('.' + modName, __package__), funcName)
+
+def __evaluateRange(inName, inArgs, inSrc, inDst, inStart, inEnd) :
+  # inSrc, inDst : memoryview('d')。inStart..inEndの要素を評価して書く
+  ( inWidths, outWidths ) = OPERATIONS[inName]
+  func = __resolve(inName)
+  inW = sum(inWidths)
+  outW = sum(outWidths)
+  vals = inSrc[inStart*inW:inEnd*inW].tolist()
+  out = array.array('d')
+  for ofs in range(0, len(vals), inW) :
+    args = []
+    for w in inWidths :
+      args.append(vals[ofs:ofs+w])
+      ofs += w
+    res = func(*inArgs, *args)
+    if len(outWidths) == 1 :
+      out.extend(res[:outWidths[0]])
+    else :
+      for ( r, w ) in zip(res, outWidths) : out.extend(r[:w])
+  inDst[inStart*outW:inEnd*outW] = out
+
+def evaluateChunk(inName, inArgs, inSrcName, inDstName, inStart, inEnd) :
+  '''
+  evaluateChunk(name, args, srcShmName, dstShmName, start, end) -> 評価した要素数。worker側の処理
+  '''
+  # resource_trackerは作成したプロセスと共有なので、破棄は作成したプロセスに任せる
+  shmSrc = shared_memory.SharedMemory(name=inSrcName)
+  shmDst = shared_memory.SharedMemory(name=inDstName)
+  src = shmSrc.buf.cast('d')
+  dst = shmDst.buf.cast('d')
+  try :
+    __evaluateRange(inName, inArgs, src, dst, inStart, inEnd)
+  finally :
+    src.release()
+    dst.release()
+    shmSrc.close()
+    shmDst.close()
+  return inEnd - inStart
+
+def __extend(ioArr, inValue, inWidth, inIdx) :
+  n = len(inValue)
+  if n >= inWidth : ioArr.extend(inValue[:inWidth])
+  elif n == 3 and inWidth == 4 :
+    # [x,y,z]は[x,y,z,0]として渡す(pffloat4の関数は3要素のvectorも受け付ける)
+    ioArr.extend(inValue)
+    ioArr.append(0.0)
+  else :
+    raise ValueError('input %d has %d values, expected %d' % (inIdx, n, inWidth))
+
+def flattenInputs(inName, inInputs) :
+  '''
+  flattenInputs(name, inputs) -> array('d')。3要素の入力は幅4ならw=0.0を補う。それ以外で短い入力はValueError
+  '''
+  ( inWidths, outWidths ) = OPERATIONS[inName]
+  arr = array.array('d')
+  if len(inWidths) == 1 :
+    w = inWidths[0]
+    for ( idx, v ) in enumerate(inInputs) : __extend(arr, v, w, idx)
+  else :
+    for ( idx, args ) in enumerate(inInputs) :
+      if len(args) != len(inWidths) : raise ValueError('input %d has %d arguments, expected %d' % (idx, len(args), len(inWidths)))
+      for ( v, w ) in zip(args, inWidths) : __extend(arr, v, w, idx)
+  return arr
+
+def unflattenOutputs(inName, inValues, inCount) :
+  '''
+  unflattenOutputs(name, [float, ...], count) -> [ result, ... ]
+  '''
+  ( inWidths, outWidths ) = OPERATIONS[inName]
+  outW = sum(outWidths)
+  if len(outWidths) == 1 :
+    return [ inValues[idx*outW:idx*outW+outW] for idx in range(inCount) ]
+  retVal = []
+  for idx in range(inCount) :
+    ofs = idx * outW
+    res = []
+    for w in outWidths :
+      res.append(inValues[ofs:ofs+w])
+      ofs += w
+    retVal.append(tuple(res))
+  return retVal
+
+def evaluateSerial(inName, inInputs, args=()) :
+  '''
+  evaluateSerial(name, inputs, args) -> [ result, ... ]。並列にしない場合の結果
+  inputs : 入力が1つの関数は[ value, ... ]、複数の関数は[ ( value, ... ), ... ]
+  '''
+  ( inWidths, outWidths ) = OPERATIONS[inName]
+  func = __resolve(inName)
+  if len(inWidths) == 1 : return [ func(*args, v) for v in inInputs ]
+  return [ func(*args, *v) for v in inInputs ]
+
+def chunkSize(inCount, inWorkers) :
+  '''
+  chunkSize(count, workers) -> 1回に渡す要素数。プロセスあたり4回程度に分ける
+  '''
+  return max(MIN_CHUNK, -(-inCount // (inWorkers * 4)))
+
+
+class pfParallelExecutor(object) :
+  '''
+  プロセス並列で評価するクラス
+  '''
+  __workers = 1
+  __pool = None
+  @property
+  def Workers(self) :
+    '''
+    Workers : int. プロセス数
+    '''
+    return self.__workers
+
+  def __init__(self, workers=None) :
+    '''
+    コンストラクタ。workers=Noneならos.cpu_count()
+    '''
+    self.__workers = max(1, workers or os.cpu_count() or 1)
+
+  def __enter__(self) :
+    return self
+
+  def __exit__(self, *args) :
+    self.close()
+
+  def close(self) :
+    '''
+    close() : プロセスを終了する
+    '''
+    if self.__pool is not None : self.__pool.shutdown()
+    self.__pool = None
+
+  def evaluate(self, inName, inInputs, args=(), chunk=None) :
+    '''
+    evaluate(name, inputs, args, chunk) -> [ result, ... ]。evaluateSerialと同じ結果
+    '''
+    if inName not in OPERATIONS : raise KeyError('unsupported operation %r' % (inName,))
+    count = len(inInputs)
+    if chunk is None : chunk = chunkSize(count, self.__workers)
+    if self.__workers == 1 or count <= chunk :
+      return evaluateSerial(inName, inInputs, args)
+
+    ( inWidths, outWidths ) = OPERATIONS[inName]
+    src = flattenInputs(inName, inInputs)
+    shmSrc = shared_memory.SharedMemory(create=True, size=max(len(src) * 8, 8))
+    shmDst = shared_memory.SharedMemory(create=True, size=max(count * sum(outWidths) * 8, 8))
+    try :
+      shmSrc.buf[:len(src) * 8] = memoryview(src).cast('B')
+      if self.__pool is None :
+        self.__pool = concurrent.futures.ProcessPoolExecutor(self.__workers)
+      futures = [ self.__pool.submit(evaluateChunk, inName, tuple(args), shmSrc.name, shmDst.name,
+        start, min(start + chunk, count)) for start in range(0, count, chunk) ]
+      for f in futures : f.result()
+      dst = shmDst.buf.cast('d')
+      values = dst[:count * sum(outWidths)].tolist()
+      dst.release()
+    finally :
+      shmSrc.close()
+      shmSrc.unlink()
+      shmDst.close()
+      shmDst.unlink()
+    return unflattenOutputs(inName, values, count)
+
+
+def evaluate(inName, inInputs, args=(), workers=None) :
+  '''
+  evaluate(name, inputs, args, workers) -> [ result, ... ]。一時的なpfParallelExecutorで評価
+  '''
+  with pfParallelExecutor(workers) as ex :
+    return ex.evaluate(inName, inInputs, args)
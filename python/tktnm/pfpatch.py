@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+'''
+モジュールの関数の置き換えを重ねる仕組み
+
+pfprecision, pfmemo, pfvalidate, pfprofileはどれもモジュールの関数を置き換える。
+それぞれが直接setattrすると、有効にした順と逆の順で無効にしない限り他の置き換えを消してしまう。
+ここでは関数ごとに元の関数と置き換え(layer)の一覧を持ち、追加・削除のたびに
+元の関数にlayerを ORDER の順(先が内側)に重ねた関数を作りなおしてsetattrする。
+各layerは factory(inner) -> function で、innerは内側の関数。
+layerがなくなると元の関数に戻る。無効の間は元の関数そのものが呼ばれるので負荷はない。
+pfpatchを通さずに置き換えられていた場合は、その関数を新しい元の関数とみなす。
+
+  pfpatch.push('pfprofile', pfmatrix, 'multiply', lambda inner : wrapper(inner))
+  pfpatch.popAll('pfprofile')
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import importlib
+import inspect
+
+
+# layerを重ねる順(先が内側)。ここにない所有者はその外側に追加した順
+ORDER = ( 'pfprecision', 'pfmemo', 'pfvalidate', 'pfprofile' )
+
+# ( module名, 関数名 ) -> [ module, 元の関数, setattrした関数, { 所有者 : ( 順, factory ) } ]
+__entries = {}
+__serial = [ 0 ]
+
+
+def __rebuild(inKey) :
+  entry = __entries[inKey]
+  ( mod, base, installed, layers ) = entry
+  name = inKey[1]
+  current = getattr(mod, name)
+  if current is not installed : base = current
+  func = base
+  for ( _, factory ) in sorted(layers.values(), key=lambda layer : layer[0]) : func = factory(func)
+  setattr(mod, name, func)
+  if layers :
+    entry[1] = base
+    entry[2] = func
+  else :
+    del __entries[inKey]
+
+def push(inOwner, inModule, inName, inFactory) :
+  '''
+  push(owner, module, name, factory) : layerを追加する。同じ所有者のlayerがあれば置き換える
+  '''
+  key = ( inModule.__name__, inName )
+  entry = __entries.get(key)
+  if entry is None :
+    func = getattr(inModule, inName)
+    entry = __entries[key] = [ inModule, func, func, {} ]
+  layers = entry[3]
+  if inOwner in layers : order = layers[inOwner][0]
+  else :
+    __serial[0] += 1
+    order = ( ORDER.index(inOwner) if inOwner in ORDER else len(ORDER), __serial[0] )
+  layers[inOwner] = ( order, inFactory )
+  __rebuild(key)
+
+def pop(inOwner, inModule, inName) :
+  '''
+  pop(owner, module, name) : layerを削除する。他の所有者のlayerは残る
+  '''
+  key = ( inModule.__name__, inName )
+  entry = __entries.get(key)
+  if entry is None or inOwner not in entry[3] : return
+  del entry[3][inOwner]
+  __rebuild(key)
+
+def popAll(inOwner) :
+  '''
+  popAll(owner) : 所有者のlayerをすべて削除する
+  '''
+  for key in [ key for ( key, entry ) in __entries.items() if inOwner in entry[3] ] :
+    del __entries[key][3][inOwner]
+    __rebuild(key)
+
+def installed(inOwner) :
+  '''
+  installed(owner) -> [ ( module, name ), ... ]。所有者のlayerがある関数
+  '''
+  return [ ( entry[0], key[1] ) for ( key, entry ) in __entries.items() if inOwner in entry[3] ]
+
+def original(inModule, inName) :
+  '''
+  original(module, name) -> function。layerを重ねる前の関数
+  '''
+  entry = __entries.get(( inModule.__name__, inName ))
+  if entry is None : return getattr(inModule, inName)
+  current = getattr(inModule, inName)
+  return entry[1] if current is entry[2] else current
+
+def publicFunctions(inModule) :
+  '''
+  publicFunctions(module) -> [ ( name, function ), ... ]。moduleで定義された公開関数(layerを重ねる前の関数)
+  '''
+  retVal = []
+  for name in list(vars(inModule)) :
+    if name.startswith('_') : continue
+    func = original(inModule, name)
+    if not inspect.isfunction(func) or func.__module__ != inModule.__name__ : continue
+    retVal.append(( name, func ))
+  return retVal
+
+def wrapModules(inOwner, inModNames, inWrap) :
+  '''
+  wrapModules(owner, [ 'pfmatrix', ... ], wrap) : 各moduleの公開関数に wrap(inner, 'module.function') のlayerを追加する
+  '''
+  for modName in inModNames :
+    mod = importlib.import_module('.' + modName, __package__)
+    for ( name, _ ) in publicFunctions(mod) :
+      push(inOwner, mod, name, lambda inner, qualName=modName + '.' + name : inWrap(inner, qualName))
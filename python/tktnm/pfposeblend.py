@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+'''
+K個のポーズのブレンド
+
+ボーンごとの重みでK個のポーズを一度にブレンドする。pfquaternion.slerpを順に重ねる方法と違い、
+結果はポーズの順序によらない。
+  translate, shear, scale : 重みの加重平均
+  quaternion :
+    METHOD_NLERP : 重みが最大のポーズに nearPlusMinus で符号をそろえた加重平均を正規化
+    METHOD_EIGEN : sum(w * q * q^T) の最大固有ベクトル(METHOD_NLERPの結果を初期値とした冪乗法)。符号の影響を受けない
+
+  poses = [ [ ( translate, quaternion, shear, scale ), ... ],  # ポーズ0のボーンごと
+            [ ( translate, quaternion, shear, scale ), ... ] ] # ポーズ1
+  weights = [ [ 0.3, 0.3, ... ],  # ポーズ0のボーンごとの重み(ポーズごとに1つのfloatでもよい)
+              [ 0.7, 0.7, ... ] ]
+  pose = pfposeblend.blendPoses(poses, weights)
+
+重みはボーンごとに合計で割る。重みの合計が0のボーンはポーズ0の値。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+
+
+METHOD_NLERP = 'nlerp'
+METHOD_EIGEN = 'eigen'
+
+EIGEN_ITERATIONS = 8
+
+
+def __normal(inX, inY, inZ, inW) :
+  # pfquaternion.normalと同じ
+  scl = math.sqrt(inX*inX + inY*inY + inZ*inZ + inW*inW)
+  if scl < 1.0e-10 : return [ 0.0, 0.0, 0.0, 1.0 ]
+  s = 1.0 / scl
+  if inW * s < 0.0 : return [ -(inX*s), -(inY*s), -(inZ*s), -(inW*s) ]
+  return [ inX*s, inY*s, inZ*s, inW*s ]
+
+def __eigen(inQts, inWeights, inX, inY, inZ, inW, inIterations) :
+  # sum(w * q * q^T) の対称行列
+  ( xx, xy, xz, xw, yy, yz, yw, zz, zw, ww ) = ( 0.0, ) * 10
+  for ( q, w ) in zip(inQts, inWeights) :
+    if w == 0.0 : continue
+    ( x, y, z, v ) = ( q[0], q[1], q[2], q[3] )
+    ( wx, wy, wz, wv ) = ( w*x, w*y, w*z, w*v )
+    xx += wx*x
+    xy += wx*y
+    xz += wx*z
+    xw += wx*v
+    yy += wy*y
+    yz += wy*z
+    yw += wy*v
+    zz += wz*z
+    zw += wz*v
+    ww += wv*v
+  m = [ xx, xy, xz, xw, xy, yy, yz, yw, xz, yz, zz, zw, xw, yw, zw, ww ]
+  # 2乗を繰り返して M^(2^iterations) を求める。固有値の比が2^iterations乗で効くので少ない回数で収束する
+  for _ in range(inIterations) :
+    sq = [ 0.0 ] * 16
+    for r in range(4) :
+      for c in range(r, 4) :
+        v = m[r*4]*m[c] + m[r*4+1]*m[4+c] + m[r*4+2]*m[8+c] + m[r*4+3]*m[12+c]
+        sq[r*4+c] = sq[c*4+r] = v
+    mx = max(math.fabs(v) for v in sq)
+    if mx < 1.0e-300 : break
+    s = 1.0 / mx
+    m = [ v * s for v in sq ]
+  x = m[0]*inX + m[1]*inY + m[2]*inZ + m[3]*inW
+  y = m[4]*inX + m[5]*inY + m[6]*inZ + m[7]*inW
+  z = m[8]*inX + m[9]*inY + m[10]*inZ + m[11]*inW
+  w = m[12]*inX + m[13]*inY + m[14]*inZ + m[15]*inW
+  if x*x + y*y + z*z + w*w < 1.0e-30 : return ( inX, inY, inZ, inW )
+  return ( x, y, z, w )
+
+def averageQuaternions(inQts, inWeights, method=METHOD_NLERP, iterations=EIGEN_ITERATIONS) :
+  '''
+  averageQuaternions([qt, ...], [weight, ...], method, iterations) -> qt
+  '''
+  ref = None
+  wMax = 0.0
+  for ( q, w ) in zip(inQts, inWeights) :
+    if w > wMax :
+      ( ref, wMax ) = ( q, w )
+  if ref is None : return [ 0.0, 0.0, 0.0, 1.0 ]
+  ( rx, ry, rz, rw ) = ( ref[0], ref[1], ref[2], ref[3] )
+  fabs = math.fabs
+  ( x, y, z, v ) = ( 0.0, 0.0, 0.0, 0.0 )
+  for ( q, w ) in zip(inQts, inWeights) :
+    if w == 0.0 : continue
+    ( qx, qy, qz, qw ) = ( q[0], q[1], q[2], q[3] )
+    # pfquaternion.nearPlusMinus(ref, q)
+    p = fabs(rx+qx) + fabs(ry+qy) + fabs(rz+qz) + fabs(rw+qw)
+    m = fabs(rx-qx) + fabs(ry-qy) + fabs(rz-qz) + fabs(rw-qw)
+    if not p > m : w = -w
+    x += qx * w
+    y += qy * w
+    z += qz * w
+    v += qw * w
+  if method == METHOD_EIGEN :
+    if x*x + y*y + z*z + v*v < 1.0e-20 : ( x, y, z, v ) = ( rx, ry, rz, rw )
+    ( x, y, z, v ) = __eigen(inQts, inWeights, x, y, z, v, iterations)
+  elif method != METHOD_NLERP :
+    raise ValueError('unknown method %r' % (method,))
+  return __normal(x, y, z, v)
+
+def averageQuaternionsBatch(inQts, inWeights, method=METHOD_NLERP, iterations=EIGEN_ITERATIONS) :
+  '''
+  averageQuaternionsBatch([ [qt, ...], ... ], [ [weight, ...], ... ], method, iterations) -> [qt, ...]
+  inQts[k][b], inWeights[k][b] : ポーズk、ボーンbの値。結果はボーンごと
+  '''
+  return [ averageQuaternions(qts, ws, method, iterations) for ( qts, ws ) in zip(zip(*inQts), zip(*inWeights)) ]
+
+def __weightsPerBone(inWeights, inBoneCount) :
+  # [ [ w(ポーズ0), w(ポーズ1), ... ], ... ] ボーンごと
+  rows = [ [ float(w) ] * inBoneCount if isinstance(w, ( int, float )) else w for w in inWeights ]
+  return [ list(col) for col in zip(*rows) ]
+
+def __linear(inValues, inWeights, inRcp) :
+  ( x, y, z ) = ( 0.0, 0.0, 0.0 )
+  for ( a, w ) in zip(inValues, inWeights) :
+    if w == 0.0 : continue
+    x += a[0] * w
+    y += a[1] * w
+    z += a[2] * w
+  return [ x * inRcp, y * inRcp, z * inRcp, 0.0 ]
+
+def blendPoses(inPoses, inWeights, method=METHOD_NLERP, iterations=EIGEN_ITERATIONS) :
+  '''
+  blendPoses([ pose, ... ], [ weights, ... ], method, iterations) -> [ ( translate, quaternion, shear, scale ), ... ]
+  pose : [ ( translate, quaternion, shear, scale ), ... ] ボーンごと
+  weights : [ weight, ... ] ボーンごと、またはfloat
+  '''
+  if not inPoses : return []
+  boneCount = len(inPoses[0])
+  weights = __weightsPerBone(inWeights, boneCount)
+  retVal = []
+  for ( bone, ws ) in enumerate(weights) :
+    recs = [ pose[bone] for pose in inPoses ]
+    total = 0.0
+    for w in ws : total += w
+    if total == 0.0 :
+      ( trn, qt, shr, scl ) = recs[0]
+      retVal.append(( list(trn), list(qt), list(shr), list(scl) ))
+      continue
+    rcp = 1.0 / total
+    retVal.append((
+      __linear([ r[0] for r in recs ], ws, rcp),
+      averageQuaternions([ r[1] for r in recs ], ws, method, iterations),
+      __linear([ r[2] for r in recs ], ws, rcp),
+      __linear([ r[3] for r in recs ], ws, rcp) ))
+  return retVal
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+'''
+関数ごとの呼び出し回数と時間の計測
+
+enable()で各モジュールの公開関数を計測用の関数に置き換え(pfpatchのlayer)、disable()で元に戻す。
+環境変数 TKTNM_PROFILE=1 でimport時に有効になる。
+
+  with pfprofile.profiling() :
+    for frame in range(100) :
+      evaluate()
+      pfprofile.markFrame()
+  for row in pfprofile.report(top=10) : print(row)
+
+自分自身の時間(selfNs)は単一スレッドからの呼び出しを前提とする。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import contextlib
+import functools
+import time
+
+from . import pfpatch
+
+
+MODULES = ( 'pffloat1', 'pffloat4', 'pfmatrix', 'pfaffine', 'pfquaternion', 'pfvector' )
+
+__OWNER = 'pfprofile'  # pfpatchのlayerの所有者
+__stats = {}      # 'module.function' -> [ calls, totalNs, selfNs ]
+__stack = []      # 呼び出し中の関数の子の時間
+__frames = 0
+
+
+def __wrap(inFunc, inStat) :
+  perf = time.perf_counter_ns
+  stack = __stack
+  @functools.wraps(inFunc)
+  def wrapper(*args, **kwargs) :
+    stack.append(0)
+    t0 = perf()
+    try :
+      return inFunc(*args, **kwargs)
+    finally :
+      el = perf() - t0
+      child = stack.pop()
+      inStat[0] += 1
+      inStat[1] += el
+      inStat[2] += el - child
+      if stack : stack[-1] += el
+  return wrapper
+
+def isEnabled() :
+  '''
+  isEnabled() -> bool
+  '''
+  return len(pfpatch.installed(__OWNER)) > 0
+
+def __layer(inFunc, inQualName) :
+  return __wrap(inFunc, __stats.setdefault(inQualName, [ 0, 0, 0 ]))
+
+def enable(modules=MODULES) :
+  '''
+  enable(modules) : 公開関数を計測用の関数に置き換える
+  '''
+  if isEnabled() : return
+  pfpatch.wrapModules(__OWNER, modules, __layer)
+
+def disable() :
+  '''
+  disable() : 計測用の関数を外す。集計結果は残る
+  '''
+  pfpatch.popAll(__OWNER)
+
+def reset() :
+  '''
+  reset() : 集計結果とフレーム数をクリア
+  '''
+  global __frames
+  for stat in __stats.values() :
+    stat[0] = stat[1] = stat[2] = 0
+  __frames = 0
+
+def markFrame() :
+  '''
+  markFrame() : フレームの区切り。callsPerFrame,nsPerFrameの分母
+  '''
+  global __frames
+  __frames += 1
+
+def frameCount() :
+  '''
+  frameCount() -> int
+  '''
+  return __frames
+
+def report(top=None, sortKey='totalNs') :
+  '''
+  report(top, sortKey) -> [ { 'name', 'calls', 'totalNs', 'selfNs', 'meanNs', 'callsPerFrame', 'nsPerFrame' }, ... ]
+  sortKey : 'totalNs', 'selfNs', 'calls', 'meanNs'
+  '''
+  frames = max(__frames, 1)
+  rows = []
+  for ( name, stat ) in __stats.items() :
+    if stat[0] == 0 : continue
+    rows.append({
+      'name' : name,
+      'calls' : stat[0],
+      'totalNs' : stat[1],
+      'selfNs' : stat[2],
+      'meanNs' : stat[1] / stat[0],
+      'callsPerFrame' : stat[0] / frames,
+      'nsPerFrame' : stat[1] / frames,
+    })
+  rows.sort(key=lambda row : row[sortKey], reverse=True)
+  if top is not None : rows = rows[:top]
+  return rows
+
+@contextlib.contextmanager
+def profiling(modules=MODULES, clear=True) :
+  '''
+  with profiling() : ... : ブロックの間だけ計測する
+  '''
+  if clear : reset()
+  enabled = isEnabled()
+  enable(modules)
+  try :
+    yield
+  finally :
+    if not enabled : disable()
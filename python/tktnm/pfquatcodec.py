@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+'''
+quaternionの圧縮(smallest three)
+
+単位quaternionの絶対値が最大の成分を除き、残りの3成分を量子化する。
+除いた成分は pfquaternion.adjustW と同じく sqrt(1 - x*x - y*y - z*z) で復元する。
+  32bit : index(2bit) + 10bit * 3
+  48bit : index(2bit) + 15bit * 3 (1bit未使用)
+
+残りの3成分は[-1/sqrt(2), 1/sqrt(2)]に収まるので、量子化の幅は s = sqrt(2)/(2^bit-2)。
+(0が正確に表せるよう、段階数を偶数にしている)
+各成分の誤差は s/2 以下、復元した成分の誤差は 1.5s 以下なので、
+回転の角度の誤差は最悪で 2*sqrt(3)*s (maxAngularError)。
+  32bit : 0.275 degree
+  48bit : 0.00857 degree
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import math
+
+
+__RANGE = math.sqrt(0.5)
+
+
+def maxAngularError(inBits) :
+  '''
+  maxAngularError(bits) -> degree。成分ごとのbit数(10 or 15)での最悪の角度誤差
+  '''
+  step = 2.0 * __RANGE / ((1 << inBits) - 2)
+  return math.degrees(2.0 * math.sqrt(3.0) * step)
+
+MAX_ERROR_DEGREE_32 = maxAngularError(10)
+MAX_ERROR_DEGREE_48 = maxAngularError(15)
+
+
+def __encode(inQ, inBits) :
+  x = inQ[0]
+  y = inQ[1]
+  z = inQ[2]
+  w = inQ[3]
+  ax = abs(x)
+  ay = abs(y)
+  az = abs(z)
+  aw = abs(w)
+  if ax >= ay and ax >= az and ax >= aw : ( idx, big, a, b, c ) = ( 0, x, y, z, w )
+  elif ay >= az and ay >= aw : ( idx, big, a, b, c ) = ( 1, y, x, z, w )
+  elif az >= aw : ( idx, big, a, b, c ) = ( 2, z, x, y, w )
+  else : ( idx, big, a, b, c ) = ( 3, w, x, y, z )
+  if big < 0.0 :
+    a = -a
+    b = -b
+    c = -c
+  mx = (1 << inBits) - 2
+  scl = mx / (2.0 * __RANGE)
+  qa = min(max(int((a + __RANGE) * scl + 0.5), 0), mx)
+  qb = min(max(int((b + __RANGE) * scl + 0.5), 0), mx)
+  qc = min(max(int((c + __RANGE) * scl + 0.5), 0), mx)
+  return (((((idx << inBits) | qa) << inBits) | qb) << inBits) | qc
+
+def __decode(inV, inBits) :
+  mask = (1 << inBits) - 1
+  scl = (2.0 * __RANGE) / (mask - 1)
+  c = (inV & mask) * scl - __RANGE
+  b = ((inV >> inBits) & mask) * scl - __RANGE
+  a = ((inV >> (inBits * 2)) & mask) * scl - __RANGE
+  idx = (inV >> (inBits * 3)) & 3
+  big = math.sqrt(max(1.0 - a * a - b * b - c * c, 0.0))
+  if idx == 0 : return [ big, a, b, c ]
+  if idx == 1 : return [ a, big, b, c ]
+  if idx == 2 : return [ a, b, big, c ]
+  return [ a, b, c, big ]
+
+def encode32(inQ) :
+  '''
+  encode32(qt) -> int(32bit)
+  '''
+  return __encode(inQ, 10)
+
+def decode32(inV) :
+  '''
+  decode32(int) -> qt
+  '''
+  return __decode(inV, 10)
+
+def encode48(inQ) :
+  '''
+  encode48(qt) -> int(48bit)
+  '''
+  return __encode(inQ, 15)
+
+def decode48(inV) :
+  '''
+  decode48(int) -> qt
+  '''
+  return __decode(inV, 15)
+
+def __wordArray() :
+  for tc in ( 'I', 'L' ) :
+    if array.array(tc).itemsize == 4 : return array.array(tc)
+  raise RuntimeError('no 32bit array type')
+
+def encode32Batch(inQs) :
+  '''
+  encode32Batch([qt, ...]) -> array(32bit unsigned)
+  '''
+  retVal = __wordArray()
+  retVal.extend([ __encode(qt, 10) for qt in inQs ])
+  return retVal
+
+def decode32Batch(inWords) :
+  '''
+  decode32Batch(array or [int, ...]) -> [qt, ...]
+  '''
+  return [ __decode(v, 10) for v in inWords ]
+
+def encode48Batch(inQs) :
+  '''
+  encode48Batch([qt, ...]) -> bytes(6byte * N, little endian)
+  '''
+  return b''.join([ __encode(qt, 15).to_bytes(6, 'little') for qt in inQs ])
+
+def decode48Batch(inBuf) :
+  '''
+  decode48Batch(bytes) -> [qt, ...]
+  '''
+  mv = memoryview(inBuf).cast('B')
+  fromBytes = int.from_bytes
+  return [ __decode(fromBytes(mv[ofs:ofs+6], 'little'), 15) for ofs in range(0, len(mv) - 5, 6) ]
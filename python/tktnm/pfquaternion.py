@@ -11,7 +11,6 @@ import math
 
 from . import pffloat1
 from . import pffloat4
-from . import pfvector
 
 
 def sandwich(inQA, inQB) :
@@ -173,6 +172,56 @@ def multiplyInverse(inQA, inQB) :
   return pffloat4.nmsub(aYZXW, bZXYW, tmp)
 
 
+def multiplyBatch(inQAs, inQBs) :
+  '''
+  multiplyBatch([qtA, ...], [qtB, ...]) -> [qtA * qtB, ...]
+  '''
+  # multiplyと同じ式・同じ演算順を展開したもの
+  retVal = []
+  for ( a, b ) in zip(inQAs, inQBs) :
+    ( X, Y, Z, W ) = ( a[0], a[1], a[2], a[3] )
+    ( x, y, z, w ) = ( b[0], b[1], b[2], b[3] )
+    retVal.append([
+      (W*x + (X*w + Y*z)) - Z*y,
+      (Y*w + (Z*x + W*y)) - X*z,
+      (X*y + (W*z + Z*w)) - Y*x,
+      -((Z*z + (Y*y + X*x)) - W*w) ])
+  return retVal
+
+def inverseMultiplyBatch(inQAs, inQBs) :
+  '''
+  inverseMultiplyBatch([qtA, ...], [qtB, ...]) -> [qtA^-1 * qtB, ...]
+  '''
+  # inverseMultiplyと同じ式・同じ演算順を展開したもの
+  retVal = []
+  for ( a, b ) in zip(inQAs, inQBs) :
+    ( X, Y, Z, W ) = ( a[0], a[1], a[2], a[3] )
+    ( x, y, z, w ) = ( b[0], b[1], b[2], b[3] )
+    ww = W*w
+    retVal.append([
+      ((W*x + (Z*y + 0.0)) - X*w) - Y*z,
+      ((W*y + (X*z + 0.0)) - Y*w) - Z*x,
+      ((W*z + (Y*x + 0.0)) - Z*w) - X*y,
+      (((ww + (X*x + Y*y + Z*z + ww)) + ww) - ww) - ww ])
+  return retVal
+
+def multiplyInverseBatch(inQAs, inQBs) :
+  '''
+  multiplyInverseBatch([qtA, ...], [qtB, ...]) -> [qtA * qtB^-1, ...]
+  '''
+  # multiplyInverseと同じ式・同じ演算順を展開したもの
+  retVal = []
+  for ( a, b ) in zip(inQAs, inQBs) :
+    ( X, Y, Z, W ) = ( a[0], a[1], a[2], a[3] )
+    ( x, y, z, w ) = ( b[0], b[1], b[2], b[3] )
+    ww = W*w
+    retVal.append([
+      (X*w + ((Z*y + 0.0) - W*x)) - Y*z,
+      (Y*w + ((X*z + 0.0) - W*y)) - Z*x,
+      (Z*w + ((Y*x + 0.0) - W*z)) - X*y,
+      ((ww + ((ww + (X*x + Y*y + Z*z + ww)) - ww)) - ww) ])
+  return retVal
+
 def axisX(inQ) :
   '''
   axisX(q) -> [x,y,z,0]
@@ -374,9 +423,9 @@ def  toEuler(inOrd, inQ) :
     eul = pffloat4.setZ(eul, pffloat1.atan2Degree(scv[0], scv[1]))
     qt = multiply(qt, fromAxisSinCos(pffloat4.axisZ(), scv[0], scv[1]))
 
-    v = pfvector.toLocalVectorByQuaternion(axisX(inQ), qt)
-    dv = pfvector.alignAxisXRotateY(v)
-    eul = pffloat4.setY(eul, dv[0])
+    v = sandwichInverse(qt, pffloat4.setW0(axisX(inQ)))
+    scv = pffloat4.alignAxisXRotateY(v)
+    eul = pffloat4.setY(eul, pffloat1.atan2Degree(scv[0], scv[1]))
   elif inOrd == 2 : # zxy
     scv = pffloat4.alignAxisZRotateY(axisZ(inQ))
     eul = pffloat4.setY(eul, pffloat1.atan2Degree(scv[0], scv[1]))
@@ -385,9 +434,9 @@ def  toEuler(inOrd, inQ) :
     eul = pffloat4.setX(eul, pffloat1.atan2Degree(scv[0], scv[1]))
     qt = multiply(qt, fromAxisSinCos(pffloat4.axisX(), scv[0], scv[1]))
 
-    v = pfvector.toLocalVectorByQuaternion(axisX(inQ), qt)
-    dv = pfvector.alignAxisXRotateZ(v)
-    eul = pffloat4.setZ(eul, dv[0])
+    v = sandwichInverse(qt, pffloat4.setW0(axisX(inQ)))
+    scv = pffloat4.alignAxisXRotateZ(v)
+    eul = pffloat4.setZ(eul, pffloat1.atan2Degree(scv[0], scv[1]))
   elif inOrd == 3 : # xzy
     scv = pffloat4.alignAxisXRotateY(axisX(inQ))
     eul = pffloat4.setY(eul, pffloat1.atan2Degree(scv[0], scv[1]))
@@ -396,9 +445,9 @@ def  toEuler(inOrd, inQ) :
     eul = pffloat4.setZ(eul, pffloat1.atan2Degree(scv[0], scv[1]))
     qt = multiply(qt, fromAxisSinCos(pffloat4.axisZ(), scv[0], scv[1]))
 
-    v = pfvector.toLocalVectorByQuaternion(axisY(inQ), qt)
-    dv = pfvector.alignAxisYRotateX(v)
-    eul = pffloat4.setX(eul, dv[0])
+    v = sandwichInverse(qt, pffloat4.setW0(axisY(inQ)))
+    scv = pffloat4.alignAxisYRotateX(v)
+    eul = pffloat4.setX(eul, pffloat1.atan2Degree(scv[0], scv[1]))
   elif inOrd == 4 : # yxz
     scv = pffloat4.alignAxisYRotateZ(axisY(inQ))
     eul = pffloat4.setZ(eul, pffloat1.atan2Degree(scv[0], scv[1]))
@@ -407,9 +456,9 @@ def  toEuler(inOrd, inQ) :
     eul = pffloat4.setX(eul, pffloat1.atan2Degree(scv[0], scv[1]))
     qt = multiply(qt, fromAxisSinCos(pffloat4.axisX(), scv[0], scv[1]))
 
-    v = pfvector.toLocalVectorByQuaternion(axisX(inQ), qt)
-    dv = pfvector.alignAxisXRotateY(v)
-    eul = pffloat4.setY(eul, dv[0])
+    v = sandwichInverse(qt, pffloat4.setW0(axisX(inQ)))
+    scv = pffloat4.alignAxisXRotateY(v)
+    eul = pffloat4.setY(eul, pffloat1.atan2Degree(scv[0], scv[1]))
   elif inOrd == 5 : # zyx
     scv = pffloat4.alignAxisZRotateX(axisZ(inQ))
     eul = pffloat4.setX(eul, pffloat1.atan2Degree(scv[0], scv[1]))
@@ -418,9 +467,9 @@ def  toEuler(inOrd, inQ) :
     eul = pffloat4.setY(eul, pffloat1.atan2Degree(scv[0], scv[1]))
     qt = multiply(qt, fromAxisSinCos(pffloat4.axisY(), scv[0], scv[1]))
 
-    v = pfvector.toLocalVectorByQuaternion(axisX(inQ), qt)
-    dv = pfvector.alignAxisXRotateZ(v)
-    eul = pffloat4.setZ(eul, dv[0])
+    v = sandwichInverse(qt, pffloat4.setW0(axisX(inQ)))
+    scv = pffloat4.alignAxisXRotateZ(v)
+    eul = pffloat4.setZ(eul, pffloat1.atan2Degree(scv[0], scv[1]))
   else : # xyz
     scv = pffloat4.alignAxisXRotateZ(axisX(inQ))
     eul = pffloat4.setZ(eul, pffloat1.atan2Degree(scv[0], scv[1]))
@@ -429,9 +478,9 @@ def  toEuler(inOrd, inQ) :
     eul = pffloat4.setY(eul, pffloat1.atan2Degree(scv[0], scv[1]))
     qt = multiply(qt, fromAxisSinCos(pffloat4.axisY(), scv[0], scv[1]))
 
-    v = pfvector.toLocalVectorByQuaternion(axisY(inQ), qt)
-    dv = pfvector.alignAxisYRotateX(v)
-    eul = pffloat4.setX(eul, dv[0])
+    v = sandwichInverse(qt, pffloat4.setW0(axisY(inQ)))
+    scv = pffloat4.alignAxisYRotateX(v)
+    eul = pffloat4.setX(eul, pffloat1.atan2Degree(scv[0], scv[1]))
 
   return eul
 
@@ -488,6 +537,48 @@ def exp(inQ) :
     w = pffloat1.sqrtClamp(1.0 - xyzSqr)
     return pffloat4.setW(inQ, w)
 
+def logBatch(inQs) :
+  '''
+  logBatch([qt, ...]) -> [log qt, ...]
+  '''
+  # logと同じ式・同じ演算順を展開したもの
+  sqrt = math.sqrt
+  atan2 = math.atan2
+  retVal = []
+  for q in inQs :
+    ( x, y, z ) = ( q[0], q[1], q[2] )
+    xyzSqr = x*x + y*y + z*z + 0.0
+    if xyzSqr > 1.5e-15 :
+      rXYZ = 1.0 / sqrt(xyzSqr)
+      at2 = atan2(rXYZ * xyzSqr, q[3]) * rXYZ
+      retVal.append([ x * at2, y * at2, z * at2, 0.0 ])
+    else :
+      retVal.append([ x, y, z, 0.0 ])
+  return retVal
+
+def expBatch(inQs) :
+  '''
+  expBatch([log qt, ...]) -> [qt, ...]
+  '''
+  # expと同じ式・同じ演算順を展開したもの
+  sqrt = math.sqrt
+  sin = math.sin
+  cos = math.cos
+  retVal = []
+  for q in inQs :
+    ( x, y, z ) = ( q[0], q[1], q[2] )
+    xyzSqr = x*x + y*y + z*z + 0.0
+    if xyzSqr > 2.601e-15 :
+      rXYZ = 1.0 / sqrt(xyzSqr)
+      th = rXYZ * xyzSqr
+      ( sn, cs ) = ( sin(th), cos(th) )
+      s = -sn * rXYZ if cs < 0.0 else sn * rXYZ
+      retVal.append([ x * s, y * s, z * s, cs ])
+    else :
+      v = 1.0 - xyzSqr
+      retVal.append([ x, y, z, sqrt(0.0 if v < 0.0 else v) ])
+  return retVal
+
 def alignAxisXRotateZ(inV) :
   '''
   alignAxisXRotateZ(vec) -> ( quaternion, vec )
@@ -559,6 +650,124 @@ def fromVector(inFrom, inTo) :
     qt = pffloat4.setW0(ax)
   return normal(qt)
 
+def fromVectorBatch(inFroms, inTos) :
+  '''
+  fromVectorBatch([from, ...], [to, ...]) -> [qt, ...]
+  '''
+  # fromVectorと同じ値(ビット単位で一致)。fromVector, cross3, normalを展開したもの
+  sqrt = math.sqrt
+  fabs = math.fabs
+  retVal = []
+  for ( a, b ) in zip(inFroms, inTos) :
+    ( ax, ay, az ) = ( a[0], a[1], a[2] )
+    ( bx, by, bz ) = ( b[0], b[1], b[2] )
+    dt = ax*bx + ay*by + az*bz
+    w = dt + 1.0
+    if not w <= 1.0e-10 :
+      x = ay*bz - by*az
+      y = az*bx - bz*ax
+      z = ax*by - bx*ay
+    else :
+      # 逆向き : fromと直交する軸で回す
+      if fabs(ax) > fabs(ay) : ( kx, ky, kz ) = ( 0.0, 1.0, 0.0 )
+      elif fabs(az) > fabs(ax) : ( kx, ky, kz ) = ( 1.0, 0.0, 0.0 )
+      else : ( kx, ky, kz ) = ( 0.0, 0.0, 1.0 )
+      ( cx, cy, cz ) = ( ay*kz - ky*az, az*kx - kz*ax, ax*ky - kx*ay )
+      ( fx, fy, fz ) = ( ay*cz - cy*az, az*cx - cz*ax, ax*cy - cx*ay )
+      ( tx, ty, tz ) = ( by*cz - cy*bz, bz*cx - cz*bx, bx*cy - cx*by )
+      if dt < 0.0 : ( x, y, z ) = ( fx - tx, fy - ty, fz - tz )
+      else : ( x, y, z ) = ( fx + tx, fy + ty, fz + tz )
+      w = 0.0
+    ln = sqrt(x*x + y*y + z*z + w*w)
+    if ln < 1.0e-10 :
+      retVal.append([ 0.0, 0.0, 0.0, 1.0 ])
+      continue
+    s = 1.0 / ln
+    retVal.append([ x*s, y*s, z*s, w*s ])
+  return retVal
+
+def __fromAxes(inXX, inXY, inXZ, inYX, inYY, inYZ, inZX, inZY, inZZ) :
+  # 直交する単位ベクトル(回転行列の行) -> quaternion(w >= 0)。axisX, axisY, axisZの逆
+  tr = inXX + inYY + inZZ
+  if tr > 0.0 :
+    s = math.sqrt(tr + 1.0) * 2.0
+    r = 1.0 / s
+    qt = [ (inYZ - inZY) * r, (inZX - inXZ) * r, (inXY - inYX) * r, 0.25 * s ]
+  elif inXX > inYY and inXX > inZZ :
+    s = math.sqrt(1.0 + inXX - inYY - inZZ) * 2.0
+    r = 1.0 / s
+    qt = [ 0.25 * s, (inXY + inYX) * r, (inXZ + inZX) * r, (inYZ - inZY) * r ]
+  elif inYY > inZZ :
+    s = math.sqrt(1.0 + inYY - inXX - inZZ) * 2.0
+    r = 1.0 / s
+    qt = [ (inXY + inYX) * r, 0.25 * s, (inYZ + inZY) * r, (inZX - inXZ) * r ]
+  else :
+    s = math.sqrt(1.0 + inZZ - inXX - inYY) * 2.0
+    r = 1.0 / s
+    qt = [ (inXZ + inZX) * r, (inYZ + inZY) * r, 0.25 * s, (inXY - inYX) * r ]
+  if qt[3] < 0.0 : return [ -qt[0], -qt[1], -qt[2], -qt[3] ]
+  return qt
+
+def lookAt(inForward, inUp) :
+  '''
+  lookAt(forward, up) -> ( quaternion, mtx )。Z軸がforward、Y軸がupに近い向き
+  forwardの長さが0ならZ軸、upがforwardと平行(または長さ0)ならfromVectorと同じ方法で選んだ軸をupの代わりに使う
+  '''
+  vZ = pffloat4.setW0(pffloat4.normal3(inForward, pffloat4.axisZ()))
+  vX = pffloat4.cross3(inUp, vZ)
+  if pffloat4.dot3(vX, vX) < 1.0e-14 :
+    absZ = pffloat4.abs(vZ)
+    if pffloat4.getX(absZ) > pffloat4.getY(absZ) : ax = pffloat4.axisY()
+    elif pffloat4.getZ(absZ) > pffloat4.getX(absZ) : ax = pffloat4.axisX()
+    else : ax = pffloat4.axisZ()
+    vX = pffloat4.cross3(ax, vZ)
+  vX = pffloat4.setW0(pffloat4.normal3(vX))
+  vY = pffloat4.setW0(pffloat4.cross3(vZ, vX))
+  qt = __fromAxes(vX[0], vX[1], vX[2], vY[0], vY[1], vY[2], vZ[0], vZ[1], vZ[2])
+  mtx = vX + vY + vZ + [ 0.0, 0.0, 0.0, 1.0 ]
+  return ( qt, mtx )
+
+def lookAtBatch(inForwards, inUps) :
+  '''
+  lookAtBatch([forward, ...], [up, ...]) -> ( [quaternion, ...], [mtx, ...] )
+  '''
+  # lookAtと同じ値(ビット単位で一致)。lookAt, cross3, normal3を展開したもの
+  sqrt = math.sqrt
+  fabs = math.fabs
+  fromAxes = __fromAxes
+  qts = []
+  mtxs = []
+  for ( f, u ) in zip(inForwards, inUps) :
+    ( zx, zy, zz ) = ( f[0], f[1], f[2] )
+    dt = zx*zx + zy*zy + zz*zz
+    if dt < 1.0e-14 : ( zx, zy, zz ) = ( 0.0, 0.0, 1.0 )
+    else :
+      s = 1.0 / sqrt(dt)
+      ( zx, zy, zz ) = ( zx*s, zy*s, zz*s )
+    ( ux, uy, uz ) = ( u[0], u[1], u[2] )
+    xx = uy*zz - zy*uz
+    xy = uz*zx - zz*ux
+    xz = ux*zy - zx*uy
+    dt = xx*xx + xy*xy + xz*xz
+    if dt < 1.0e-14 :
+      # upがforwardと平行 : lookAtと同じく、zと最も平行でない軸をupの代わりに使う
+      ( ax, ay, az ) = ( fabs(zx), fabs(zy), fabs(zz) )
+      if ax > ay : ( kx, ky, kz ) = ( 0.0, 1.0, 0.0 )
+      elif az > ax : ( kx, ky, kz ) = ( 1.0, 0.0, 0.0 )
+      else : ( kx, ky, kz ) = ( 0.0, 0.0, 1.0 )
+      xx = ky*zz - zy*kz
+      xy = kz*zx - zz*kx
+      xz = kx*zy - zx*ky
+      dt = xx*xx + xy*xy + xz*xz
+    s = 1.0 / sqrt(dt)
+    ( xx, xy, xz ) = ( xx*s, xy*s, xz*s )
+    yx = zy*xz - xy*zz
+    yy = zz*xx - xz*zx
+    yz = zx*xy - xx*zy
+    qts.append(fromAxes(xx, xy, xz, yx, yy, yz, zx, zy, zz))
+    mtxs.append([ xx, xy, xz, 0.0, yx, yy, yz, 0.0, zx, zy, zz, 0.0, 0.0, 0.0, 0.0, 1.0 ])
+  return ( qts, mtxs )
+
 def interpLinear(inQA, inQB, inRateB) : 
   '''
   interpLinear(qtA, qtB, rateB) -> (1-rateB) * qtA + rateB * qtB
@@ -583,6 +792,48 @@ def slerp(inQA, inQB, inRateB) :
   else : 
     return interpLinear(inQA, qtB, inRateB)
 
+def slerpBatch(inQAs, inQBs, inRatesB) :
+  '''
+  slerpBatch([qtA, ...], [qtB, ...], [rateB, ...]) -> [qt, ...]
+  '''
+  # slerp(とinterpLinear, normal)と同じ式・同じ演算順を展開したもの
+  fabs = math.fabs
+  sqrt = math.sqrt
+  sin = math.sin
+  acos = pffloat1.acosRadian
+  retVal = []
+  for ( qa, qb, r ) in zip(inQAs, inQBs, inRatesB) :
+    ( ax, ay, az, aw ) = ( qa[0], qa[1], qa[2], qa[3] )
+    ( bx, by, bz, bw ) = ( qb[0], qb[1], qb[2], qb[3] )
+    p = fabs(ax+bx) + fabs(ay+by) + fabs(az+bz) + fabs(aw+bw)
+    m = fabs(ax-bx) + fabs(ay-by) + fabs(az-bz) + fabs(aw-bw)
+    if not p > m : ( bx, by, bz, bw ) = ( -bx, -by, -bz, -bw )
+    cs = ax*bx + ay*by + az*bz + aw*bw
+    if max(1.0 - cs * cs, 0.0) > 1.0e-8 :
+      th = acos(cs)
+      ra = sin(th * (1.0 - r))
+      rb = sin(th * r)
+      x = bx*rb + ax*ra
+      y = by*rb + ay*ra
+      z = bz*rb + az*ra
+      w = bw*rb + aw*ra
+    else :
+      p = fabs(ax+bx) + fabs(ay+by) + fabs(az+bz) + fabs(aw+bw)
+      m = fabs(ax-bx) + fabs(ay-by) + fabs(az-bz) + fabs(aw-bw)
+      if not p > m : ( bx, by, bz, bw ) = ( -bx, -by, -bz, -bw )
+      x = (r*bx + ax) - r*ax
+      y = (r*by + ay) - r*ay
+      z = (r*bz + az) - r*az
+      w = (r*bw + aw) - r*aw
+    scl = sqrt(x*x + y*y + z*z + w*w)
+    if scl < 1.0e-10 :
+      retVal.append([ 0.0, 0.0, 0.0, 1.0 ])
+      continue
+    s = 1.0/scl
+    if w*s < 0.0 : retVal.append([ -(x*s), -(y*s), -(z*s), -(w*s) ])
+    else : retVal.append([ x*s, y*s, z*s, w*s ])
+  return retVal
+
 def from2BoneIK(inAx, inUpper, inLower, inDist) : 
   '''
   from2BoneIK(ax,upper,lower,distance) -> ( qtUpper, qtLower, 0 or 1 or -1 )
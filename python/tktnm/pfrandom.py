@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+'''
+シードを指定できる乱数でのベクトル、quaternionの一括生成
+
+randomモジュールの共有の状態を使わず、pfRandomごとに random.Random を持つ。
+spawnで作った子は親のシードと呼び出し順で決まる独立した系列なので、
+並列のworkerごとに渡せば再現できる。
+
+  rnd = pfrandom.pfRandom(1234)
+  vs = rnd.uniformVectors(1000, -1.0, 1.0)  # [ [x,y,z,0], ... ]
+  ds = rnd.unitVectors(1000)                # 球面上で一様
+  qs = rnd.quaternions(1000)                # 回転として一様(Shoemake)
+  workers = rnd.spawn(4)
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import math
+import random
+
+
+class pfRandom(object) :
+  '''
+  乱数の生成器
+  '''
+  __rng = None
+  __seed = None
+  @property
+  def Seed(self) :
+    '''
+    Seed : int or None. コンストラクタで指定したシード
+    '''
+    return self.__seed
+  @property
+  def Generator(self) :
+    '''
+    Generator : random.Random. 内部の生成器
+    '''
+    return self.__rng
+
+  def __init__(self, seed=None) :
+    '''
+    コンストラクタ。seed=Noneなら OS の乱数で初期化
+    '''
+    self.__seed = seed
+    self.__rng = random.Random(seed)
+
+  def spawn(self, inCount) :
+    '''
+    spawn(count) -> [ pfRandom, ... ]。独立した系列の生成器
+    '''
+    return [ pfRandom(self.__rng.getrandbits(128)) for _ in range(inCount) ]
+
+  def uniform(self, inCount, inMin=0.0, inMax=1.0) :
+    '''
+    uniform(count, min, max) -> [ float, ... ]
+    '''
+    rnd = self.__rng.random
+    d = inMax - inMin
+    return [ inMin + d * rnd() for _ in range(inCount) ]
+
+  def uniform4(self, inCount, inMin=0.0, inMax=1.0) :
+    '''
+    uniform4(count, min, max) -> [ [x,y,z,w], ... ]。pffloat4.randomRangeのN個版
+    '''
+    rnd = self.__rng.random
+    d = inMax - inMin
+    return [ [ inMin + d * rnd(), inMin + d * rnd(), inMin + d * rnd(), inMin + d * rnd() ] for _ in range(inCount) ]
+
+  def uniformVectors(self, inCount, inMin=0.0, inMax=1.0) :
+    '''
+    uniformVectors(count, min, max) -> [ [x,y,z,0], ... ]
+    '''
+    rnd = self.__rng.random
+    d = inMax - inMin
+    return [ [ inMin + d * rnd(), inMin + d * rnd(), inMin + d * rnd(), 0.0 ] for _ in range(inCount) ]
+
+  def unitVectors(self, inCount) :
+    '''
+    unitVectors(count) -> [ [x,y,z,0], ... ]。単位球面上で一様
+    '''
+    rnd = self.__rng.random
+    sqrt = math.sqrt
+    sin = math.sin
+    cos = math.cos
+    pi2 = 2.0 * math.pi
+    retVal = []
+    for _ in range(inCount) :
+      z = 2.0 * rnd() - 1.0
+      r = sqrt(max(1.0 - z * z, 0.0))
+      ph = pi2 * rnd()
+      retVal.append([ r * cos(ph), r * sin(ph), z, 0.0 ])
+    return retVal
+
+  def quaternions(self, inCount) :
+    '''
+    quaternions(count) -> [ qt, ... ]。回転として一様な単位quaternion(w >= 0)
+    '''
+    # K. Shoemake, Uniform random rotations (Graphics Gems III)
+    rnd = self.__rng.random
+    sqrt = math.sqrt
+    sin = math.sin
+    cos = math.cos
+    pi2 = 2.0 * math.pi
+    retVal = []
+    for _ in range(inCount) :
+      u = rnd()
+      a = sqrt(1.0 - u)
+      b = sqrt(u)
+      t1 = pi2 * rnd()
+      t2 = pi2 * rnd()
+      q = [ a * sin(t1), a * cos(t1), b * sin(t2), b * cos(t2) ]
+      if q[3] < 0.0 : q = [ -q[0], -q[1], -q[2], -q[3] ]
+      retVal.append(q)
+    return retVal
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+'''
+matrix, quaternion, TRSのバイナリ形式
+
+header(32byte, little endian) :
+  magic    4s  b'TKTN'
+  version  H   1
+  layout   B   LAYOUT_MATRIX, LAYOUT_QUATERNION, LAYOUT_TRS, LAYOUT_TRSS
+  itemsize B   4(float32) or 8(float64)
+  order    c   b'<'(little) or b'>'(big)。レコードのバイトオーダー
+  count    Q   レコード数
+の後にfloatのレコードが続く。
+
+load()/loadFile()はmemoryview/mmapでコピーせずに読む。
+headerとレコードの組が続くもの(pfbake.bakeでseekできないsinkに書いたもの)はloadBlocks()で読む。
+レコードのバイトオーダーが実行環境と異なる場合のみ変換のためにコピーする。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+from . import pfutil
+
+
+MAGIC = b'TKTN'
+VERSION = 1
+HEADER = struct.Struct('<4sHBBc7xQ8x')
+
+LAYOUT_MATRIX = 0      # mtx(16)
+LAYOUT_QUATERNION = 1  # quaternion(4)
+LAYOUT_TRS = 2         # translate(3), quaternion(4), scale(3)
+LAYOUT_TRSS = 3        # translate(3), quaternion(4), shear(3), scale(3)。pfmatrix.decomposeと同じ
+WIDTHS = { LAYOUT_MATRIX : 16, LAYOUT_QUATERNION : 4, LAYOUT_TRS : 10, LAYOUT_TRSS : 13 }
+
+FLOAT32 = pfutil.FLOAT32
+FLOAT64 = pfutil.FLOAT64
+TYPECODES = pfutil.TYPECODES
+__DTYPES = { 4 : FLOAT32, 8 : FLOAT64 }
+__ORDERS = { 'little' : b'<', 'big' : b'>' }
+NATIVE = __ORDERS[sys.byteorder]
+
+
+def flatten(inLayout, inRecord) :
+  '''
+  flatten(layout, record) -> [float, ...]
+  '''
+  if inLayout == LAYOUT_MATRIX : return list(inRecord[:16])
+  if inLayout == LAYOUT_QUATERNION : return list(inRecord[:4])
+  if inLayout == LAYOUT_TRS :
+    ( trn, qt, scl ) = inRecord
+    return list(trn[:3]) + list(qt[:4]) + list(scl[:3])
+  ( trn, qt, shr, scl ) = inRecord
+  return list(trn[:3]) + list(qt[:4]) + list(shr[:3]) + list(scl[:3])
+
+def unflatten(inLayout, inValues) :
+  '''
+  unflatten(layout, [float, ...]) -> record。translate,shear,scaleは[x,y,z,0]
+  '''
+  v = inValues
+  if inLayout == LAYOUT_MATRIX or inLayout == LAYOUT_QUATERNION : return list(v)
+  trn = [ v[0], v[1], v[2], 0.0 ]
+  qt = [ v[3], v[4], v[5], v[6] ]
+  if inLayout == LAYOUT_TRS :
+    return ( trn, qt, [ v[7], v[8], v[9], 0.0 ] )
+  return ( trn, qt, [ v[7], v[8], v[9], 0.0 ], [ v[10], v[11], v[12], 0.0 ] )
+
+def packHeader(inLayout, inCount, dtype=FLOAT32, byteorder=NATIVE) :
+  '''
+  packHeader(layout, count, dtype, byteorder) -> bytes
+  '''
+  if inLayout not in WIDTHS : raise ValueError('unknown layout %r' % (inLayout,))
+  itemsize = array.array(TYPECODES[dtype]).itemsize
+  return HEADER.pack(MAGIC, VERSION, inLayout, itemsize, byteorder, inCount)
+
+def packRecords(inLayout, inRecords, dtype=FLOAT32, byteorder=NATIVE) :
+  '''
+  packRecords(layout, records, dtype, byteorder) -> bytes。headerなし
+  '''
+  arr = array.array(TYPECODES[dtype])
+  for rec in inRecords : arr.extend(flatten(inLayout, rec))
+  if byteorder != NATIVE : arr.byteswap()
+  return arr.tobytes()
+
+def pack(inLayout, inRecords, dtype=FLOAT32, byteorder=NATIVE) :
+  '''
+  pack(layout, records, dtype, byteorder) -> bytes
+  '''
+  data = packRecords(inLayout, inRecords, dtype, byteorder)
+  itemsize = array.array(TYPECODES[dtype]).itemsize
+  count = len(data) // (itemsize * WIDTHS[inLayout])
+  return packHeader(inLayout, count, dtype, byteorder) + data
+
+def dump(ioFile, inLayout, inRecords, dtype=FLOAT32, byteorder=NATIVE) :
+  '''
+  dump(file, layout, records, dtype, byteorder) : ファイルに書く
+  '''
+  ioFile.write(pack(inLayout, inRecords, dtype, byteorder))
+
+def unpackHeader(inBuf) :
+  '''
+  unpackHeader(buffer) -> ( layout, count, dtype, byteorder )
+  '''
+  with memoryview(inBuf) as mv : size = mv.nbytes
+  if size < HEADER.size : raise ValueError('truncated header (%d < %d bytes)' % (size, HEADER.size))
+  ( magic, version, layout, itemsize, order, count ) = HEADER.unpack_from(inBuf, 0)
+  if magic != MAGIC : raise ValueError('not a tktnm binary (magic %r)' % (magic,))
+  if version != VERSION : raise ValueError('unsupported version %d' % (version,))
+  if layout not in WIDTHS or itemsize not in __DTYPES or order not in ( b'<', b'>' ) :
+    raise ValueError('broken header')
+  return ( layout, count, __DTYPES[itemsize], order )
+
+
+class pfPackedRecords(object) :
+  '''
+  バイナリのレコード列。load()/loadFile()で作る
+  '''
+  __layout = None
+  __count = 0
+  __dtype = None
+  __data = None  # memoryview。float32/float64の1次元
+  __mmap = None
+  @property
+  def Layout(self) :
+    '''
+    Layout : int. LAYOUT_*
+    '''
+    return self.__layout
+  @property
+  def Count(self) :
+    '''
+    Count : int. レコード数
+    '''
+    return self.__count
+  @property
+  def DType(self) :
+    '''
+    DType : str. FLOAT32 or FLOAT64
+    '''
+    return self.__dtype
+  @property
+  def Width(self) :
+    '''
+    Width : int. 1レコードのfloat数
+    '''
+    return WIDTHS[self.__layout]
+  @property
+  def Data(self) :
+    '''
+    Data : memoryview. 全レコードのfloat(Count*Width)
+    '''
+    return self.__data
+
+  def __init__(self, inBuf, inMmap=None) :
+    '''
+    コンストラクタ。inBufはbytes, bytearray, mmap, memoryviewなど
+    '''
+    ( layout, count, dtype, order ) = unpackHeader(inBuf)
+    tc = TYPECODES[dtype]
+    itemsize = array.array(tc).itemsize
+    nbytes = count * WIDTHS[layout] * itemsize
+    # 例外で参照が残るとmmapを閉じられないので、viewを作る前に長さを確かめる
+    with memoryview(inBuf) as mv : size = max(mv.nbytes - HEADER.size, 0)
+    if size < nbytes : raise ValueError('truncated data (%d < %d bytes)' % (size, nbytes))
+    raw = memoryview(inBuf).cast('B')[HEADER.size:HEADER.size + nbytes]
+    if order == NATIVE :
+      self.__data = raw.cast(tc)
+    else :
+      arr = array.array(tc, raw.tobytes())
+      arr.byteswap()
+      self.__data = memoryview(arr)
+    self.__layout = layout
+    self.__count = count
+    self.__dtype = dtype
+    self.__mmap = inMmap
+
+  def __len__(self) :
+    return self.__count
+
+  def __getitem__(self, inIdx) :
+    if isinstance(inIdx, slice) :
+      return [ self[idx] for idx in range(*inIdx.indices(self.__count)) ]
+    return unflatten(self.__layout, self.values(inIdx))
+
+  def __iter__(self) :
+    for idx in range(self.__count) : yield self[idx]
+
+  def values(self, inIdx) :
+    '''
+    values(idx) -> [float, ...]。1レコード分
+    '''
+    if inIdx < 0 : inIdx += self.__count
+    if inIdx < 0 or inIdx >= self.__count : raise IndexError('pfPackedRecords index out of range')
+    width = WIDTHS[self.__layout]
+    return self.__data[inIdx*width:inIdx*width+width].tolist()
+
+  def close(self) :
+    '''
+    close() : loadFile()で開いたmmapを閉じる
+    '''
+    if self.__data is not None : self.__data.release()
+    self.__data = None
+    if self.__mmap is not None : self.__mmap.close()
+    self.__mmap = None
+
+  def __enter__(self) :
+    return self
+
+  def __exit__(self, *args) :
+    self.close()
+
+
+def load(inBuf) :
+  '''
+  load(buffer) -> pfPackedRecords
+  '''
+  return pfPackedRecords(inBuf)
+
+def loadBlocks(inBuf) :
+  '''
+  loadBlocks(buffer) -> [ pfPackedRecords, ... ]。headerとレコードの組ごと
+  '''
+  retVal = []
+  mv = memoryview(inBuf).cast('B')
+  ofs = 0
+  while ofs < len(mv) :
+    recs = pfPackedRecords(mv[ofs:])
+    retVal.append(recs)
+    ofs += HEADER.size + recs.Count * recs.Width * array.array(TYPECODES[recs.DType]).itemsize
+  return retVal
+
+def loadFile(inPath) :
+  '''
+  loadFile(path) -> pfPackedRecords。mmapで開く。使い終わったらclose()
+  '''
+  with open(inPath, 'rb') as f :
+    size = os.fstat(f.fileno()).st_size
+    # 空のファイルはmmapできないので、mmapの前にheaderの長さを確かめる
+    if size < HEADER.size : raise ValueError('truncated header (%d < %d bytes)' % (size, HEADER.size))
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+  try :
+    return pfPackedRecords(mm, mm)
+  except :
+    mm.close()
+    raise
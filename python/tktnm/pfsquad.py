@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''
+quaternionのキーフレームのsquad(spherical cubic)補間
+
+キーごとの接線のquaternionはコンストラクタで一度だけ pfquaternion.logBatch, expBatch で求める。
+  s[i] = q[i] * exp(-(log(q[i]^-1 * q[i+1]) + log(q[i]^-1 * q[i-1])) / 4)
+  squad(q[i], q[i+1], s[i], s[i+1], h) = slerp(slerp(q[i], q[i+1], h), slerp(s[i], s[i+1], h), 2h(1-h))
+キーは前のキーに nearPlusMinus で符号をそろえる。両端の接線はキーそのもの。
+
+  curve = pfsquad.pfSquadCurve(times, qts)
+  qt = curve.sample(1.5)
+  qts = curve.sampleMany([ 0.0, 0.1, 0.2, ... ])
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import bisect
+import math
+
+from . import pffloat4
+from . import pfquaternion
+
+
+class pfSquadCurve(object) :
+  '''
+  squadで補間するquaternionのカーブ
+  '''
+  # キーの時間
+  __times = None
+  # 符号をそろえたキー
+  __keys = None
+  # キーごとの接線
+  __tangents = None
+  @property
+  def Times(self) :
+    '''
+    Times : [float, ...]. キーの時間
+    '''
+    return list(self.__times)
+  @property
+  def Keys(self) :
+    '''
+    Keys : [qt, ...]. 符号をそろえたキー
+    '''
+    return [ list(q) for q in self.__keys ]
+  @property
+  def Tangents(self) :
+    '''
+    Tangents : [qt, ...]. キーごとの接線
+    '''
+    return [ list(q) for q in self.__tangents ]
+
+  def __init__(self, inTimes, inQts) :
+    '''
+    コンストラクタ。timesは増加順
+    '''
+    if len(inTimes) != len(inQts) : raise ValueError('times and quaternions must have the same length')
+    if not inQts : raise ValueError('curve needs at least one key')
+    self.__times = [ float(t) for t in inTimes ]
+    keys = [ list(inQts[0]) ]
+    for q in inQts[1:] :
+      keys.append(pffloat4.mulScalar(q, pfquaternion.nearPlusMinus(keys[-1], q)))
+    self.__keys = keys
+    self.__tangents = pfSquadCurve.tangents(keys)
+
+  @staticmethod
+  def tangents(inKeys) :
+    '''
+    tangents([qt, ...]) -> [qt, ...]。符号をそろえたキーの接線
+    '''
+    cnt = len(inKeys)
+    if cnt < 3 : return [ list(q) for q in inKeys ]
+    inner = range(1, cnt - 1)
+    lgNext = pfquaternion.logBatch([ pfquaternion.inverseMultiply(inKeys[i], inKeys[i+1]) for i in inner ])
+    lgPrev = pfquaternion.logBatch([ pfquaternion.inverseMultiply(inKeys[i], inKeys[i-1]) for i in inner ])
+    ex = pfquaternion.expBatch([ [ (a[0] + b[0]) * -0.25, (a[1] + b[1]) * -0.25, (a[2] + b[2]) * -0.25, 0.0 ]
+      for ( a, b ) in zip(lgNext, lgPrev) ])
+    retVal = [ list(inKeys[0]) ]
+    retVal.extend([ pfquaternion.multiply(inKeys[i], e) for ( i, e ) in zip(inner, ex) ])
+    retVal.append(list(inKeys[-1]))
+    return retVal
+
+  @staticmethod
+  def __slerp(inA, inB, inR) :
+    # 符号をそろえないslerp
+    ( ax, ay, az, aw ) = inA
+    ( bx, by, bz, bw ) = inB
+    cs = ax*bx + ay*by + az*bz + aw*bw
+    if 1.0 - cs * cs > 1.0e-8 :
+      th = math.acos(min(max(cs, -1.0), 1.0))
+      ra = math.sin(th * (1.0 - inR))
+      rb = math.sin(th * inR)
+    else :
+      ra = 1.0 - inR
+      rb = inR
+    return ( ax*ra + bx*rb, ay*ra + by*rb, az*ra + bz*rb, aw*ra + bw*rb )
+
+  @staticmethod
+  def __unit(inQ) :
+    # 符号を変えない正規化
+    ( x, y, z, w ) = inQ
+    scl = math.sqrt(x*x + y*y + z*z + w*w)
+    if scl < 1.0e-10 : return ( 0.0, 0.0, 0.0, 1.0 )
+    s = 1.0 / scl
+    return ( x*s, y*s, z*s, w*s )
+
+  def sample(self, inTime) :
+    '''
+    sample(time) -> qt。範囲外は端のキー
+    '''
+    return self.sampleMany([ inTime ])[0]
+
+  def sampleMany(self, inTimes) :
+    '''
+    sampleMany([time, ...]) -> [qt, ...]
+    '''
+    times = self.__times
+    keys = self.__keys
+    tans = self.__tangents
+    last = len(times) - 1
+    slerp = pfSquadCurve.__slerp
+    unit = pfSquadCurve.__unit
+    normal = pfquaternion.normal
+    retVal = []
+    for t in inTimes :
+      if last == 0 or t <= times[0] :
+        retVal.append(normal(keys[0]))
+        continue
+      if t >= times[last] :
+        retVal.append(normal(keys[last]))
+        continue
+      idx = bisect.bisect_right(times, t) - 1
+      h = (t - times[idx]) / (times[idx+1] - times[idx])
+      q = slerp(keys[idx], keys[idx+1], h)
+      s = slerp(tans[idx], tans[idx+1], h)
+      retVal.append(normal(slerp(unit(q), unit(s), 2.0 * h * (1.0 - h))))
+    return retVal
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+'''
+transformの配列
+
+N個のtransformを、pfmatrix.decomposeの出力と同じ
+translate(3), quaternion(4), shear(3), scale(3) ごとの連続した配列で保持する。
+必要なら(N,16)の行列をキャッシュする。
+各配列はmemoryviewとして取り出せる(buffer protocol)。
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import array
+
+from . import pfmatrix
+from . import pfutil
+
+
+FLOAT32 = pfutil.FLOAT32
+FLOAT64 = pfutil.FLOAT64
+TYPECODES = pfutil.TYPECODES
+
+
+class pfTransformArray(object) :
+  '''
+  transformの配列クラス
+  '''
+  __count = 0
+  __dtype = None
+  __translate = None   # memoryview。N*3
+  __quaternion = None  # memoryview。N*4
+  __shear = None       # memoryview。N*3
+  __scale = None       # memoryview。N*3
+  __matrix = None      # memoryview。N*16。キャッシュしない場合はNone
+  __valid = None       # memoryview。N。行列キャッシュが有効なら1
+
+  @property
+  def Count(self) :
+    '''
+    Count : int. 要素数
+    '''
+    return self.__count
+  @property
+  def DType(self) :
+    '''
+    DType : str. FLOAT32 or FLOAT64
+    '''
+    return self.__dtype
+  @property
+  def Translate(self) :
+    '''
+    Translate : memoryview. [x,y,z, x,y,z, ...]
+    '''
+    return self.__translate
+  @property
+  def Quaternion(self) :
+    '''
+    Quaternion : memoryview. [x,y,z,w, x,y,z,w, ...]
+    '''
+    return self.__quaternion
+  @property
+  def Shear(self) :
+    '''
+    Shear : memoryview. [x,y,z, x,y,z, ...]
+    '''
+    return self.__shear
+  @property
+  def Scale(self) :
+    '''
+    Scale : memoryview. [x,y,z, x,y,z, ...]
+    '''
+    return self.__scale
+  @property
+  def Matrix(self) :
+    '''
+    Matrix : memoryview or None. 行列のキャッシュ [m0..m15, m0..m15, ...]。toMatrices()の後に有効
+    '''
+    return self.__matrix
+
+  @staticmethod
+  def __view(inBuf, inTypeCode, inLen) :
+    mv = memoryview(inBuf)
+    if mv.format != inTypeCode : mv = mv.cast('B').cast(inTypeCode)
+    if len(mv) != inLen : raise ValueError('buffer length %d != %d' % (len(mv), inLen))
+    return mv
+
+  @staticmethod
+  def __zeros(inTypeCode, inLen) :
+    return memoryview(array.array(inTypeCode, bytes(array.array(inTypeCode).itemsize * inLen)))
+
+  def __init__(self, count=0, dtype=FLOAT64, matrixCache=False) :
+    '''
+    コンストラクタ。quaternionはidentity, scaleは1で初期化
+    '''
+    tc = TYPECODES[dtype]
+    self.__count = count
+    self.__dtype = dtype
+    self.__translate = pfTransformArray.__zeros(tc, count * 3)
+    self.__quaternion = pfTransformArray.__zeros(tc, count * 4)
+    self.__shear = pfTransformArray.__zeros(tc, count * 3)
+    self.__scale = pfTransformArray.__zeros(tc, count * 3)
+    for idx in range(count) :
+      self.__quaternion[idx*4+3] = 1.0
+      self.__scale[idx*3] = self.__scale[idx*3+1] = self.__scale[idx*3+2] = 1.0
+    if matrixCache :
+      self.__matrix = pfTransformArray.__zeros(tc, count * 16)
+      self.__valid = memoryview(bytearray(count))
+
+  @classmethod
+  def fromBuffers(cls, count, translate, quaternion, shear, scale, matrix=None, dtype=FLOAT64) :
+    '''
+    fromBuffers(count, translate, quaternion, shear, scale, matrix, dtype) : 既存のbufferをコピーせずに使う
+    '''
+    tc = TYPECODES[dtype]
+    return cls.__fromViews(count, dtype,
+      cls.__view(translate, tc, count * 3), cls.__view(quaternion, tc, count * 4),
+      cls.__view(shear, tc, count * 3), cls.__view(scale, tc, count * 3),
+      None if matrix is None else cls.__view(matrix, tc, count * 16),
+      None if matrix is None else memoryview(bytearray(count)))
+
+  @classmethod
+  def fromMatrices(cls, inMtxs, dtype=FLOAT64, matrixCache=True) :
+    '''
+    fromMatrices([mtx, ...], dtype, matrixCache) : pfmatrix.decomposeBatchで分解して作成
+    '''
+    retVal = cls(len(inMtxs), dtype, matrixCache)
+    ( trns, qts, shrs, scls ) = pfmatrix.decomposeBatch(inMtxs)
+    tc = TYPECODES[dtype]
+    retVal.__translate[:] = array.array(tc, [ v for trn in trns for v in trn[:3] ])
+    retVal.__quaternion[:] = array.array(tc, [ v for qt in qts for v in qt[:4] ])
+    retVal.__shear[:] = array.array(tc, [ v for shr in shrs for v in shr[:3] ])
+    retVal.__scale[:] = array.array(tc, [ v for scl in scls for v in scl[:3] ])
+    if matrixCache :
+      retVal.__matrix[:] = array.array(tc, [ v for mtx in inMtxs for v in mtx[:16] ])
+      retVal.__valid[:] = b'\x01' * len(inMtxs)
+    return retVal
+
+  @classmethod
+  def __fromViews(cls, inCount, inDType, inTrn, inQt, inShr, inScl, inMtx, inValid) :
+    retVal = cls.__new__(cls)
+    retVal.__count = inCount
+    retVal.__dtype = inDType
+    retVal.__translate = inTrn
+    retVal.__quaternion = inQt
+    retVal.__shear = inShr
+    retVal.__scale = inScl
+    retVal.__matrix = inMtx
+    retVal.__valid = inValid
+    return retVal
+
+  def __len__(self) :
+    return self.__count
+
+  def __index(self, inIdx) :
+    if inIdx < 0 : inIdx += self.__count
+    if inIdx < 0 or inIdx >= self.__count : raise IndexError('pfTransformArray index out of range')
+    return inIdx
+
+  def __getitem__(self, inIdx) :
+    if isinstance(inIdx, slice) :
+      ( start, stop, step ) = inIdx.indices(self.__count)
+      if step != 1 : raise ValueError('pfTransformArray slice step must be 1')
+      stop = max(start, stop)
+      return pfTransformArray.__fromViews(stop - start, self.__dtype,
+        self.__translate[start*3:stop*3], self.__quaternion[start*4:stop*4],
+        self.__shear[start*3:stop*3], self.__scale[start*3:stop*3],
+        None if self.__matrix is None else self.__matrix[start*16:stop*16],
+        None if self.__valid is None else self.__valid[start:stop])
+    idx = self.__index(inIdx)
+    return ( self.getTranslate(idx), self.getQuaternion(idx), self.getShear(idx), self.getScale(idx) )
+
+  def __setitem__(self, inIdx, inTrnQtShrScl) :
+    idx = self.__index(inIdx)
+    ( trn, qt, shr, scl ) = inTrnQtShrScl
+    self.__translate[idx*3:idx*3+3] = array.array(self.__translate.format, trn[:3])
+    self.__quaternion[idx*4:idx*4+4] = array.array(self.__quaternion.format, qt[:4])
+    self.__shear[idx*3:idx*3+3] = array.array(self.__shear.format, shr[:3])
+    self.__scale[idx*3:idx*3+3] = array.array(self.__scale.format, scl[:3])
+    if self.__valid is not None : self.__valid[idx] = 0
+
+  def getTranslate(self, inIdx) :
+    '''
+    getTranslate(idx) -> [x,y,z,0]
+    '''
+    ofs = self.__index(inIdx) * 3
+    v = self.__translate
+    return [ v[ofs], v[ofs+1], v[ofs+2], 0.0 ]
+  def getQuaternion(self, inIdx) :
+    '''
+    getQuaternion(idx) -> [x,y,z,w]
+    '''
+    ofs = self.__index(inIdx) * 4
+    return self.__quaternion[ofs:ofs+4].tolist()
+  def getShear(self, inIdx) :
+    '''
+    getShear(idx) -> [x,y,z,0]
+    '''
+    ofs = self.__index(inIdx) * 3
+    v = self.__shear
+    return [ v[ofs], v[ofs+1], v[ofs+2], 0.0 ]
+  def getScale(self, inIdx) :
+    '''
+    getScale(idx) -> [x,y,z,0]
+    '''
+    ofs = self.__index(inIdx) * 3
+    v = self.__scale
+    return [ v[ofs], v[ofs+1], v[ofs+2], 0.0 ]
+
+  def __storeMatrix(self, inIdx, inMtx) :
+    self.__matrix[inIdx*16:inIdx*16+16] = array.array(self.__matrix.format, inMtx)
+    self.__valid[inIdx] = 1
+
+  def getMatrix(self, inIdx) :
+    '''
+    getMatrix(idx) -> mtx。キャッシュが有効ならキャッシュから
+    '''
+    idx = self.__index(inIdx)
+    if self.__valid is not None and self.__valid[idx] :
+      return self.__matrix[idx*16:idx*16+16].tolist()
+    mtx = pfmatrix.compose(self.getTranslate(idx), self.getQuaternion(idx), self.getShear(idx), self.getScale(idx))
+    if self.__valid is not None : self.__storeMatrix(idx, mtx)
+    return mtx
+
+  def toMatrices(self) :
+    '''
+    toMatrices() -> [mtx, ...]。pfmatrix.composeBatchで合成。キャッシュがあれば更新する
+    '''
+    if self.__valid is None : idxs = range(self.__count)
+    else : idxs = [ idx for idx in range(self.__count) if not self.__valid[idx] ]
+    t = self.__translate.tolist()
+    q = self.__quaternion.tolist()
+    h = self.__shear.tolist()
+    s = self.__scale.tolist()
+    mtxs = pfmatrix.composeBatch(
+      [ [ t[idx*3], t[idx*3+1], t[idx*3+2], 0.0 ] for idx in idxs ],
+      [ q[idx*4:idx*4+4] for idx in idxs ],
+      [ [ h[idx*3], h[idx*3+1], h[idx*3+2], 0.0 ] for idx in idxs ],
+      [ [ s[idx*3], s[idx*3+1], s[idx*3+2], 0.0 ] for idx in idxs ])
+    if self.__valid is None : return mtxs
+    for ( idx, mtx ) in zip(idxs, mtxs) : self.__storeMatrix(idx, mtx)
+    m = self.__matrix.tolist()
+    return [ m[idx*16:idx*16+16] for idx in range(self.__count) ]
+
+  def setMatrix(self, inIdx, inMtx) :
+    '''
+    setMatrix(idx, mtx) : pfmatrix.decomposeで分解して設定
+    '''
+    idx = self.__index(inIdx)
+    self[idx] = pfmatrix.decompose(inMtx)
+    if self.__valid is not None : self.__storeMatrix(idx, inMtx)
+
+  def invalidate(self) :
+    '''
+    invalidate() : 行列のキャッシュを無効にする(配列を直接書き換えた後に呼ぶ)
+    '''
+    if self.__valid is not None :
+      for idx in range(self.__count) : self.__valid[idx] = 0
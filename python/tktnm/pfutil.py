@@ -8,16 +8,31 @@ Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
 '''
 
 
+import collections
 import enum
 
 
+# 連続した配列の要素の型。arrayのtypecode
+FLOAT32 = 'float32'
+FLOAT64 = 'float64'
+TYPECODES = { FLOAT32 : 'f', FLOAT64 : 'd' }
+
+# 角速度の座標系。pfangular, pfintegrator
+FRAME_LOCAL = 'local'  # q = q * r
+FRAME_WORLD = 'world'  # q = r * q
+
+
 def isUnique(inLst, inObj) :
+  if isinstance(inLst, pfIdentitySet) :
+    return not inLst.contains(inObj)
   for elm in inLst :
     if elm is inObj :
       return False
   return True
 
 def appendUnique(ioLst, inObj) :
+  if isinstance(ioLst, pfIdentitySet) :
+    return ioLst.append(inObj)
   if isUnique(ioLst, inObj) :
     ioLst.append(inObj)
     return True
@@ -26,6 +41,8 @@ def appendUnique(ioLst, inObj) :
 
 
 def insertUnique(ioLst, inIdx, inObj) :
+  if isinstance(ioLst, pfIdentitySet) :
+    return ioLst.insert(inIdx, inObj)
   if isUnique(ioLst, inObj) :
     ioLst.insert(inIdx, inObj)
     return True
@@ -34,6 +51,13 @@ def insertUnique(ioLst, inIdx, inObj) :
 
 
 def insertBefore(ioLst, inTgt, inObj) :
+  '''
+  insertBefore(list or pfIdentitySet, target, object) : targetの前に挿入。targetがNoneまたは無ければ末尾に追加
+  listは同一のオブジェクトが既にあっても挿入する(重複する)。pfIdentitySetは重複できないので、既に存在する場合は何もしない
+  '''
+  if isinstance(ioLst, pfIdentitySet) :
+    ioLst.insertBefore(inTgt, inObj)
+    return
   if inTgt is not None :
     for idx, elm in enumerate(ioLst) :
       if elm is inTgt :
@@ -42,6 +66,116 @@ def insertBefore(ioLst, inTgt, inObj) :
   ioLst.append(inObj)
 
 
+class pfIdentitySet(object) :
+  '''
+  順序付きの同一性(is)集合クラス。
+  id()をキーにした双方向リンクで順序を保持し、
+  存在確認・末尾追加・指定オブジェクトの前への挿入・削除をO(1)で行う。
+  '''
+  __objs = None  # dict。id(obj) -> obj
+  __prev = None  # dict。id(obj) -> 前のオブジェクトのid。先頭はNone
+  __next = None  # dict。id(obj) -> 次のオブジェクトのid。末尾はNone
+  __head = None  # 先頭のオブジェクトのid
+  __tail = None  # 末尾のオブジェクトのid
+  __list = None  # list。Listプロパティ用のキャッシュ。変更時に破棄
+  @property
+  def List(self) :
+    '''
+    List : list. 順序通りのリストの取得。(変更しないこと)
+    '''
+    if self.__list is None :
+      self.__list = list(iter(self))
+    return self.__list
+  def __init__(self, inObjs=None) :
+    '''
+    コンストラクタ
+    '''
+    self.__objs = dict()
+    self.__prev = dict()
+    self.__next = dict()
+    if inObjs is not None :
+      for obj in inObjs : self.append(obj)
+
+  def __len__(self) :
+    return len(self.__objs)
+
+  def __contains__(self, inObj) :
+    return self.contains(inObj)
+
+  def __iter__(self) :
+    key = self.__head
+    while key is not None :
+      yield self.__objs[key]
+      key = self.__next[key]
+
+  def __getitem__(self, inIdx) :
+    return self.List[inIdx]
+
+  def contains(self, inObj) :
+    '''
+    contains(object) : bool. 同一のオブジェクトが存在するか
+    '''
+    return id(inObj) in self.__objs
+
+  def append(self, inObj) :
+    '''
+    append(object) : bool. 末尾に追加。既に存在する場合はFalse
+    '''
+    key = id(inObj)
+    if key in self.__objs : return False
+    self.__link(key, inObj, self.__tail, None)
+    return True
+
+  def insertBefore(self, inTgt, inObj) :
+    '''
+    insertBefore(target, object) : bool. targetの前に挿入。targetが無ければ末尾に追加。既に存在する場合はFalse
+    '''
+    key = id(inObj)
+    if key in self.__objs : return False
+    tgtKey = id(inTgt)
+    if inTgt is None or tgtKey not in self.__objs :
+      self.__link(key, inObj, self.__tail, None)
+    else :
+      self.__link(key, inObj, self.__prev[tgtKey], tgtKey)
+    return True
+
+  def insert(self, inIdx, inObj) :
+    '''
+    insert(int, object) : bool. list.insertと同じ位置に挿入(O(n))。既に存在する場合はFalse
+    '''
+    if id(inObj) in self.__objs : return False
+    lst = self.List
+    if inIdx < 0 : inIdx = max(len(lst) + inIdx, 0)
+    if inIdx >= len(lst) : return self.append(inObj)
+    return self.insertBefore(lst[inIdx], inObj)
+
+  def remove(self, inObj) :
+    '''
+    remove(object) : bool. 削除。存在しない場合はFalse
+    '''
+    key = id(inObj)
+    if key not in self.__objs : return False
+    prevKey = self.__prev.pop(key)
+    nextKey = self.__next.pop(key)
+    del self.__objs[key]
+    if prevKey is None : self.__head = nextKey
+    else : self.__next[prevKey] = nextKey
+    if nextKey is None : self.__tail = prevKey
+    else : self.__prev[nextKey] = prevKey
+    self.__list = None
+    return True
+
+  def __link(self, inKey, inObj, inPrevKey, inNextKey) :
+    self.__objs[inKey] = inObj
+    self.__prev[inKey] = inPrevKey
+    self.__next[inKey] = inNextKey
+    if inPrevKey is None : self.__head = inKey
+    else : self.__next[inPrevKey] = inKey
+    if inNextKey is None : self.__tail = inKey
+    else : self.__prev[inNextKey] = inKey
+    self.__list = None
+
+
 class pfSortedList(object) :
   '''
   ソート済みリストクラス
@@ -147,3 +281,89 @@ class pfSortedList(object) :
     idx = self.getIndexByKey(inK)
     if idx >= 0 : return self.__list.pop(idx)
     return None
+
+
+class pfLRUCache(object) :
+  '''
+  サイズ制限付きのLRUキャッシュクラス。ヒット率を集計する
+  '''
+  __dict = None  # OrderedDict。最近使ったものが末尾
+  __maxSize = 0
+  __hits = 0
+  __misses = 0
+  @property
+  def MaxSize(self) :
+    '''
+    MaxSize : int. 最大の要素数。0ならキャッシュしない
+    '''
+    return self.__maxSize
+  @MaxSize.setter
+  def MaxSize(self, inV) :
+    self.__maxSize = max(int(inV), 0)
+    while len(self.__dict) > self.__maxSize : self.__dict.popitem(last=False)
+  @property
+  def Hits(self) :
+    '''
+    Hits : int. ヒット数
+    '''
+    return self.__hits
+  @property
+  def Misses(self) :
+    '''
+    Misses : int. ミス数
+    '''
+    return self.__misses
+  @property
+  def HitRate(self) :
+    '''
+    HitRate : float. ヒット率
+    '''
+    total = self.__hits + self.__misses
+    if total == 0 : return 0.0
+    return self.__hits / total
+  def __init__(self, maxSize=1024) :
+    '''
+    コンストラクタ
+    '''
+    self.__dict = collections.OrderedDict()
+    self.__maxSize = max(int(maxSize), 0)
+
+  def __len__(self) :
+    return len(self.__dict)
+
+  def get(self, inKey, inDefault=None) :
+    '''
+    get(key, default) : object. 無ければdefault
+    '''
+    try :
+      v = self.__dict[inKey]
+    except KeyError :
+      self.__misses += 1
+      return inDefault
+    self.__dict.move_to_end(inKey)
+    self.__hits += 1
+    return v
+
+  def put(self, inKey, inV) :
+    '''
+    put(key, object) : 追加。最大数を超えたら最も古いものを捨てる
+    '''
+    if self.__maxSize <= 0 : return
+    self.__dict[inKey] = inV
+    self.__dict.move_to_end(inKey)
+    if len(self.__dict) > self.__maxSize : self.__dict.popitem(last=False)
+
+  def clear(self) :
+    '''
+    clear() : 要素と集計をクリア
+    '''
+    self.__dict.clear()
+    self.__hits = 0
+    self.__misses = 0
+
+  def stats(self) :
+    '''
+    stats() : dict. { 'hits', 'misses', 'hitRate', 'size', 'maxSize' }
+    '''
+    return { 'hits' : self.__hits, 'misses' : self.__misses, 'hitRate' : self.HitRate,
+      'size' : len(self.__dict), 'maxSize' : self.__maxSize }
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+'''
+nan, infの一括検出とサニタイザ
+
+nonFinite*はまとめて合計を取り、有限ならそのまま返す。有限でない場合だけ要素ごとに調べる。
+  bad = pfvalidate.nonFiniteMatrices(mtxs)  # [ index, ... ]
+
+enable()でpfmatrix, pfquaternionの公開関数に戻り値を調べるpfpatchのlayerを重ね、
+nan, infを返した最初の呼び出しでValueErrorを送出する。disable()で外す。
+エラーのメッセージの引数と戻り値は長いlistを省略して表示する。
+環境変数 TKTNM_SANITIZE=1 でimport時に有効になる。
+
+  with pfvalidate.sanitizing() :
+    for frame in range(100) :
+      evaluate()
+      pfvalidate.markFrame()
+
+See Copyright(LICENSE.txt) for the status of this software.
+
+Author: Takeharu TANIMURA <tanie@kk.iij4u.or.jp>
+'''
+
+import contextlib
+import functools
+import math
+import reprlib
+
+from . import pfpatch
+
+
+MODULES = ( 'pfmatrix', 'pfquaternion' )
+
+__OWNER = 'pfvalidate'  # pfpatchのlayerの所有者
+__frames = [ 0 ]
+# エラーのメッセージ用。listは先頭の4要素、入れ子は3段まで
+__repr = reprlib.Repr()
+__repr.maxlist = 4
+__repr.maxtuple = 4
+__repr.maxlevel = 3
+
+
+def nonFiniteRecords(inValues, inWidth) :
+  '''
+  nonFiniteRecords(values, width) -> [ index, ... ]。連続した配列(array, memoryview, list)をwidth個ずつの要素として調べる
+  '''
+  vals = inValues.tolist() if hasattr(inValues, 'tolist') else inValues
+  if math.isfinite(sum(vals)) : return []
+  isfinite = math.isfinite
+  retVal = []
+  for ( idx, ofs ) in enumerate(range(0, len(vals), inWidth)) :
+    rec = vals[ofs:ofs+inWidth]
+    if isfinite(sum(rec)) : continue
+    for v in rec :
+      if not isfinite(v) :
+        retVal.append(idx)
+        break
+  return retVal
+
+def nonFinite(inRecords) :
+  '''
+  nonFinite([ [float, ...], ... ]) -> [ index, ... ]
+  '''
+  isfinite = math.isfinite
+  total = 0.0
+  for rec in inRecords : total += sum(rec)
+  if isfinite(total) : return []
+  retVal = []
+  for ( idx, rec ) in enumerate(inRecords) :
+    if isfinite(sum(rec)) : continue
+    for v in rec :
+      if not isfinite(v) :
+        retVal.append(idx)
+        break
+  return retVal
+
+def nonFiniteMatrices(inMtxs) :
+  '''
+  nonFiniteMatrices([mtx, ...]) -> [ index, ... ]
+  '''
+  return nonFinite(inMtxs)
+
+def nonFiniteQuaternions(inQts) :
+  '''
+  nonFiniteQuaternions([qt, ...]) -> [ index, ... ]
+  '''
+  return nonFinite(inQts)
+
+def nonFiniteVectors(inVs) :
+  '''
+  nonFiniteVectors([v, ...]) -> [ index, ... ]
+  '''
+  return nonFinite(inVs)
+
+def isFiniteValue(inValue) :
+  '''
+  isFiniteValue(value) -> bool。float, list, tupleを入れ子までたどる。それ以外はTrue
+  '''
+  if isinstance(inValue, float) : return math.isfinite(inValue)
+  if isinstance(inValue, ( list, tuple )) :
+    for v in inValue :
+      if not isFiniteValue(v) : return False
+  return True
+
+def summary(inValue) :
+  '''
+  summary(value) -> str。長いlistを省略したrepr
+  '''
+  return __repr.repr(inValue)
+
+def __wrap(inFunc, inName) :
+  frames = __frames
+  @functools.wraps(inFunc)
+  def wrapper(*args, **kwargs) :
+    retVal = inFunc(*args, **kwargs)
+    if not isFiniteValue(retVal) :
+      raise ValueError('%s returned a non-finite value at frame %d : %s <- %s' % (inName, frames[0], summary(retVal), summary(args)))
+    return retVal
+  return wrapper
+
+def isEnabled() :
+  '''
+  isEnabled() -> bool
+  '''
+  return len(pfpatch.installed(__OWNER)) > 0
+
+def enable(modules=MODULES) :
+  '''
+  enable(modules) : 公開関数を戻り値を調べる関数に置き換える
+  '''
+  if isEnabled() : return
+  pfpatch.wrapModules(__OWNER, modules, __wrap)
+
+def disable() :
+  '''
+  disable() : 戻り値を調べるlayerを外す
+  '''
+  pfpatch.popAll(__OWNER)
+
+def markFrame() :
+  '''
+  markFrame() : フレームの区切り。エラーのメッセージのフレーム番号
+  '''
+  __frames[0] += 1
+
+def frameCount() :
+  '''
+  frameCount() -> int
+  '''
+  return __frames[0]
+
+@contextlib.contextmanager
+def sanitizing(modules=MODULES) :
+  '''
+  with sanitizing() : ... : ブロックの間だけ調べる。フレーム番号は0から
+  '''
+  __frames[0] = 0
+  enabled = isEnabled()
+  enable(modules)
+  try :
+    yield
+  finally :
+    if not enabled : disable()